@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Application, SecurityProperty, LoanRequirement, Document, Fee, Repayment, FundingCalculationHistory, Valuer, QuantitySurveyor, ActiveLoan, ActiveLoanRepayment
+from .models import Application, SecurityProperty, LoanRequirement, Document, Fee, Repayment, FundingCalculationHistory, Valuer, QuantitySurveyor, ActiveLoan, ActiveLoanRepayment, InterestPaymentDue, InterestAccrual
 
 
 class SecurityPropertyInline(admin.TabularInline):
@@ -205,6 +205,12 @@ class ActiveLoanRepaymentInline(admin.TabularInline):
     readonly_fields = ('is_late', 'created_at')
 
 
+class InterestPaymentDueInline(admin.TabularInline):
+    model = InterestPaymentDue
+    extra = 0
+    readonly_fields = ('created_at',)
+
+
 @admin.register(ActiveLoan)
 class ActiveLoanAdmin(admin.ModelAdmin):
     list_display = ('application', 'settlement_date', 'loan_expiry_date', 'interest_payments_required', 'is_active', 'days_until_expiry')
@@ -231,7 +237,7 @@ class ActiveLoanAdmin(admin.ModelAdmin):
         }),
     )
     
-    inlines = [ActiveLoanRepaymentInline]
+    inlines = [InterestPaymentDueInline, ActiveLoanRepaymentInline]
     
     def days_until_expiry(self, obj):
         days = obj.days_until_expiry
@@ -268,3 +274,13 @@ class ActiveLoanRepaymentAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(InterestAccrual)
+class InterestAccrualAdmin(admin.ModelAdmin):
+    list_display = ('active_loan', 'business_date', 'balance', 'accrued_interest', 'capitalised_interest', 'arrears_amount', 'days_in_arrears')
+    list_filter = ('business_date',)
+    search_fields = ('active_loan__application__reference_number',)
+    raw_id_fields = ('active_loan',)
+    readonly_fields = ('created_at', 'updated_at')
+    date_hierarchy = 'business_date'
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:42
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0003_add_funding_calculation_input_field'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterestPaymentDue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When this record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='When this record was last updated')),
+                ('due_date', models.DateField(help_text='Date the interest payment is due')),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, help_text='Expected interest payment amount', max_digits=12, null=True, validators=[django.core.validators.MinValueValidator(0)])),
+                ('paid', models.BooleanField(default=False, help_text='Whether this interest payment has been received')),
+                ('active_loan', models.ForeignKey(help_text='Active loan this interest payment is scheduled for', on_delete=django.db.models.deletion.CASCADE, related_name='interest_payments_due', to='applications.activeloan')),
+            ],
+            options={
+                'verbose_name': 'Interest Payment Due',
+                'verbose_name_plural': 'Interest Payments Due',
+                'ordering': ['due_date'],
+                'indexes': [models.Index(fields=['due_date', 'paid'], name='application_due_dat_eb08c6_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='interestpaymentdue',
+            constraint=models.UniqueConstraint(fields=('active_loan', 'due_date'), name='unique_interest_payment_due_date'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:45
+
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+INTEREST_REPAYMENT_TYPES = ('interest', 'principal_interest')
+
+
+def backfill_interest_payment_due(apps, schema_editor):
+    """Populate InterestPaymentDue from ActiveLoan.interest_payment_due_dates."""
+    ActiveLoan = apps.get_model('applications', 'ActiveLoan')
+    ActiveLoanRepayment = apps.get_model('applications', 'ActiveLoanRepayment')
+    InterestPaymentDue = apps.get_model('applications', 'InterestPaymentDue')
+
+    paid_keys = set(
+        ActiveLoanRepayment.objects.filter(
+            repayment_type__in=INTEREST_REPAYMENT_TYPES,
+            due_date__isnull=False
+        ).values_list('active_loan_id', 'due_date')
+    )
+
+    loans = ActiveLoan.objects.filter(
+        interest_payments_required=True
+    ).values_list('id', 'interest_payment_due_dates', 'application__loan_amount')
+
+    rows = []
+    for loan_id, due_dates, loan_amount in loans.iterator():
+        # Mirrors ActiveLoan.get_next_payment_amount at the time of migration
+        amount = (Decimal(loan_amount) * Decimal('0.01')).quantize(Decimal('0.01')) if loan_amount else None
+
+        parsed = set()
+        for date_str in due_dates or []:
+            try:
+                parsed.add(datetime.strptime(date_str, '%Y-%m-%d').date())
+            except (ValueError, TypeError):
+                continue
+
+        for due_date in sorted(parsed):
+            rows.append(InterestPaymentDue(
+                active_loan_id=loan_id,
+                due_date=due_date,
+                amount=amount,
+                paid=(loan_id, due_date) in paid_keys
+            ))
+
+        if len(rows) >= BATCH_SIZE:
+            InterestPaymentDue.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+
+    if rows:
+        InterestPaymentDue.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0004_interest_payment_due'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_interest_payment_due, migrations.RunPython.noop),
+    ]
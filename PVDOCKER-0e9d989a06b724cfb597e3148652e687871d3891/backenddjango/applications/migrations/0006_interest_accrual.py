@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0005_backfill_interest_payment_due'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterestAccrual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When this record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='When this record was last updated')),
+                ('business_date', models.DateField(help_text='Business date the accrual was calculated as at')),
+                ('annual_rate', models.DecimalField(decimal_places=3, default=0, help_text='Annual interest rate (percent) used for the accrual', max_digits=6)),
+                ('principal', models.DecimalField(decimal_places=2, default=0, help_text='Loan principal', max_digits=14)),
+                ('capitalised_interest', models.DecimalField(decimal_places=2, default=0, help_text='Interest capitalised onto the balance to date', max_digits=14)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, help_text='Principal plus capitalised interest', max_digits=14)),
+                ('daily_interest', models.DecimalField(decimal_places=4, default=0, help_text='Interest accruing per day on the balance', max_digits=14)),
+                ('accrued_interest', models.DecimalField(decimal_places=2, default=0, help_text='Interest accrued since the last paid interest period', max_digits=14)),
+                ('arrears_amount', models.DecimalField(decimal_places=2, default=0, help_text='Scheduled interest payments overdue and unpaid', max_digits=14)),
+                ('days_in_arrears', models.PositiveIntegerField(default=0, help_text='Days since the oldest overdue unpaid interest payment')),
+                ('active_loan', models.ForeignKey(help_text='Active loan this accrual is for', on_delete=django.db.models.deletion.CASCADE, related_name='accruals', to='applications.activeloan')),
+            ],
+            options={
+                'verbose_name': 'Interest Accrual',
+                'verbose_name_plural': 'Interest Accruals',
+                'ordering': ['-business_date'],
+                'indexes': [models.Index(fields=['business_date'], name='application_busines_c6d61d_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='interestaccrual',
+            constraint=models.UniqueConstraint(fields=('active_loan', 'business_date'), name='unique_interest_accrual_business_date'),
+        ),
+    ]
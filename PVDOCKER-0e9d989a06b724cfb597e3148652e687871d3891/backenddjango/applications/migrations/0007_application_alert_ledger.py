@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0006_interest_accrual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule', models.CharField(help_text='Name of the alert rule that fired', max_length=50)),
+                ('period', models.CharField(help_text='Period the alert covers; the rule fires once per period', max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the alert was sent')),
+                ('application', models.ForeignKey(help_text='The application the alert was about', on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='applications.application')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='applicationalert',
+            constraint=models.UniqueConstraint(fields=('rule', 'application', 'period'), name='applications_alert_dedup'),
+        ),
+    ]
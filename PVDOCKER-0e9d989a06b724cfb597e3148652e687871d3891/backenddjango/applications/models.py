@@ -60,7 +60,13 @@ from .models.financial import (
     Repayment,
     FundingCalculationHistory,
     ActiveLoan,
-    ActiveLoanRepayment
+    ActiveLoanRepayment,
+    InterestPaymentDue,
+    InterestAccrual
+)
+
+from .models.alerts import (
+    ApplicationAlert
 )
 
 # Maintain the original __all__ list for explicit exports
@@ -88,6 +94,11 @@ __all__ = [
     'FundingCalculationHistory',
     'ActiveLoan',
     'ActiveLoanRepayment',
+    'InterestPaymentDue',
+    'InterestAccrual',
+    
+    # Alert models
+    'ApplicationAlert',
     
     # Base models (available but typically not imported directly)
     'TimestampedModel',
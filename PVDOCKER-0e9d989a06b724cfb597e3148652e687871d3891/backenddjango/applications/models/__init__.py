@@ -18,7 +18,8 @@ from .contacts import Valuer, QuantitySurveyor
 from .properties import SecurityProperty
 from .requirements import LoanRequirement
 from .documents import Document
-from .financial import Fee, Repayment, FundingCalculationHistory, ActiveLoan, ActiveLoanRepayment
+from .financial import Fee, Repayment, FundingCalculationHistory, ActiveLoan, ActiveLoanRepayment, InterestPaymentDue, InterestAccrual
+from .alerts import ApplicationAlert
 
 # Maintain backward compatibility - export all models at package level
 __all__ = [
@@ -49,4 +50,9 @@ __all__ = [
     'FundingCalculationHistory',
     'ActiveLoan',
     'ActiveLoanRepayment',
+    'InterestPaymentDue',
+    'InterestAccrual',
+    
+    # Alert models
+    'ApplicationAlert',
 ] 
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+Application alert models.
+
+Contains the ledger used by the application alert sweep to remember which
+alerts have already been sent, so an application is alerted at most once
+per rule per period.
+"""
+
+from django.db import models
+from django.utils import timezone
+
+
+class ApplicationAlert(models.Model):
+    """
+    Record of an alert rule firing for an application in a period.
+    
+    The unique constraint on (rule, application, period) is what stops the
+    daily sweep from alerting the same application again until the rule's
+    next period starts.
+    """
+    
+    rule = models.CharField(
+        max_length=50,
+        help_text="Name of the alert rule that fired"
+    )
+    application = models.ForeignKey(
+        'applications.Application',
+        on_delete=models.CASCADE,
+        related_name='alerts',
+        help_text="The application the alert was about"
+    )
+    period = models.CharField(
+        max_length=20,
+        help_text="Period the alert covers; the rule fires once per period"
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="When the alert was sent"
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['rule', 'application', 'period'],
+                name='applications_alert_dedup'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.rule} for application {self.application_id} ({self.period})"
@@ -5,12 +5,18 @@ This module contains models for financial aspects of loan applications:
 - Fee tracking and management
 - Repayment scheduling and recording
 - Funding calculation history and auditing
+- Active loans and their interest payment schedules
+- Daily interest accruals for active loans
 """
 
+from datetime import datetime, timedelta
+from decimal import Decimal
+
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
-from django.db.models import JSONField
+from django.db.models import JSONField, Max, Min, Prefetch, Q
+from django.utils import timezone
 from .base import TimestampedModel, BaseApplicationModel
 
 
@@ -284,6 +290,53 @@ class FundingCalculationHistory(BaseApplicationModel):
             return 0
 
 
+class ActiveLoanQuerySet(models.QuerySet):
+    """
+    QuerySet for ActiveLoan with interest payment schedule lookups.
+    
+    All lookups run against the indexed InterestPaymentDue table so that
+    "payments due within N days" is a range query rather than a Python loop.
+    """
+    
+    def with_next_payment_date(self, within_days=None):
+        """
+        Annotate each loan with ``next_payment_due``.
+        
+        The annotation is the earliest unpaid due date on or after today,
+        optionally limited to the next ``within_days`` days.
+        """
+        today = timezone.now().date()
+        window = Q(
+            interest_payments_due__paid=False,
+            interest_payments_due__due_date__gte=today
+        )
+        if within_days is not None:
+            window &= Q(interest_payments_due__due_date__lte=today + timedelta(days=within_days))
+        return self.annotate(
+            next_payment_due=Min('interest_payments_due__due_date', filter=window)
+        )
+    
+    def payment_due_within(self, days):
+        """Filter to loans with an unpaid interest payment due in the next ``days`` days."""
+        return self.with_next_payment_date(within_days=days).filter(
+            next_payment_due__isnull=False
+        )
+    
+    def with_current_accrual(self):
+        """
+        Prefetch each loan's accrual row for the latest accrued business date.
+        
+        The row is exposed through ``ActiveLoan.current_accrual`` without a
+        per-loan query.
+        """
+        latest = InterestAccrual.objects.aggregate(latest=Max('business_date'))['latest']
+        return self.prefetch_related(Prefetch(
+            'accruals',
+            queryset=InterestAccrual.objects.filter(business_date=latest),
+            to_attr='current_accruals'
+        ))
+
+
 class ActiveLoan(TimestampedModel):
     """
     Model for managing active loans that have been settled.
@@ -355,17 +408,70 @@ class ActiveLoan(TimestampedModel):
             models.Index(fields=['is_active']),
         ]
     
+    objects = ActiveLoanQuerySet.as_manager()
+    
     def __str__(self):
         return f"Active Loan - {self.application.reference_number}"
     
     def save(self, *args, **kwargs):
         """
-        Override save to ensure the application stage is 'settled'.
+        Override save to ensure the application stage is 'settled'
+        and keep the interest payment schedule table in sync.
         """
         if self.application and self.application.stage != 'settled':
             self.application.stage = 'settled'
             self.application.save()
+        
+        creating = self._state.adding
+        update_fields = kwargs.get('update_fields')
         super().save(*args, **kwargs)
+        
+        schedule_fields = {'interest_payments_required', 'interest_payment_due_dates'}
+        if update_fields is None or schedule_fields.intersection(update_fields):
+            self.sync_interest_payment_schedule(creating=creating)
+    
+    def get_interest_payment_dates(self):
+        """Parse ``interest_payment_due_dates`` into a sorted list of dates, skipping bad entries."""
+        dates = set()
+        for date_str in self.interest_payment_due_dates or []:
+            try:
+                dates.add(datetime.strptime(date_str, '%Y-%m-%d').date())
+            except (ValueError, TypeError):
+                continue
+        return sorted(dates)
+    
+    def sync_interest_payment_schedule(self, creating=False):
+        """
+        Reconcile InterestPaymentDue rows with ``interest_payment_due_dates``.
+        
+        Unpaid rows for dates no longer in the list are removed and rows for
+        new dates are bulk created. Paid rows are never touched.
+        """
+        # Any annotated next payment date is stale once the schedule changes
+        self.__dict__.pop('next_payment_due', None)
+        
+        if not self.interest_payments_required:
+            if not creating:
+                self.interest_payments_due.filter(paid=False).delete()
+            return
+        
+        due_dates = set(self.get_interest_payment_dates())
+        existing = set() if creating else set(
+            self.interest_payments_due.values_list('due_date', flat=True)
+        )
+        
+        stale = existing - due_dates
+        if stale:
+            self.interest_payments_due.filter(due_date__in=stale, paid=False).delete()
+        
+        missing = due_dates - existing
+        if missing:
+            amount = self.get_next_payment_amount()
+            amount = Decimal(str(amount)).quantize(Decimal('0.01')) if amount else None
+            InterestPaymentDue.objects.bulk_create([
+                InterestPaymentDue(active_loan=self, due_date=due_date, amount=amount)
+                for due_date in sorted(missing)
+            ])
     
     @property
     def days_until_expiry(self):
@@ -378,19 +484,20 @@ class ActiveLoan(TimestampedModel):
     
     @property
     def next_interest_payment_date(self):
-        """Get the next interest payment due date."""
-        from django.utils import timezone
-        from datetime import datetime
-        today = timezone.now().date()
+        """
+        Get the next unpaid interest payment due date.
         
-        for date_str in self.interest_payment_due_dates:
-            try:
-                due_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                if due_date >= today:
-                    return due_date
-            except (ValueError, TypeError):
-                continue
-        return None
+        Uses the ``next_payment_due`` annotation when the loan was loaded via
+        ``ActiveLoan.objects.with_next_payment_date()``.
+        """
+        if 'next_payment_due' in self.__dict__:
+            return self.next_payment_due
+        
+        today = timezone.now().date()
+        return self.interest_payments_due.filter(
+            paid=False,
+            due_date__gte=today
+        ).order_by('due_date').values_list('due_date', flat=True).first()
     
     @property
     def days_until_next_payment(self):
@@ -402,6 +509,18 @@ class ActiveLoan(TimestampedModel):
             return delta.days
         return None
 
+    @property
+    def current_accrual(self):
+        """
+        Get the most recent InterestAccrual row for this loan.
+        
+        Uses the rows prefetched by ``ActiveLoan.objects.with_current_accrual()``
+        when available.
+        """
+        if 'current_accruals' in self.__dict__:
+            return self.current_accruals[0] if self.current_accruals else None
+        return self.accruals.order_by('-business_date').first()
+
     def get_next_payment_amount(self):
         """Get the amount for the next interest payment."""
         if not self.interest_payments_required:
@@ -415,6 +534,155 @@ class ActiveLoan(TimestampedModel):
         return 0
 
 
+class InterestPaymentDue(TimestampedModel):
+    """
+    Model for a single scheduled interest payment on an active loan.
+    
+    Normalised form of ``ActiveLoan.interest_payment_due_dates`` that
+    supports indexed range queries on upcoming payments.
+    """
+    
+    # ============================================================================
+    # RELATIONSHIPS
+    # ============================================================================
+    
+    active_loan = models.ForeignKey(
+        ActiveLoan,
+        on_delete=models.CASCADE,
+        related_name='interest_payments_due',
+        help_text="Active loan this interest payment is scheduled for"
+    )
+    
+    # ============================================================================
+    # PAYMENT DETAILS
+    # ============================================================================
+    
+    due_date = models.DateField(
+        help_text="Date the interest payment is due"
+    )
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0)],
+        help_text="Expected interest payment amount"
+    )
+    paid = models.BooleanField(
+        default=False,
+        help_text="Whether this interest payment has been received"
+    )
+    
+    class Meta:
+        ordering = ['due_date']
+        verbose_name = "Interest Payment Due"
+        verbose_name_plural = "Interest Payments Due"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['active_loan', 'due_date'],
+                name='unique_interest_payment_due_date'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['due_date', 'paid']),
+        ]
+    
+    def __str__(self):
+        status = "paid" if self.paid else "unpaid"
+        return f"Interest due {self.due_date} ({status}) - {self.active_loan}"
+
+
+class InterestAccrual(TimestampedModel):
+    """
+    Model for the daily interest accrual snapshot of an active loan.
+    
+    One row is written per loan per business date by the nightly accrual
+    batch. Interest accrues on an Actual/365 Fixed day count basis.
+    """
+    
+    # ============================================================================
+    # RELATIONSHIPS
+    # ============================================================================
+    
+    active_loan = models.ForeignKey(
+        ActiveLoan,
+        on_delete=models.CASCADE,
+        related_name='accruals',
+        help_text="Active loan this accrual is for"
+    )
+    
+    # ============================================================================
+    # ACCRUAL DETAILS
+    # ============================================================================
+    
+    business_date = models.DateField(
+        help_text="Business date the accrual was calculated as at"
+    )
+    annual_rate = models.DecimalField(
+        max_digits=6,
+        decimal_places=3,
+        default=0,
+        help_text="Annual interest rate (percent) used for the accrual"
+    )
+    principal = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Loan principal"
+    )
+    capitalised_interest = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Interest capitalised onto the balance to date"
+    )
+    balance = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Principal plus capitalised interest"
+    )
+    daily_interest = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        default=0,
+        help_text="Interest accruing per day on the balance"
+    )
+    accrued_interest = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Interest accrued since the last paid interest period"
+    )
+    arrears_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Scheduled interest payments overdue and unpaid"
+    )
+    days_in_arrears = models.PositiveIntegerField(
+        default=0,
+        help_text="Days since the oldest overdue unpaid interest payment"
+    )
+    
+    class Meta:
+        ordering = ['-business_date']
+        verbose_name = "Interest Accrual"
+        verbose_name_plural = "Interest Accruals"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['active_loan', 'business_date'],
+                name='unique_interest_accrual_business_date'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['business_date']),
+        ]
+    
+    def __str__(self):
+        return f"Accrual {self.business_date} ${self.accrued_interest} - {self.active_loan}"
+
+
 class ActiveLoanRepayment(TimestampedModel):
     """
     Model for tracking repayments against active loans.
@@ -501,4 +769,11 @@ class ActiveLoanRepayment(TimestampedModel):
         """
         if self.due_date and self.payment_date > self.due_date:
             self.is_late = True
-        super().save(*args, **kwargs) 
\ No newline at end of file
+        super().save(*args, **kwargs)
+        
+        # Mark the matching scheduled interest payment as received
+        if self.due_date and self.repayment_type in ('interest', 'principal_interest'):
+            InterestPaymentDue.objects.filter(
+                active_loan_id=self.active_loan_id,
+                due_date=self.due_date
+            ).update(paid=True) 
\ No newline at end of file
@@ -12,6 +12,7 @@ from .application import (
     ApplicationSignatureSerializer,
     LoanExtensionSerializer,
     GeneratePDFSerializer,
+    BulkGeneratePDFSerializer,
     AssignBDSerializer
 )
 
@@ -64,7 +65,8 @@ from .active_loans import (
     ActiveLoanSerializer,
     ActiveLoanCreateSerializer,
     ActiveLoanSummarySerializer,
-    ActiveLoanRepaymentSerializer
+    ActiveLoanRepaymentSerializer,
+    InterestAccrualSerializer
 )
 
 # For backward compatibility - keep all the old imports working
@@ -79,6 +81,7 @@ __all__ = [
     'ApplicationSignatureSerializer',
     'LoanExtensionSerializer',
     'GeneratePDFSerializer',
+    'BulkGeneratePDFSerializer',
     'AssignBDSerializer',
     
     # Borrowers
@@ -120,4 +123,5 @@ __all__ = [
     'ActiveLoanCreateSerializer',
     'ActiveLoanSummarySerializer',
     'ActiveLoanRepaymentSerializer',
+    'InterestAccrualSerializer',
 ] 
\ No newline at end of file
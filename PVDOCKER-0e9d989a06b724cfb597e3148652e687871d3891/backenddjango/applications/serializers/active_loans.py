@@ -8,7 +8,7 @@ loan details, repayment schedules, and payment tracking.
 from rest_framework import serializers
 from django.utils import timezone
 from datetime import datetime, timedelta
-from applications.models import ActiveLoan, ActiveLoanRepayment, Application
+from applications.models import ActiveLoan, ActiveLoanRepayment, Application, InterestAccrual
 
 
 class ActiveLoanRepaymentSerializer(serializers.ModelSerializer):
@@ -56,6 +56,27 @@ class ActiveLoanRepaymentSerializer(serializers.ModelSerializer):
         return False
 
 
+class InterestAccrualSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the nightly InterestAccrual snapshot of an active loan.
+    """
+    
+    class Meta:
+        model = InterestAccrual
+        fields = [
+            'business_date',
+            'annual_rate',
+            'principal',
+            'capitalised_interest',
+            'balance',
+            'daily_interest',
+            'accrued_interest',
+            'arrears_amount',
+            'days_in_arrears'
+        ]
+        read_only_fields = fields
+
+
 class ActiveLoanSerializer(serializers.ModelSerializer):
     """
     Serializer for ActiveLoan model.
@@ -82,6 +103,9 @@ class ActiveLoanSerializer(serializers.ModelSerializer):
     total_payments_made = serializers.SerializerMethodField()
     upcoming_payments = serializers.SerializerMethodField()
     
+    # Latest nightly accrual
+    current_accrual = InterestAccrualSerializer(read_only=True)
+    
     class Meta:
         model = ActiveLoan
         fields = [
@@ -103,6 +127,7 @@ class ActiveLoanSerializer(serializers.ModelSerializer):
             'payment_alert_level',
             'total_payments_made',
             'upcoming_payments',
+            'current_accrual',
             'repayments',
             'created_at',
             'updated_at'
@@ -150,20 +175,22 @@ class ActiveLoanSerializer(serializers.ModelSerializer):
         today = timezone.now().date()
         upcoming = []
         
-        for date_str in obj.interest_payment_due_dates:
-            try:
-                due_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                if due_date >= today:
-                    days_until = (due_date - today).days
-                    upcoming.append({
-                        'due_date': due_date.strftime('%Y-%m-%d'),
-                        'days_until': days_until,
-                        'alert_level': 'critical' if days_until <= 3 else 'warning' if days_until <= 14 else 'info'
-                    })
-            except (ValueError, TypeError):
-                continue
+        # Next 5 unpaid payments from the indexed schedule table
+        scheduled = obj.interest_payments_due.filter(
+            paid=False,
+            due_date__gte=today
+        ).order_by('due_date')[:5]
         
-        return sorted(upcoming, key=lambda x: x['due_date'])[:5]  # Return next 5 payments
+        for payment in scheduled:
+            days_until = (payment.due_date - today).days
+            upcoming.append({
+                'due_date': payment.due_date.strftime('%Y-%m-%d'),
+                'days_until': days_until,
+                'amount': payment.amount,
+                'alert_level': 'critical' if days_until <= 3 else 'warning' if days_until <= 14 else 'info'
+            })
+        
+        return upcoming
     
     def validate_interest_payment_due_dates(self, value):
         """Validate that interest payment dates are in correct format."""
@@ -273,6 +300,8 @@ class ActiveLoanSummarySerializer(serializers.ModelSerializer):
     days_until_expiry = serializers.ReadOnlyField()
     days_until_next_payment = serializers.ReadOnlyField()
     alert_status = serializers.SerializerMethodField()
+    accrued_interest = serializers.SerializerMethodField()
+    arrears_amount = serializers.SerializerMethodField()
     
     class Meta:
         model = ActiveLoan
@@ -286,6 +315,8 @@ class ActiveLoanSummarySerializer(serializers.ModelSerializer):
             'days_until_expiry',
             'days_until_next_payment',
             'interest_payments_required',
+            'accrued_interest',
+            'arrears_amount',
             'alert_status',
             'is_active'
         ]
@@ -300,6 +331,16 @@ class ActiveLoanSummarySerializer(serializers.ModelSerializer):
             return primary_company.company_name
         return "Unknown Borrower"
     
+    def get_accrued_interest(self, obj):
+        """Get accrued interest from the latest nightly accrual."""
+        accrual = obj.current_accrual
+        return accrual.accrued_interest if accrual else None
+    
+    def get_arrears_amount(self, obj):
+        """Get arrears from the latest nightly accrual."""
+        accrual = obj.current_accrual
+        return accrual.arrears_amount if accrual else None
+    
     def get_alert_status(self, obj):
         """Get overall alert status for this loan."""
         expiry_days = obj.days_until_expiry
@@ -34,6 +34,17 @@ class GeneratePDFSerializer(serializers.Serializer):
     output_format = serializers.ChoiceField(choices=['pdf', 'docx'], default='pdf', required=False)
 
 
+class BulkGeneratePDFSerializer(serializers.Serializer):
+    """
+    Serializer for bulk PDF generation endpoint
+    """
+    application_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=200
+    )
+
+
 class ApplicationSignatureSerializer(serializers.Serializer):
     """
     Serializer for application signature
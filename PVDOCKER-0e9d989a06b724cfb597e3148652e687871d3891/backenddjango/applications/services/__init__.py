@@ -16,6 +16,25 @@ from .financial import (
     extend_loan,
 )
 
+# Amortization services
+from .amortization import (
+    calculate_amortization_schedule,
+    calculate_application_schedule,
+)
+
+# Interest accrual services
+from .accruals import (
+    run_interest_accrual,
+    get_accrual_totals,
+)
+
+# Active loan services
+from .active_loans import (
+    get_active_loan_dashboard,
+    refresh_active_loan_dashboard,
+    invalidate_active_loan_dashboard,
+)
+
 # Application management services
 from .applications import (
     update_application_stage,
@@ -35,6 +54,19 @@ __all__ = [
     'calculate_funding_manual',
     'extend_loan',
     
+    # Amortization services
+    'calculate_amortization_schedule',
+    'calculate_application_schedule',
+    
+    # Interest accrual services
+    'run_interest_accrual',
+    'get_accrual_totals',
+    
+    # Active loan services
+    'get_active_loan_dashboard',
+    'refresh_active_loan_dashboard',
+    'invalidate_active_loan_dashboard',
+    
     # Application services
     'update_application_stage',
     'validate_application_schema',
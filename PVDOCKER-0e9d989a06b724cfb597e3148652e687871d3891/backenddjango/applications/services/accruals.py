@@ -0,0 +1,163 @@
+"""
+Interest Accrual Services
+
+This module contains the nightly interest accrual engine for active loans.
+Accruals are calculated on an Actual/365 Fixed day count basis and stored
+as one InterestAccrual row per loan per business date.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Subquery, Sum
+from django.utils import timezone
+
+from ..models import ActiveLoan, InterestAccrual
+
+
+DAY_COUNT_BASIS = Decimal('365')
+CENT = Decimal('0.01')
+DAILY_PRECISION = Decimal('0.0001')
+ACCRUAL_BATCH_SIZE = 1000
+
+
+def calculate_loan_accrual(business_date, principal, annual_rate, settlement_date,
+                           capitalised_interest_months=0, last_paid_due_date=None,
+                           oldest_arrears_date=None, arrears_amount=None):
+    """
+    Calculate a loan's accrual position as at a business date
+
+    Interest accrues daily on the balance. During the capitalised interest
+    term it is added to the balance instead of accruing as payable; after
+    that it accrues from the later of the capitalisation end and the last
+    paid interest due date.
+
+    Args:
+        business_date: Date the accrual is calculated as at
+        principal: Loan principal
+        annual_rate: Annual interest rate as a percentage
+        settlement_date: Date the loan settled
+        capitalised_interest_months: Months of capitalised interest from settlement
+        last_paid_due_date: Latest paid interest due date on or before business_date
+        oldest_arrears_date: Earliest unpaid interest due date before business_date
+        arrears_amount: Total of unpaid interest payments due before business_date
+
+    Returns:
+        Dictionary of InterestAccrual field values
+    """
+    principal = Decimal(str(principal or 0))
+    annual_rate = Decimal(str(annual_rate or 0))
+    daily_rate = annual_rate / 100 / DAY_COUNT_BASIS
+
+    capitalisation_end = settlement_date + relativedelta(months=capitalised_interest_months or 0)
+    capitalised_days = max(0, (min(business_date, capitalisation_end) - settlement_date).days)
+    capitalised_interest = (principal * daily_rate * capitalised_days).quantize(CENT, rounding=ROUND_HALF_UP)
+    balance = principal + capitalised_interest
+
+    accrual_start = max(capitalisation_end, last_paid_due_date or settlement_date)
+    accrual_days = max(0, (business_date - accrual_start).days)
+
+    return {
+        'business_date': business_date,
+        'annual_rate': annual_rate,
+        'principal': principal,
+        'capitalised_interest': capitalised_interest,
+        'balance': balance,
+        'daily_interest': (balance * daily_rate).quantize(DAILY_PRECISION, rounding=ROUND_HALF_UP),
+        'accrued_interest': (balance * daily_rate * accrual_days).quantize(CENT, rounding=ROUND_HALF_UP),
+        'arrears_amount': Decimal(str(arrears_amount or 0)).quantize(CENT),
+        'days_in_arrears': (business_date - oldest_arrears_date).days if oldest_arrears_date else 0,
+    }
+
+
+def run_interest_accrual(business_date=None, recalculate=False):
+    """
+    Accrue interest for every active loan as at a business date
+
+    Loan terms and schedule aggregates are read in one query, accruals are
+    calculated in a single pass and written with bulk_create. Running the
+    batch again for the same date only fills in loans without a row, unless
+    recalculate is set, in which case the date's rows are replaced.
+
+    Args:
+        business_date: Date to accrue as at (defaults to today)
+        recalculate: If True, replace existing accruals for the date
+
+    Returns:
+        Number of accrual rows created
+    """
+    business_date = business_date or timezone.now().date()
+
+    overdue = Q(
+        interest_payments_due__paid=False,
+        interest_payments_due__due_date__lt=business_date
+    )
+    loans = (
+        ActiveLoan.objects.filter(is_active=True, settlement_date__lte=business_date)
+        .order_by('pk')
+        .values('pk', 'settlement_date', 'capitalised_interest_months',
+                'application__loan_amount', 'application__interest_rate')
+        .annotate(
+            last_paid_due_date=Max('interest_payments_due__due_date', filter=Q(
+                interest_payments_due__paid=True,
+                interest_payments_due__due_date__lte=business_date
+            )),
+            oldest_arrears_date=Min('interest_payments_due__due_date', filter=overdue),
+            arrears_amount=Sum('interest_payments_due__amount', filter=overdue),
+        )
+    )
+
+    with transaction.atomic():
+        if recalculate:
+            InterestAccrual.objects.filter(business_date=business_date).delete()
+        else:
+            loans = loans.exclude(accruals__business_date=business_date)
+
+        accruals = [
+            InterestAccrual(
+                active_loan_id=loan['pk'],
+                **calculate_loan_accrual(
+                    business_date,
+                    principal=loan['application__loan_amount'],
+                    annual_rate=loan['application__interest_rate'],
+                    settlement_date=loan['settlement_date'],
+                    capitalised_interest_months=loan['capitalised_interest_months'],
+                    last_paid_due_date=loan['last_paid_due_date'],
+                    oldest_arrears_date=loan['oldest_arrears_date'],
+                    arrears_amount=loan['arrears_amount'],
+                )
+            )
+            for loan in loans.iterator(chunk_size=ACCRUAL_BATCH_SIZE)
+        ]
+        InterestAccrual.objects.bulk_create(accruals, batch_size=ACCRUAL_BATCH_SIZE, ignore_conflicts=True)
+
+    return len(accruals)
+
+
+def get_accrual_totals():
+    """
+    Sum the latest accrual rows across active loans in one query
+
+    Returns:
+        Dictionary with the latest business date and accrual totals
+    """
+    latest = InterestAccrual.objects.order_by('-business_date').values('business_date')[:1]
+    totals = InterestAccrual.objects.filter(
+        business_date=Subquery(latest),
+        active_loan__is_active=True
+    ).aggregate(
+        business_date=Max('business_date'),
+        accrued_interest=Sum('accrued_interest'),
+        capitalised_interest=Sum('capitalised_interest'),
+        arrears_amount=Sum('arrears_amount'),
+        loans_in_arrears=Count('pk', filter=Q(days_in_arrears__gt=0)),
+    )
+
+    return {
+        'business_date': totals['business_date'].isoformat() if totals['business_date'] else None,
+        'total_accrued_interest': totals['accrued_interest'] or 0,
+        'total_capitalised_interest': totals['capitalised_interest'] or 0,
+        'total_arrears': totals['arrears_amount'] or 0,
+        'loans_in_arrears': totals['loans_in_arrears'],
+    }
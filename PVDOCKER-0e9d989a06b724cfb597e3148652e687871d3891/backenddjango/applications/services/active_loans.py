@@ -0,0 +1,107 @@
+"""
+Active Loan Services
+
+This module contains services for active loan reporting, including the
+cached dashboard snapshot served by ActiveLoanViewSet.dashboard.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from ..models import ActiveLoan, InterestPaymentDue
+from .accruals import get_accrual_totals
+
+
+# Snapshots are keyed by business date so counters roll over at midnight
+DASHBOARD_CACHE_KEY = 'active_loans:dashboard:{date}'
+DASHBOARD_CACHE_TIMEOUT = 300  # 5 minutes
+
+
+def compute_active_loan_dashboard(today=None):
+    """
+    Compute active loan dashboard counters in a single aggregate query
+
+    Accrued interest and arrears totals are read from the latest nightly
+    accrual rows rather than recomputed.
+
+    Args:
+        today: Business date to compute alert windows from (defaults to today)
+
+    Returns:
+        Dictionary with loan totals and alert counts
+    """
+    today = today or timezone.now().date()
+
+    payment_due = Exists(
+        InterestPaymentDue.objects.filter(
+            active_loan=OuterRef('pk'),
+            paid=False,
+            due_date__gte=today,
+            due_date__lte=today + timedelta(days=14)
+        )
+    )
+    active = Q(is_active=True)
+
+    totals = ActiveLoan.objects.aggregate(
+        total_active=Count('pk', filter=active),
+        total_inactive=Count('pk', filter=Q(is_active=False)),
+        total_loan_value=Sum('application__loan_amount', filter=active),
+        expiry_critical=Count('pk', filter=active & Q(
+            loan_expiry_date__gte=today,
+            loan_expiry_date__lte=today + timedelta(days=7)
+        )),
+        expiry_warning=Count('pk', filter=active & Q(
+            loan_expiry_date__gt=today + timedelta(days=7),
+            loan_expiry_date__lte=today + timedelta(days=30)
+        )),
+        payment_due=Count('pk', filter=active & Q(interest_payments_required=True) & Q(payment_due)),
+    )
+
+    return {
+        'total_active_loans': totals['total_active'],
+        'total_inactive_loans': totals['total_inactive'],
+        'total_loan_value': totals['total_loan_value'] or 0,
+        'alerts': {
+            'expiry_critical': totals['expiry_critical'],
+            'expiry_warning': totals['expiry_warning'],
+            'payment_due': totals['payment_due'],
+            'total_alerts': totals['expiry_critical'] + totals['expiry_warning'] + totals['payment_due']
+        },
+        'accruals': get_accrual_totals()
+    }
+
+
+def refresh_active_loan_dashboard():
+    """
+    Recompute the dashboard snapshot and store it in the cache
+
+    Returns:
+        The freshly computed dashboard dictionary
+    """
+    today = timezone.now().date()
+    snapshot = compute_active_loan_dashboard(today)
+    cache.set(DASHBOARD_CACHE_KEY.format(date=today.isoformat()), snapshot, DASHBOARD_CACHE_TIMEOUT)
+    return snapshot
+
+
+def get_active_loan_dashboard():
+    """
+    Get the cached dashboard snapshot, computing it on a cache miss
+
+    Returns:
+        Dictionary with loan totals and alert counts
+    """
+    today = timezone.now().date()
+    snapshot = cache.get(DASHBOARD_CACHE_KEY.format(date=today.isoformat()))
+    if snapshot is None:
+        snapshot = refresh_active_loan_dashboard()
+    return snapshot
+
+
+def invalidate_active_loan_dashboard():
+    """Drop the cached dashboard snapshot so the next read recomputes it."""
+    today = timezone.now().date()
+    cache.delete(DASHBOARD_CACHE_KEY.format(date=today.isoformat()))
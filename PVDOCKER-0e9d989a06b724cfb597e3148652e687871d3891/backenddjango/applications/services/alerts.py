@@ -0,0 +1,226 @@
+"""
+Application Alert Services
+
+This module contains the application alert sweep. Open applications are
+streamed once and every alert rule is evaluated against each of them in
+the same pass. Alerts that fire are recorded in the ApplicationAlert
+ledger, keyed by (rule, application, period), so an application is alerted
+at most once per rule per period, and the resulting notifications are
+created in bulk.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import Notification
+from users.services import create_notifications_batch
+
+from ..models import Application, ApplicationAlert
+
+logger = logging.getLogger(__name__)
+
+# Applications in these stages are finished and never alerted
+CLOSED_STAGES = ['settled', 'closed', 'discharged']
+
+ALERT_SWEEP_CHUNK_SIZE = 500
+
+
+def get_stage_changed_at(application):
+    """
+    When the application last changed stage, from its stage history
+
+    Falls back to the creation time when there is no usable history entry.
+    """
+    if application.stage_history:
+        try:
+            changed_at = datetime.fromisoformat(application.stage_history[-1]['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            changed_at = None
+        if changed_at is not None:
+            if timezone.is_naive(changed_at):
+                changed_at = timezone.make_aware(changed_at)
+            return changed_at
+    return application.created_at
+
+
+def application_details(application):
+    """Summary lines shared by the alert messages."""
+    return (
+        f"Application Details:\n"
+        f"- Reference: {application.reference_number}\n"
+        f"- Stage: {application.get_stage_display()}\n"
+        f"- Loan Amount: ${application.loan_amount}\n"
+        f"- Broker: {application.broker.name if application.broker else 'N/A'}"
+    )
+
+
+class AlertRule:
+    """
+    A condition that alerts an application's BD once per period
+
+    Args:
+        name: Ledger name of the rule
+        threshold_days: Age in days after which the rule applies
+        period_days: Length of the dedup period; the rule fires at most
+            once per application in each period
+        matches: Function of (application, threshold) returning whether the
+            rule applies
+        title: Function of application returning the notification title
+        message: Function of application returning the notification message
+    """
+
+    def __init__(self, name, threshold_days, period_days, matches, title, message):
+        self.name = name
+        self.threshold_days = threshold_days
+        self.period_days = period_days
+        self.matches = matches
+        self.title = title
+        self.message = message
+
+    def threshold(self, now):
+        return now - timedelta(days=self.threshold_days)
+
+    def period(self, now):
+        """Key of the period containing now."""
+        return str(now.date().toordinal() // self.period_days)
+
+
+ALERT_RULES = [
+    # Untouched for two weeks
+    AlertRule(
+        'stale_application', 14, 7,
+        matches=lambda application, threshold: application.updated_at < threshold,
+        title=lambda application: f'Stale Application Alert: {application.reference_number}',
+        message=lambda application: (
+            f"Application {application.reference_number} has not been updated for over 14 days.\n\n"
+            f"Please review this application and update its status or contact the broker.\n\n"
+            f"{application_details(application)}\n"
+            f"- Last Updated: {application.updated_at.strftime('%d/%m/%Y')}"
+        ),
+    ),
+    # Still being edited, but stuck in the same stage for two weeks
+    AlertRule(
+        'stagnant_application', 14, 7,
+        matches=lambda application, threshold: (
+            application.updated_at >= threshold and get_stage_changed_at(application) < threshold
+        ),
+        title=lambda application: f'Stagnant Application Alert: {application.reference_number}',
+        message=lambda application: (
+            f"Application {application.reference_number} has been in the "
+            f"{application.get_stage_display()} stage for over 14 days.\n\n"
+            f"Please review this application and update its status or contact the broker.\n\n"
+            f"{application_details(application)}\n"
+            f"- Last Stage Update: {get_stage_changed_at(application).strftime('%d/%m/%Y')}"
+        ),
+    ),
+]
+
+
+def get_alert_rule(name):
+    """
+    Look up an alert rule by name
+
+    Raises:
+        ValueError: If no rule has that name
+    """
+    for rule in ALERT_RULES:
+        if rule.name == name:
+            return rule
+    raise ValueError(f"Unknown alert rule: {name}")
+
+
+def send_alerts(rules, applications, now):
+    """
+    Evaluate rules against a chunk of applications and send new alerts
+
+    The ledger rows and notifications are written in one transaction.
+
+    Returns:
+        Number of alerts sent
+    """
+    hits = [
+        (rule, application)
+        for application in applications
+        if application.bd and application.bd.user
+        for rule in rules
+        if rule.matches(application, rule.threshold(now))
+    ]
+    if not hits:
+        return 0
+
+    periods = {rule.name: rule.period(now) for rule in rules}
+    already_sent = set(
+        ApplicationAlert.objects.filter(
+            application_id__in={application.id for _, application in hits},
+            rule__in=periods,
+            period__in=set(periods.values())
+        ).values_list('rule', 'application_id', 'period')
+    )
+    hits = [
+        (rule, application) for rule, application in hits
+        if (rule.name, application.id, periods[rule.name]) not in already_sent
+    ]
+    if not hits:
+        return 0
+
+    with transaction.atomic():
+        ApplicationAlert.objects.bulk_create([
+            ApplicationAlert(rule=rule.name, application=application, period=periods[rule.name], created_at=now)
+            for rule, application in hits
+        ], ignore_conflicts=True)
+        create_notifications_batch([
+            Notification(
+                user=application.bd.user,
+                title=rule.title(application),
+                message=rule.message(application),
+                notification_type='application_status',
+                related_object_id=application.id,
+                related_object_type='application'
+            )
+            for rule, application in hits
+        ], email_subject='Applications needing attention', email_type='application_alert')
+
+    return len(hits)
+
+
+def run_application_alert_sweep(rules=None, now=None, chunk_size=ALERT_SWEEP_CHUNK_SIZE):
+    """
+    Evaluate alert rules against all open applications in one pass
+
+    Args:
+        rules: Rules to evaluate (optional, defaults to ALERT_RULES)
+        now: Time to evaluate at (optional, defaults to now)
+        chunk_size: Applications handled per ledger lookup and notification batch
+
+    Returns:
+        Dictionary with the number of applications scanned and alerts sent
+    """
+    rules = rules or ALERT_RULES
+    now = now or timezone.now()
+
+    # No rule can match an application younger than the smallest threshold
+    earliest = max(rule.threshold(now) for rule in rules)
+    applications = Application.objects.filter(
+        is_archived=False,
+        created_at__lt=earliest
+    ).exclude(
+        stage__in=CLOSED_STAGES
+    ).select_related('bd__user', 'broker').order_by('id')
+
+    stats = {'scanned': 0, 'alerts': 0}
+    chunk = []
+    for application in applications.iterator(chunk_size=chunk_size):
+        chunk.append(application)
+        if len(chunk) >= chunk_size:
+            stats['alerts'] += send_alerts(rules, chunk, now)
+            stats['scanned'] += len(chunk)
+            chunk = []
+    if chunk:
+        stats['alerts'] += send_alerts(rules, chunk, now)
+        stats['scanned'] += len(chunk)
+
+    logger.info(f"Application alert sweep: scanned {stats['scanned']} applications, sent {stats['alerts']} alerts")
+    return stats
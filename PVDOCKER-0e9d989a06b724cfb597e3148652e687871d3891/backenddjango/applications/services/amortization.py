@@ -0,0 +1,217 @@
+"""
+Amortization Services
+
+This module contains the repayment schedule engine used to generate
+loan repayment schedules for applications. It supports every repayment
+frequency offered on an application, interest-only periods and
+capitalised-interest terms, and persists schedules in bulk.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.utils import timezone
+
+
+CENT = Decimal('0.01')
+
+# Number of repayment periods in a year for each repayment frequency
+PERIODS_PER_YEAR = {
+    'weekly': 52,
+    'fortnightly': 26,
+    'monthly': 12,
+    'quarterly': 4,
+    'annually': 1,
+}
+
+# Calendar step between due dates for each repayment frequency
+PERIOD_STEP = {
+    'weekly': relativedelta(weeks=1),
+    'fortnightly': relativedelta(weeks=2),
+    'monthly': relativedelta(months=1),
+    'quarterly': relativedelta(months=3),
+    'annually': relativedelta(years=1),
+}
+
+
+def months_to_periods(months, frequency):
+    """
+    Convert a duration in months to a whole number of repayment periods
+
+    Args:
+        months: Duration in months
+        frequency: Repayment frequency key from PERIODS_PER_YEAR
+
+    Returns:
+        Number of periods, rounded to the nearest whole period
+    """
+    if not months:
+        return 0
+    periods = Decimal(months) * PERIODS_PER_YEAR[frequency] / 12
+    return int(periods.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def calculate_amortization_schedule(principal, annual_rate, term_months, frequency='monthly',
+                                    start_date=None, interest_only_months=0, capitalised_interest_months=0):
+    """
+    Calculate a full repayment schedule in a single pass
+
+    The term is split into three phases: capitalised interest (no payments,
+    interest added to the balance), interest-only, then level principal and
+    interest payments. If no amortizing periods remain the final payment
+    includes the outstanding balance. The last payment absorbs rounding so
+    the closing balance is exactly zero.
+
+    Args:
+        principal: Loan amount
+        annual_rate: Annual interest rate as a percentage
+        term_months: Loan term in months
+        frequency: Repayment frequency (weekly, fortnightly, monthly, quarterly, annually)
+        start_date: Date the loan starts; first payment falls one period later
+        interest_only_months: Months of interest-only payments after any capitalised term
+        capitalised_interest_months: Months where interest is capitalised instead of paid
+
+    Returns:
+        List of dictionaries, one per period, with due_date, amount, interest,
+        principal, closing_balance and period_type
+    """
+    if frequency not in PERIODS_PER_YEAR:
+        raise ValueError(f"Unsupported repayment frequency: {frequency}")
+    if (interest_only_months or 0) < 0 or (capitalised_interest_months or 0) < 0:
+        raise ValueError("Interest-only and capitalised interest months cannot be negative")
+
+    principal = Decimal(str(principal or 0))
+    annual_rate = Decimal(str(annual_rate or 0))
+    if principal <= 0 or not term_months:
+        return []
+
+    start_date = start_date or timezone.now().date()
+    step = PERIOD_STEP[frequency]
+    rate = annual_rate / 100 / PERIODS_PER_YEAR[frequency]
+
+    total_periods = max(1, months_to_periods(term_months, frequency))
+    capitalised_periods = min(months_to_periods(capitalised_interest_months, frequency), total_periods)
+    interest_only_periods = min(
+        months_to_periods(interest_only_months, frequency),
+        total_periods - capitalised_periods
+    )
+    amortizing_periods = total_periods - capitalised_periods - interest_only_periods
+
+    # Balance entering the amortizing phase, after capitalisation
+    balance = principal * (1 + rate) ** capitalised_periods
+    level_payment = None
+    if amortizing_periods:
+        if rate:
+            level_payment = balance * rate / (1 - (1 + rate) ** -amortizing_periods)
+        else:
+            level_payment = balance / amortizing_periods
+        level_payment = level_payment.quantize(CENT, rounding=ROUND_HALF_UP)
+
+    schedule = []
+    balance = principal
+    for period in range(1, total_periods + 1):
+        interest = (balance * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+
+        if period <= capitalised_periods:
+            period_type = 'capitalised'
+            payment = Decimal('0.00')
+            principal_paid = -interest
+        elif period <= capitalised_periods + interest_only_periods:
+            period_type = 'interest_only'
+            payment = interest
+            principal_paid = Decimal('0.00')
+        else:
+            period_type = 'principal_interest'
+            payment = level_payment
+            principal_paid = payment - interest
+
+        # Final period clears the balance, absorbing rounding and any balloon
+        if period == total_periods:
+            principal_paid = balance
+            payment = interest + principal_paid
+
+        balance -= principal_paid
+        schedule.append({
+            'period': period,
+            'due_date': start_date + step * period,
+            'amount': payment,
+            'interest': interest,
+            'principal': principal_paid,
+            'closing_balance': balance,
+            'period_type': period_type,
+        })
+
+    return schedule
+
+
+def calculate_application_schedule(application, interest_only_months=0):
+    """
+    Calculate the repayment schedule for an application's loan terms
+
+    Args:
+        application: Application instance
+        interest_only_months: Months of interest-only payments (optional)
+
+    Returns:
+        List of schedule period dictionaries
+    """
+    return calculate_amortization_schedule(
+        principal=application.loan_amount,
+        annual_rate=application.interest_rate,
+        term_months=application.loan_term,
+        frequency=application.repayment_frequency or 'monthly',
+        start_date=application.estimated_settlement_date,
+        interest_only_months=interest_only_months,
+        capitalised_interest_months=application.capitalised_interest_term or 0,
+    )
+
+
+def persist_repayment_schedule(application, schedule, user):
+    """
+    Replace an application's repayments with the given schedule
+
+    Repayments and their 'repayment_scheduled' ledger entries are written
+    with bulk_create in one transaction, so the per-row ledger post_save
+    signal is not fired.
+
+    Args:
+        application: Application instance
+        schedule: List of schedule period dictionaries
+        user: User generating the schedule
+
+    Returns:
+        List of created Repayment objects
+    """
+    from documents.models import Repayment, Ledger
+
+    payable = [period for period in schedule if period['amount'] > 0]
+    now = timezone.now()
+
+    with transaction.atomic():
+        application.repayments.all().delete()
+
+        repayments = Repayment.objects.bulk_create([
+            Repayment(
+                application=application,
+                amount=period['amount'],
+                due_date=period['due_date'],
+                created_by=user
+            )
+            for period in payable
+        ])
+
+        Ledger.objects.bulk_create([
+            Ledger(
+                application=application,
+                transaction_type='repayment_scheduled',
+                amount=repayment.amount,
+                description=f"Repayment scheduled for {repayment.due_date}",
+                transaction_date=now,
+                related_repayment=repayment,
+                created_by=user
+            )
+            for repayment in repayments
+        ])
+
+    return repayments
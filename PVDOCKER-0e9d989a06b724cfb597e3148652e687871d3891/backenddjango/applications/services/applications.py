@@ -10,7 +10,7 @@ from jsonschema import validate, exceptions
 
 from ..models import Application
 from documents.models import Note
-from users.services import create_application_notification
+from users.services import create_notifications_bulk
 
 
 def update_application_stage(application_id, new_stage, user):
@@ -57,30 +57,24 @@ def update_application_stage(application_id, new_stage, user):
     if new_stage in ['approved', 'declined', 'funded']:
         # Notify the broker
         if application.broker and application.broker.user:
-            title = f"Application {new_stage.title()}: {application.reference_number}"
-            message = f"Application {application.reference_number} has been {new_stage}"
-            
-            create_application_notification(
-                user=application.broker.user,
-                title=title,
-                message=message,
-                application=application,
-                notification_type=f'application_{new_stage}'
+            create_notifications_bulk(
+                [application.broker.user],
+                title=f"Application {new_stage.title()}: {application.reference_number}",
+                message=f"Application {application.reference_number} has been {new_stage}",
+                notification_type='application_status',
+                related_object_id=application.id,
+                related_object_type='application'
             )
         
         # Notify borrowers if they have user accounts
-        for borrower in application.borrowers.all():
-            if hasattr(borrower, 'user') and borrower.user:
-                title = f"Application Update: {application.reference_number}"
-                message = f"Your loan application has been {new_stage}"
-                
-                create_application_notification(
-                    user=borrower.user,
-                    title=title,
-                    message=message,
-                    application=application,
-                    notification_type=f'application_{new_stage}'
-                )
+        create_notifications_bulk(
+            [borrower.user for borrower in application.borrowers.select_related('user') if borrower.user],
+            title=f"Application Update: {application.reference_number}",
+            message=f"Your loan application has been {new_stage}",
+            notification_type='application_status',
+            related_object_id=application.id,
+            related_object_type='application'
+        )
     
     return application
 
@@ -5,12 +5,13 @@ This module contains services related to financial calculations, fee management,
 repayment schedules, and funding calculations for loan applications.
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
 from django.utils import timezone
 
 from ..models import Application, FundingCalculationHistory
-from documents.models import Fee, Repayment, Note
+from .amortization import calculate_application_schedule, persist_repayment_schedule
+from documents.models import Fee, Note
 
 
 def safe_decimal(value, default=0):
@@ -60,63 +61,35 @@ def make_json_serializable(data):
         return data
 
 
-def generate_repayment_schedule(application_id, user):
+def generate_repayment_schedule(application_id, user, preview=False, interest_only_months=0):
     """
     Generate a repayment schedule for an application
     
+    Supports weekly, fortnightly, monthly, quarterly and annual repayment
+    frequencies, interest-only periods and the application's capitalised
+    interest term. The schedule is persisted with bulk inserts.
+    
     Args:
         application_id: ID of the application
         user: User generating the schedule
+        preview: If True, return the calculated schedule without writing it
+        interest_only_months: Months of interest-only payments (optional)
         
     Returns:
-        List of created Repayment objects
+        List of created Repayment objects, or list of schedule period
+        dictionaries when preview is True
     """
     try:
         application = Application.objects.get(id=application_id)
     except Application.DoesNotExist:
         return []
     
-    # Delete existing repayments
-    application.repayments.all().delete()
-    
-    # Calculate repayment amount and schedule
-    loan_amount = application.loan_amount
-    loan_term = application.loan_term  # in months
-    interest_rate = application.interest_rate / 100 if application.interest_rate else 0
-    
-    # Simple calculation for monthly repayments
-    # For a more accurate calculation, use financial formulas
-    if application.repayment_frequency == 'monthly':
-        monthly_interest = interest_rate / 12
-        if monthly_interest > 0:
-            # Using the formula for monthly payments: P = L[i(1+i)^n]/[(1+i)^n-1]
-            # where P is payment, L is loan amount, i is monthly interest rate, n is number of payments
-            monthly_payment = loan_amount * (monthly_interest * (1 + monthly_interest) ** loan_term) / ((1 + monthly_interest) ** loan_term - 1)
-        else:
-            # If no interest, simple division
-            monthly_payment = loan_amount / loan_term
-        
-        # Create repayment schedule
-        repayments = []
-        start_date = application.estimated_settlement_date or datetime.now().date()
-        
-        for i in range(1, loan_term + 1):
-            due_date = start_date.replace(month=((start_date.month + i - 1) % 12) + 1)
-            if (start_date.month + i - 1) // 12 > 0:
-                due_date = due_date.replace(year=due_date.year + (start_date.month + i - 1) // 12)
-            
-            repayment = Repayment.objects.create(
-                application=application,
-                amount=round(monthly_payment, 2),
-                due_date=due_date,
-                created_by=user
-            )
-            repayments.append(repayment)
-        
-        return repayments
+    schedule = calculate_application_schedule(application, interest_only_months=interest_only_months)
+    
+    if preview:
+        return schedule
     
-    # Handle other frequencies as needed
-    return []
+    return persist_repayment_schedule(application, schedule, user)
 
 
 def create_standard_fees(application_id, user):
@@ -5,13 +5,15 @@ This module contains signals that handle automatic creation of
 ActiveLoan instances when application stages change to 'settled'.
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from datetime import timedelta
 import logging
 
-from .models import Application, ActiveLoan
+from .models import Application, ActiveLoan, ActiveLoanRepayment, InterestPaymentDue
+from .services.active_loans import invalidate_active_loan_dashboard
 
 logger = logging.getLogger(__name__)
 
@@ -82,6 +84,22 @@ def log_active_loan_creation(sender, instance, created, **kwargs):
             logger.info(f"Updated Application {instance.application.reference_number} stage to 'settled'")
 
 
+@receiver(post_save, sender=ActiveLoan)
+@receiver(post_delete, sender=ActiveLoan)
+@receiver(post_save, sender=ActiveLoanRepayment)
+@receiver(post_delete, sender=ActiveLoanRepayment)
+@receiver(post_save, sender=InterestPaymentDue)
+@receiver(post_delete, sender=InterestPaymentDue)
+def invalidate_dashboard_on_active_loan_change(sender, instance, **kwargs):
+    """
+    Invalidate the cached active loan dashboard snapshot.
+    
+    Deferred until commit so the schedule sync in ActiveLoan.save has
+    finished before the next dashboard read recomputes the snapshot.
+    """
+    transaction.on_commit(invalidate_active_loan_dashboard)
+
+
 # Signal to handle stage history updates
 @receiver(pre_save, sender=Application)
 def update_stage_history(sender, instance, **kwargs):
@@ -3,6 +3,7 @@
 
 # Notification tasks
 from .notifications import (
+    sweep_application_alerts,
     check_stagnant_applications,
     check_stale_applications,
     check_note_reminders,
@@ -15,12 +16,21 @@ from .active_loans import (
     send_active_loan_expiry_warnings,
     send_critical_expiry_alerts,
     send_immediate_active_loan_alert,
-    cleanup_old_active_loan_notifications
+    cleanup_old_active_loan_notifications,
+    refresh_active_loan_dashboard_snapshot,
+    accrue_active_loan_interest
+)
+
+# PDF generation tasks
+from .pdf import (
+    generate_application_pdf_async,
+    generate_application_pdfs_bulk
 )
 
 # For backward compatibility - keep all the old imports working
 __all__ = [
     # Application notification tasks
+    'sweep_application_alerts',
     'check_stagnant_applications',
     'check_stale_applications', 
     'check_note_reminders',
@@ -32,4 +42,10 @@ __all__ = [
     'send_critical_expiry_alerts',
     'send_immediate_active_loan_alert',
     'cleanup_old_active_loan_notifications',
+    'refresh_active_loan_dashboard_snapshot',
+    'accrue_active_loan_interest',
+    
+    # PDF generation tasks
+    'generate_application_pdf_async',
+    'generate_application_pdfs_bulk',
 ] 
\ No newline at end of file
@@ -7,6 +7,8 @@ This module contains Celery tasks for:
 - Sending critical alerts for loans that are about to expire
 - Sending immediate alerts for specific loan events
 - Cleaning up old notifications
+- Refreshing the cached active loan dashboard snapshot
+- Running the nightly interest accrual batch
 """
 
 from celery import shared_task
@@ -16,13 +18,36 @@ from datetime import timedelta
 import logging
 
 from django.contrib.auth import get_user_model
-from users.services import create_notification
+from users.services import create_notifications_batch, create_notifications_bulk
 from users.models import User
-from users.models import NotificationPreference
+from users.models import Notification
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Staff roles that receive active loan alerts
+ACTIVE_LOAN_ALERT_ROLES = ['admin', 'accounts', 'super_user']
+
+
+def get_active_loan_alert_recipients():
+    """Load the staff users that receive active loan alerts once per run."""
+    return list(User.objects.filter(role__in=ACTIVE_LOAN_ALERT_ROLES))
+
+
+def build_active_loan_notifications(recipients, loan, title, message, notification_type):
+    """Build unsaved notifications of one loan alert for every recipient."""
+    return [
+        Notification(
+            user=user,
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            related_object_id=loan.id,
+            related_object_type='active_loan'
+        )
+        for user in recipients
+    ]
+
 @shared_task
 def send_active_loan_payment_reminders():
     """
@@ -35,48 +60,44 @@ def send_active_loan_payment_reminders():
     from ..models import ActiveLoan
     
     today = timezone.now().date()
-    reminder_threshold = today + timedelta(days=7)
     
-    # Find loans with payments due in the next 7 days
+    # Find loans with payments due in the next 7 days via the indexed schedule table
     active_loans = ActiveLoan.objects.filter(
         is_active=True,
         interest_payments_required=True
-    ).select_related('application')
+    ).payment_due_within(7).select_related('application')
+    
+    admin_users = get_active_loan_alert_recipients()
+    pending = []
     
     reminder_count = 0
     for loan in active_loans:
-        # Check if any payment dates are within the reminder threshold
-        for due_date_str in loan.interest_payment_due_dates:
-            try:
-                due_date = timezone.datetime.strptime(due_date_str, "%Y-%m-%d").date()
-                if today <= due_date <= reminder_threshold:
-                    days_until = (due_date - today).days
-                    
-                    # Create notification message
-                    title = f"Payment Reminder: {loan.application.reference_number}"
-                    message = f"Interest payment due in {days_until} days on {due_date} for loan {loan.application.reference_number}"
-                    
-                    # Send notifications to admin users
-                    admin_users = User.objects.filter(role__in=['admin', 'accounts', 'super_user'])
-                    for user in admin_users:
-                        create_notification(
-                            user=user,
-                            title=title,
-                            message=message,
-                            notification_type='active_loan_payment',
-                            related_object_id=loan.id,
-                            related_object_type='active_loan'
-                        )
-                    
-                    # Log the notification
-                    logger.info(
-                        f"Payment reminder for loan {loan.id} (App: {loan.application.reference_number}): "
-                        f"Payment due in {days_until} days on {due_date}"
-                    )
-                    reminder_count += 1
-                    break  # Only send one reminder per loan
-            except (ValueError, TypeError):
-                logger.error(f"Invalid date format in loan {loan.id}: {due_date_str}")
+        # Only send one reminder per loan, for its next payment
+        due_date = loan.next_payment_due
+        days_until = (due_date - today).days
+        
+        # Create notification message
+        title = f"Payment Reminder: {loan.application.reference_number}"
+        message = f"Interest payment due in {days_until} days on {due_date} for loan {loan.application.reference_number}"
+        
+        # Queue notifications to admin users
+        pending.extend(build_active_loan_notifications(
+            admin_users, loan, title, message, 'active_loan_payment'
+        ))
+        
+        # Log the notification
+        logger.info(
+            f"Payment reminder for loan {loan.id} (App: {loan.application.reference_number}): "
+            f"Payment due in {days_until} days on {due_date}"
+        )
+        reminder_count += 1
+    
+    # Deliver all reminders for this run in one batch
+    create_notifications_batch(
+        pending,
+        email_subject=f"Active loan payment reminders ({reminder_count})",
+        email_type='active_loan_payment'
+    )
     
     return f"Sent {reminder_count} payment reminders"
 
@@ -101,6 +122,9 @@ def send_active_loan_expiry_warnings():
         loan_expiry_date__gt=today
     ).select_related('application')
     
+    admin_users = get_active_loan_alert_recipients()
+    pending = []
+    
     warning_count = 0
     for loan in expiring_loans:
         days_until = (loan.loan_expiry_date - today).days
@@ -109,17 +133,10 @@ def send_active_loan_expiry_warnings():
         title = f"Loan Expiry Warning: {loan.application.reference_number}"
         message = f"Loan {loan.application.reference_number} expires in {days_until} days on {loan.loan_expiry_date}"
         
-        # Send notifications to admin users
-        admin_users = User.objects.filter(role__in=['admin', 'accounts', 'super_user'])
-        for user in admin_users:
-            create_notification(
-                user=user,
-                title=title,
-                message=message,
-                notification_type='active_loan_expiry',
-                related_object_id=loan.id,
-                related_object_type='active_loan'
-            )
+        # Queue notifications to admin users
+        pending.extend(build_active_loan_notifications(
+            admin_users, loan, title, message, 'active_loan_expiry'
+        ))
         
         # Log the notification
         logger.info(
@@ -128,6 +145,13 @@ def send_active_loan_expiry_warnings():
         )
         warning_count += 1
     
+    # Deliver all alerts for this run in one batch
+    create_notifications_batch(
+        pending,
+        email_subject=f"Active loan expiry warnings ({warning_count})",
+        email_type='active_loan_expiry'
+    )
+    
     return f"Sent {warning_count} expiry warnings"
 
 @shared_task
@@ -151,6 +175,9 @@ def send_critical_expiry_alerts():
         loan_expiry_date__gt=today
     ).select_related('application')
     
+    admin_users = get_active_loan_alert_recipients()
+    pending = []
+    
     alert_count = 0
     for loan in critical_loans:
         days_until = (loan.loan_expiry_date - today).days
@@ -159,17 +186,10 @@ def send_critical_expiry_alerts():
         title = f"CRITICAL: Loan Expiry Alert: {loan.application.reference_number}"
         message = f"URGENT: Loan {loan.application.reference_number} expires in {days_until} days on {loan.loan_expiry_date}"
         
-        # Send notifications to admin users
-        admin_users = User.objects.filter(role__in=['admin', 'accounts', 'super_user'])
-        for user in admin_users:
-            create_notification(
-                user=user,
-                title=title,
-                message=message,
-                notification_type='active_loan_critical',
-                related_object_id=loan.id,
-                related_object_type='active_loan'
-            )
+        # Queue notifications to admin users
+        pending.extend(build_active_loan_notifications(
+            admin_users, loan, title, message, 'active_loan_critical'
+        ))
         
         # Log the notification
         logger.info(
@@ -178,6 +198,13 @@ def send_critical_expiry_alerts():
         )
         alert_count += 1
     
+    # Deliver all alerts for this run in one batch
+    create_notifications_batch(
+        pending,
+        email_subject=f"CRITICAL: Active loan expiry alerts ({alert_count})",
+        email_type='active_loan_critical'
+    )
+    
     return f"Sent {alert_count} critical expiry alerts"
 
 @shared_task
@@ -195,7 +222,7 @@ def send_immediate_active_loan_alert(loan_id, alert_type="manual", message=None,
     from ..models import ActiveLoan
     
     try:
-        loan = ActiveLoan.objects.get(id=loan_id)
+        loan = ActiveLoan.objects.select_related('application').get(id=loan_id)
         
         logger.info(f"=== SEND IMMEDIATE ALERT DEBUG ===")
         logger.info(f"Loan ID: {loan_id}")
@@ -233,49 +260,29 @@ def send_immediate_active_loan_alert(loan_id, alert_type="manual", message=None,
         
         # Send notifications to specific user or all admin users
         if user_id:
-            users = User.objects.filter(id=user_id)
+            users = list(User.objects.filter(id=user_id))
             logger.info(f"Sending alert to specific user ID: {user_id}")
         else:
-            users = User.objects.filter(role__in=['admin', 'accounts', 'super_user'])
-            logger.info(f"Sending alert to all admin users. Found {users.count()} users with roles: admin, accounts, super_user")
+            users = get_active_loan_alert_recipients()
+            logger.info(f"Sending alert to all admin users. Found {len(users)} users with roles: admin, accounts, super_user")
         
-        notifications_created = 0
-        for user in users:
-            logger.info(f"Processing user: {user.email} (ID: {user.id}, Role: {user.role})")
-            
-            # Check user's notification preferences
-            try:
-                preferences = NotificationPreference.objects.get(user=user)
-                preference_enabled = preferences.get_in_app_preference(notification_type)
-                logger.info(f"User {user.email} has preferences. {notification_type}_in_app: {preference_enabled}")
-            except NotificationPreference.DoesNotExist:
-                logger.info(f"User {user.email} has no preferences, creating default")
-                preferences = NotificationPreference.objects.create(user=user)
-                preference_enabled = preferences.get_in_app_preference(notification_type)
-                logger.info(f"Created default preferences for {user.email}. {notification_type}_in_app: {preference_enabled}")
-            
-            if preference_enabled:
-                notification = create_notification(
-                    user=user,
-                    title=title,
-                    message=message,
-                    notification_type=notification_type,
-                    related_object_id=loan.id,
-                    related_object_type='active_loan'
-                )
-                if notification:
-                    notifications_created += 1
-                    logger.info(f"Created notification for user {user.email}: {notification.id}")
-                else:
-                    logger.warning(f"Failed to create notification for user {user.email}")
-            else:
-                logger.info(f"Skipping notification for user {user.email} - preference disabled for {notification_type}")
+        # Preferences for every recipient are resolved together by the bulk fan-out
+        notifications = create_notifications_bulk(
+            users,
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            related_object_id=loan.id,
+            related_object_type='active_loan',
+            email_type=notification_type
+        )
+        notifications_created = len(notifications)
         
         # Log the notification
         logger.info(
             f"Immediate alert ({alert_type}) for loan {loan.id} "
             f"(App: {loan.application.reference_number}): {message}. "
-            f"Created {notifications_created} notifications out of {users.count()} users."
+            f"Created {notifications_created} notifications out of {len(users)} users."
         )
         
         return f"Sent immediate alert for loan {loan_id} - {notifications_created} notifications created"
@@ -289,21 +296,47 @@ def cleanup_old_active_loan_notifications():
     Clean up old notifications related to active loans.
     
     This task removes notifications older than 90 days to keep the system clean.
+    Rows are deleted in throttled primary-key chunks by the retention framework.
     """
-    from users.models import Notification
-    
-    cutoff_date = timezone.now() - timedelta(days=90)
-    
-    # Delete old active loan notifications
-    deleted_count = Notification.objects.filter(
-        notification_type__in=[
-            'active_loan_payment',
-            'active_loan_expiry',
-            'active_loan_critical',
-            'active_loan_manual'
-        ],
-        created_at__lt=cutoff_date
-    ).delete()[0]
-    
-    logger.info(f"Cleaned up {deleted_count} notifications older than {cutoff_date}")
+    from users.retention import apply_retention_policy, get_retention_policy
+    
+    result = apply_retention_policy(get_retention_policy('active_loan_notifications'))
+    deleted_count = result['processed']
+    
+    logger.info(f"Cleaned up {deleted_count} old active loan notifications")
     return f"Cleaned up {deleted_count} old notifications"
+
+@shared_task
+def refresh_active_loan_dashboard_snapshot():
+    """
+    Refresh the cached active loan dashboard snapshot.
+    
+    Runs every few minutes so the dashboard is always served from cache,
+    even when no active loan writes have invalidated it.
+    """
+    from ..services.active_loans import refresh_active_loan_dashboard
+    
+    snapshot = refresh_active_loan_dashboard()
+    return f"Refreshed active loan dashboard: {snapshot['total_active_loans']} active loans"
+
+
+@shared_task
+def accrue_active_loan_interest(business_date=None):
+    """
+    Run the nightly interest accrual batch for all active loans.
+    
+    Safe to re-run: loans already accrued for the business date are skipped.
+    
+    Args:
+        business_date: ISO date string to accrue as at (defaults to today)
+    """
+    from datetime import date
+    from ..services.accruals import run_interest_accrual
+    from ..services.active_loans import invalidate_active_loan_dashboard
+    
+    accrual_date = date.fromisoformat(business_date) if business_date else None
+    created = run_interest_accrual(accrual_date)
+    invalidate_active_loan_dashboard()
+    
+    logger.info(f"Created {created} interest accrual rows")
+    return f"Accrued interest for {created} active loans"
@@ -2,16 +2,23 @@
 Notification Tasks
 
 This module contains Celery tasks related to notifications for loan applications,
-including stagnant application alerts, note reminders, and repayment notifications.
+including the application alert sweep, note reminders, and repayment notifications.
 """
 
 from celery import shared_task
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.conf import settings
 from datetime import timedelta
 
-from users.services import create_notification
+
+@shared_task
+def sweep_application_alerts():
+    """
+    Evaluate every application alert rule against open applications in one
+    pass and notify BDs of new alerts
+    """
+    from ..services.alerts import run_application_alert_sweep
+    
+    return run_application_alert_sweep()
 
 
 @shared_task
@@ -19,258 +26,233 @@ def check_stagnant_applications():
     """
     Check for applications that haven't had their stage updated in X days
     and notify the BD
-    """
-    # Import models inside the task to avoid circular imports
-    from ..models import Application
     
-    # Define the threshold for stagnant applications (e.g., 14 days)
-    threshold_days = 14
-    threshold_date = timezone.now() - timedelta(days=threshold_days)
-    
-    # Find applications that haven't had their stage updated in threshold_days
-    stagnant_applications = Application.objects.filter(
-        stage_last_updated__lt=threshold_date
-    ).exclude(
-        stage__in=['funded', 'declined', 'withdrawn']
-    )
+    Kept for existing callers; sweep_application_alerts runs all rules.
+    """
+    from ..services.alerts import get_alert_rule, run_application_alert_sweep
     
-    for application in stagnant_applications:
-        if application.bd and application.bd.user:
-            # Create system notification
-            notification_title = f'Stagnant Application Alert: {application.reference_number}'
-            notification_message = f'''
-            Application {application.reference_number} has been in the {application.get_stage_display()} stage for over {threshold_days} days.
-            
-            Please review this application and update its status or contact the broker.
-            
-            Application Details:
-            - Reference: {application.reference_number}
-            - Stage: {application.get_stage_display()}
-            - Loan Amount: ${application.loan_amount}
-            - Broker: {application.broker.name if application.broker else 'N/A'}
-            - Last Stage Update: {application.stage_last_updated.strftime('%d/%m/%Y')}
-            '''
-            
-            # Create notification for the BD
-            create_notification(
-                user=application.bd.user,
-                title=notification_title,
-                message=notification_message,
-                notification_type='system',
-                related_object_id=application.id,
-                related_object_type='application'
-            )
+    return run_application_alert_sweep(rules=[get_alert_rule('stagnant_application')])
 
 
 @shared_task
 def check_stale_applications():
     """
-    Check for applications that haven't changed stage in X days
-    and notify the BD
-    """
-    # Import models inside the task to avoid circular imports
-    from ..models import Application
-    
-    # Define the threshold for stale applications (e.g., 14 days)
-    threshold_days = 14
-    threshold_date = timezone.now() - timedelta(days=threshold_days)
+    Check for applications that haven't changed in X days and notify the BD
     
-    # Find applications that haven't been updated in threshold_days
-    stale_applications = Application.objects.filter(
-        updated_at__lt=threshold_date
-    ).exclude(
-        stage__in=['funded', 'declined', 'withdrawn']
-    )
+    Kept for existing callers; sweep_application_alerts runs all rules.
+    """
+    from ..services.alerts import get_alert_rule, run_application_alert_sweep
     
-    for application in stale_applications:
-        if application.bd and application.bd.user and application.bd.user.email:
-            # Send email notification
-            send_mail(
-                subject=f'Stale Application Alert: {application.reference_number}',
-                message=f'''
-                Application {application.reference_number} has been in the {application.get_stage_display()} stage for over {threshold_days} days.
-                
-                Please review this application and update its status or contact the broker.
-                
-                Application Details:
-                - Reference: {application.reference_number}
-                - Stage: {application.get_stage_display()}
-                - Loan Amount: ${application.loan_amount}
-                - Broker: {application.broker.name if application.broker else 'N/A'}
-                - Last Updated: {application.updated_at.strftime('%d/%m/%Y')}
-                ''',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[application.bd.user.email],
-                fail_silently=True,
-            )
+    return run_application_alert_sweep(rules=[get_alert_rule('stale_application')])
+
+
+# Notes whose reminder time passed longer ago than this are not sent, so a
+# long outage does not flood users with stale reminders
+NOTE_REMINDER_LOOKBACK = timedelta(days=1)
+NOTE_REMINDER_BATCH_SIZE = 200
 
 
 @shared_task
-def check_note_reminders():
+def check_note_reminders(batch_size=NOTE_REMINDER_BATCH_SIZE):
     """
-    Check for notes with remind_date today and send notifications
+    Check for notes whose reminder time has passed and send notifications
+    
+    Runs every few minutes. Due notes are found with a half-open range on
+    the indexed remind_date, claimed with select_for_update(skip_locked=True)
+    and marked with reminder_sent_at so a rerun never sends them twice. The
+    emails are queued through the pooled batch sender once the claim commits.
     """
     # Import models inside the task to avoid circular imports
+    from django.db import transaction
     from documents.models import Note
+    from crm_backend.tasks import queue_email_batches
     
-    today = timezone.now().date()
+    now = timezone.now()
+    sent = 0
     
-    # Find notes with remind_date today
-    reminder_notes = Note.objects.filter(
-        remind_date__date=today
-    )
-    
-    for note in reminder_notes:
-        # Determine recipients
-        recipients = []
-        
-        # Add note creator
-        if note.created_by and note.created_by.email:
-            recipients.append(note.created_by.email)
-        
-        # Add application BD if exists
-        if note.application and note.application.bd and note.application.bd.user and note.application.bd.user.email:
-            recipients.append(note.application.bd.user.email)
-        
-        # Send email if we have recipients
-        if recipients:
-            send_mail(
-                subject=f'Note Reminder: {note.title}',
-                message=f'''
-                This is a reminder for the note: {note.title}
+    while True:
+        with transaction.atomic():
+            notes = list(
+                Note.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                    remind_date__gte=now - NOTE_REMINDER_LOOKBACK,
+                    remind_date__lt=now,
+                    reminder_sent_at__isnull=True
+                ).select_related(
+                    'created_by', 'application__bd__user', 'borrower'
+                ).order_by('remind_date', 'id')[:batch_size]
+            )
+            if not notes:
+                break
+            
+            emails = []
+            for note in notes:
+                # Determine recipients
+                recipients = []
                 
-                Content: {note.content}
+                # Add note creator
+                if note.created_by and note.created_by.email:
+                    recipients.append(note.created_by.email)
                 
-                Related to Application: {note.application.reference_number if note.application else 'N/A'}
-                Related to Borrower: {note.borrower if note.borrower else 'N/A'}
+                # Add application BD if exists
+                if note.application and note.application.bd and note.application.bd.user and note.application.bd.user.email:
+                    if note.application.bd.user.email not in recipients:
+                        recipients.append(note.application.bd.user.email)
                 
-                Created on: {note.created_at.strftime('%d/%m/%Y')}
-                ''',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipients,
-                fail_silently=True,
-            )
+                if recipients:
+                    emails.append({
+                        'subject': f'Note Reminder: {note.title}',
+                        'message': (
+                            f"This is a reminder for the note: {note.title}\n\n"
+                            f"Content: {note.content}\n\n"
+                            f"Related to Application: {note.application.reference_number if note.application else 'N/A'}\n"
+                            f"Related to Borrower: {note.borrower if note.borrower else 'N/A'}\n\n"
+                            f"Created on: {note.created_at.strftime('%d/%m/%Y')}"
+                        ),
+                        'recipient_list': recipients,
+                        'email_type': 'note_reminder',
+                    })
+            
+            Note.objects.filter(id__in=[note.id for note in notes]).update(reminder_sent_at=now)
+            transaction.on_commit(lambda emails=emails: queue_email_batches(emails))
+            sent += len(emails)
+        
+        if len(notes) < batch_size:
+            break
+    
+    return sent
+
+
+# Repayment reminder stages: (flag, days after due date, subject, borrower
+# message, whether the BD is also notified)
+REPAYMENT_REMINDER_STAGES = [
+    (
+        'reminder_sent', -7,
+        'Upcoming Repayment Reminder',
+        'This is a reminder that you have a repayment of ${amount} due on {due_date}.\n\n'
+        'Application Reference: {reference}\n\n'
+        'Please ensure funds are available in your account for this repayment.',
+        False,
+    ),
+    (
+        'overdue_3_day_sent', 3,
+        'OVERDUE Repayment Notice',
+        'IMPORTANT: Your repayment of ${amount} was due on {due_date} and is now 3 days overdue.\n\n'
+        'Application Reference: {reference}\n\n'
+        'Please make this payment immediately to avoid additional fees and penalties.',
+        False,
+    ),
+    (
+        'overdue_7_day_sent', 7,
+        'URGENT: Severely Overdue Repayment',
+        'URGENT: Your repayment of ${amount} was due on {due_date} and is now 7 days overdue.\n\n'
+        'Application Reference: {reference}\n\n'
+        'This is a serious matter. Please contact us immediately to discuss payment arrangements.\n'
+        'Additional fees and legal action may be taken if payment is not received promptly.',
+        True,
+    ),
+    (
+        'overdue_10_day_sent', 10,
+        'FINAL NOTICE: Overdue Repayment',
+        'FINAL NOTICE: Your repayment of ${amount} was due on {due_date} and is now 10 days overdue.\n\n'
+        'Application Reference: {reference}\n\n'
+        'If payment is not received immediately this matter may be referred for recovery action.\n'
+        'Please contact us today.',
+        True,
+    ),
+]
+
+BD_OVERDUE_MESSAGE = (
+    'URGENT: Application {reference} has a severely overdue repayment.\n\n'
+    'Repayment Details:\n'
+    '- Amount: ${amount}\n'
+    '- Due Date: {due_date}\n'
+    '- Days Overdue: {days}\n\n'
+    'Please contact the borrower immediately and consider appropriate action.'
+)
 
 
 @shared_task
 def check_repayment_reminders():
     """
     Check for upcoming and overdue repayments and send notifications
+    
+    Candidates for every reminder stage are fetched in one query with their
+    application, BD and borrowers prefetched. Messages are grouped so each
+    recipient gets one email per run, sent through the pooled batch sender,
+    and each stage's flag is set with a single update().
     """
     # Import models inside the task to avoid circular imports
+    from django.db.models import Prefetch, Q
+    from borrowers.models import Borrower
+    from crm_backend.tasks import queue_email_batches
     from documents.models import Repayment
     
     today = timezone.now().date()
+    stages = {
+        today - timedelta(days=days): (flag, days, subject, message, notify_bd)
+        for flag, days, subject, message, notify_bd in REPAYMENT_REMINDER_STAGES
+    }
     
-    # Upcoming repayments (7 days before due date)
-    upcoming_date = today + timedelta(days=7)
-    upcoming_repayments = Repayment.objects.filter(
-        due_date=upcoming_date,
-        paid_date__isnull=True,
-        reminder_sent=False
-    )
-    
-    for repayment in upcoming_repayments:
-        # Notify borrowers
-        borrowers = repayment.application.borrowers.all()
-        for borrower in borrowers:
-            if hasattr(borrower, 'user') and borrower.user and borrower.user.email:
-                send_mail(
-                    subject=f'Upcoming Repayment Reminder',
-                    message=f'''
-                    This is a reminder that you have a repayment of ${repayment.amount} due on {repayment.due_date.strftime('%d/%m/%Y')}.
-                    
-                    Application Reference: {repayment.application.reference_number}
-                    
-                    Please ensure funds are available in your account for this repayment.
-                    ''',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[borrower.user.email],
-                    fail_silently=True,
-                )
-        
-        # Mark as reminded
-        repayment.reminder_sent = True
-        repayment.save()
+    candidates = Q()
+    for due_date, (flag, *_) in stages.items():
+        candidates |= Q(due_date=due_date, **{flag: False})
     
-    # 3 days overdue - notify borrowers
-    overdue_3_date = today - timedelta(days=3)
-    overdue_3_repayments = Repayment.objects.filter(
-        due_date=overdue_3_date,
-        paid_date__isnull=True,
-        overdue_3_day_sent=False
+    repayments = Repayment.objects.filter(candidates, paid_date__isnull=True).select_related(
+        'application__bd__user'
+    ).prefetch_related(
+        Prefetch('application__borrowers', queryset=Borrower.objects.select_related('user'))
     )
     
-    for repayment in overdue_3_repayments:
-        # Notify borrowers
-        borrowers = repayment.application.borrowers.all()
-        for borrower in borrowers:
-            if hasattr(borrower, 'user') and borrower.user and borrower.user.email:
-                send_mail(
-                    subject=f'OVERDUE Repayment Notice',
-                    message=f'''
-                    IMPORTANT: Your repayment of ${repayment.amount} was due on {repayment.due_date.strftime('%d/%m/%Y')} and is now 3 days overdue.
-                    
-                    Application Reference: {repayment.application.reference_number}
-                    
-                    Please make this payment immediately to avoid additional fees and penalties.
-                    ''',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[borrower.user.email],
-                    fail_silently=True,
-                )
-        
-        # Mark as 3 day overdue notification sent
-        repayment.overdue_3_day_sent = True
-        repayment.save()
+    # Messages per recipient: email -> (user ID, [(subject, body)])
+    outgoing = {}
+    flagged = {}
     
-    # 7 days overdue - notify borrowers and BD
-    overdue_7_date = today - timedelta(days=7)
-    overdue_7_repayments = Repayment.objects.filter(
-        due_date=overdue_7_date,
-        paid_date__isnull=True,
-        overdue_7_day_sent=False
-    )
+    def add_message(user, subject, body):
+        if user and user.email:
+            outgoing.setdefault(user.email, (user.id, []))[1].append((subject, body))
     
-    for repayment in overdue_7_repayments:
+    for repayment in repayments:
+        flag, days, subject, message, notify_bd = stages[repayment.due_date]
+        application = repayment.application
+        details = {
+            'amount': repayment.amount,
+            'due_date': repayment.due_date.strftime('%d/%m/%Y'),
+            'reference': application.reference_number,
+            'days': days,
+        }
+        
         # Notify borrowers
-        borrowers = repayment.application.borrowers.all()
-        for borrower in borrowers:
-            if hasattr(borrower, 'user') and borrower.user and borrower.user.email:
-                send_mail(
-                    subject=f'URGENT: Severely Overdue Repayment',
-                    message=f'''
-                    URGENT: Your repayment of ${repayment.amount} was due on {repayment.due_date.strftime('%d/%m/%Y')} and is now 7 days overdue.
-                    
-                    Application Reference: {repayment.application.reference_number}
-                    
-                    This is a serious matter. Please contact us immediately to discuss payment arrangements.
-                    Additional fees and legal action may be taken if payment is not received promptly.
-                    ''',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[borrower.user.email],
-                    fail_silently=True,
-                )
+        for borrower in application.borrowers.all():
+            add_message(borrower.user, subject, message.format(**details))
         
-        # Notify BD
-        if repayment.application.bd and repayment.application.bd.user and repayment.application.bd.user.email:
-            send_mail(
-                subject=f'URGENT: Severely Overdue Repayment - {repayment.application.reference_number}',
-                message=f'''
-                URGENT: Application {repayment.application.reference_number} has a severely overdue repayment.
-                
-                Repayment Details:
-                - Amount: ${repayment.amount}
-                - Due Date: {repayment.due_date.strftime('%d/%m/%Y')}
-                - Days Overdue: 7
-                
-                Please contact the borrower immediately and consider appropriate action.
-                ''',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[repayment.application.bd.user.email],
-                fail_silently=True,
+        # Notify BD of severely overdue repayments
+        if notify_bd and application.bd:
+            add_message(
+                application.bd.user,
+                f'{subject} - {application.reference_number}',
+                BD_OVERDUE_MESSAGE.format(**details)
             )
         
-        # Mark as 7 day overdue notification sent
-        repayment.overdue_7_day_sent = True
-        repayment.save() 
\ No newline at end of file
+        flagged.setdefault(flag, []).append(repayment.id)
+    
+    emails = []
+    for email, (user_id, messages) in outgoing.items():
+        if len(messages) == 1:
+            subject, body = messages[0]
+        else:
+            subject = f'You have {len(messages)} repayment notices'
+            body = '\n\n'.join(f'{title}\n\n{text}' for title, text in messages)
+        emails.append({
+            'subject': subject,
+            'message': body,
+            'recipient_list': [email],
+            'user_id': user_id,
+            'email_type': 'repayment_reminder',
+        })
+    queue_email_batches(emails)
+    
+    # Mark each stage as sent without per-row saves
+    for flag, repayment_ids in flagged.items():
+        Repayment.objects.filter(id__in=repayment_ids).update(**{flag: True})
+    
+    return {flag: len(repayment_ids) for flag, repayment_ids in flagged.items()}
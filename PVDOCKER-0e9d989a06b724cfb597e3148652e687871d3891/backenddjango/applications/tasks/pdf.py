@@ -0,0 +1,99 @@
+"""
+Tasks for generating filled application PDF forms.
+
+This module contains Celery tasks for:
+- Filling the application form for a single application
+- Filling the application form for many applications into a ZIP bundle
+
+Progress is reported with update_state so it can be followed through the
+task status endpoint.
+"""
+
+from celery import shared_task
+from django.conf import settings
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+def media_path(path):
+    """Path of a file under MEDIA_ROOT as returned by the PDF endpoints."""
+    return f"media/{os.path.relpath(path, settings.MEDIA_ROOT)}"
+
+
+@shared_task(bind=True)
+def generate_application_pdf_async(self, application_id):
+    """
+    Fill the application form for one application.
+
+    Args:
+        application_id: ID of the application
+
+    Returns:
+        Dictionary with the PDF path and the list of missing fields
+    """
+    from applications.models import Application
+    from applications.utils.pdf_filler import get_filled_pdf
+
+    self.update_state(state='STARTED', meta={'progress': 0, 'message': 'Starting PDF generation'})
+
+    try:
+        application = Application.objects.get(id=application_id)
+
+        self.update_state(state='STARTED', meta={'progress': 25, 'message': 'Filling PDF form'})
+        pdf_path, missing_fields = get_filled_pdf(application)
+
+        return {
+            'application_id': application_id,
+            'pdf_path': media_path(pdf_path),
+            'missing_fields': missing_fields,
+        }
+
+    except Exception as e:
+        logger.exception(f"Error generating PDF for application {application_id}: {str(e)}")
+        self.update_state(state='FAILURE', meta={'message': str(e)})
+        raise
+
+
+@shared_task(bind=True)
+def generate_application_pdfs_bulk(self, application_ids):
+    """
+    Fill the application form for several applications into a ZIP file.
+
+    Forms are rendered in the worker process, or in a process pool when
+    PDF_RENDER_PROCESSES is set, and added to the ZIP as they finish.
+    Progress is reported after each application, and bundles past their
+    retention period are deleted once the ZIP is written.
+
+    Args:
+        application_ids: IDs of the applications
+
+    Returns:
+        Dictionary with the ZIP path, the number of PDFs, the missing fields
+        per application ID and the error per application ID that failed
+    """
+    from applications.utils.pdf_batch import evict_pdf_bundles, generate_pdf_bundle, get_pdf_bundle_dir
+
+    total = len(application_ids)
+    self.update_state(state='STARTED', meta={'progress': 0, 'message': f'Starting PDF generation for {total} applications'})
+
+    def progress(done, total):
+        self.update_state(state='STARTED', meta={
+            'progress': int(done * 100 / total),
+            'message': f'Generated {done} of {total} PDFs'
+        })
+
+    try:
+        bundle_id = self.request.id or uuid.uuid4().hex
+        zip_path = os.path.join(get_pdf_bundle_dir(), f"{bundle_id}.zip")
+        result = generate_pdf_bundle(application_ids, zip_path, progress=progress)
+        evict_pdf_bundles()
+
+        return dict(result, zip_path=media_path(zip_path))
+
+    except Exception as e:
+        logger.exception(f"Error generating PDF bundle: {str(e)}")
+        self.update_state(state='FAILURE', meta={'message': str(e)})
+        raise
@@ -0,0 +1,272 @@
+"""
+Tests for Active Loan management.
+
+This module tests the active loan interest payment schedule and
+the alert/dashboard endpoints that read from it.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from applications.models import ActiveLoan, ActiveLoanRepayment, InterestAccrual, InterestPaymentDue
+from applications.services.accruals import calculate_loan_accrual, run_interest_accrual
+from applications.services.active_loans import (
+    compute_active_loan_dashboard,
+    get_active_loan_dashboard,
+)
+from applications.tasks.active_loans import send_active_loan_payment_reminders
+from applications.tests.base import BaseApplicationTestCase
+
+
+class ActiveLoanTestCase(BaseApplicationTestCase):
+    """Base test case that creates an active loan with an interest schedule."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.today = timezone.now().date()
+        self.application.stage = 'settled'
+        self.application.save()
+        ActiveLoan.objects.filter(application=self.application).delete()
+
+        self.active_loan = self.create_active_loan(self.application, [
+            (self.today - timedelta(days=20)).isoformat(),
+            (self.today + timedelta(days=5)).isoformat(),
+            (self.today + timedelta(days=40)).isoformat(),
+        ])
+
+    def create_active_loan(self, application, due_dates, **kwargs):
+        """Create an active loan with interest payments on the given dates."""
+        defaults = {
+            'settlement_date': self.today - timedelta(days=60),
+            'loan_expiry_date': self.today + timedelta(days=300),
+            'interest_payments_required': True,
+            'interest_payment_frequency': 'monthly',
+            'interest_payment_due_dates': due_dates,
+        }
+        defaults.update(kwargs)
+        return ActiveLoan.objects.create(application=application, **defaults)
+
+
+class InterestPaymentScheduleTest(ActiveLoanTestCase):
+    """Test the InterestPaymentDue table is kept in sync with the loan."""
+
+    def test_schedule_rows_created_on_save(self):
+        """Saving an active loan creates one row per due date."""
+        due_dates = list(
+            self.active_loan.interest_payments_due.values_list('due_date', flat=True)
+        )
+        self.assertEqual(due_dates, [
+            self.today - timedelta(days=20),
+            self.today + timedelta(days=5),
+            self.today + timedelta(days=40),
+        ])
+        self.assertEqual(
+            self.active_loan.interest_payments_due.first().amount,
+            Decimal('5000.00')
+        )
+
+    def test_schedule_resynced_on_update(self):
+        """Removed dates are dropped and new dates added, paid rows kept."""
+        paid_date = self.today - timedelta(days=20)
+        InterestPaymentDue.objects.filter(
+            active_loan=self.active_loan, due_date=paid_date
+        ).update(paid=True)
+
+        self.active_loan.interest_payment_due_dates = [
+            (self.today + timedelta(days=10)).isoformat(),
+        ]
+        self.active_loan.save()
+
+        rows = list(self.active_loan.interest_payments_due.values_list('due_date', 'paid'))
+        self.assertEqual(rows, [
+            (paid_date, True),
+            (self.today + timedelta(days=10), False),
+        ])
+
+    def test_schedule_cleared_when_not_required(self):
+        """Unpaid rows are removed when interest payments are no longer required."""
+        self.active_loan.interest_payments_required = False
+        self.active_loan.save()
+        self.assertFalse(self.active_loan.interest_payments_due.exists())
+
+    def test_next_interest_payment_date(self):
+        """The next payment is the earliest unpaid date from today."""
+        self.assertEqual(
+            self.active_loan.next_interest_payment_date,
+            self.today + timedelta(days=5)
+        )
+        self.assertEqual(self.active_loan.days_until_next_payment, 5)
+
+    def test_interest_repayment_marks_schedule_paid(self):
+        """Recording an interest repayment marks the scheduled payment paid."""
+        due_date = self.today + timedelta(days=5)
+        ActiveLoanRepayment.objects.create(
+            active_loan=self.active_loan,
+            repayment_type='interest',
+            amount=Decimal('5000.00'),
+            payment_date=self.today,
+            due_date=due_date
+        )
+        self.assertTrue(
+            InterestPaymentDue.objects.get(active_loan=self.active_loan, due_date=due_date).paid
+        )
+        self.assertEqual(
+            self.active_loan.next_interest_payment_date,
+            self.today + timedelta(days=40)
+        )
+
+    def test_payment_due_within(self):
+        """payment_due_within annotates the next due date inside the window."""
+        loans = ActiveLoan.objects.payment_due_within(7)
+        self.assertEqual(list(loans), [self.active_loan])
+        self.assertEqual(loans[0].next_payment_due, self.today + timedelta(days=5))
+        self.assertFalse(ActiveLoan.objects.payment_due_within(3).exists())
+
+
+class ActiveLoanAlertEndpointTest(ActiveLoanTestCase):
+    """Test the alerts and dashboard endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        other_application = self.create_test_application(stage='settled')
+        ActiveLoan.objects.filter(application=other_application).delete()
+        self.other_loan = self.create_active_loan(other_application, [
+            (self.today + timedelta(days=30)).isoformat(),
+        ])
+
+    def test_alerts_payment_due(self):
+        """Only loans with a payment due within 14 days are payment alerts."""
+        response = self.client.get('/api/applications/active-loans/alerts/')
+        self.assertResponseSuccess(response)
+
+        payment_ids = [loan['id'] for loan in response.data['payment_alerts']]
+        self.assertEqual(payment_ids, [self.active_loan.id])
+        self.assertEqual(response.data['payment_alerts'][0]['days_until_next_payment'], 5)
+
+    def test_dashboard_payment_due_count(self):
+        """The dashboard counts payments due in SQL."""
+        response = self.client.get('/api/applications/active-loans/dashboard/')
+        self.assertResponseSuccess(response)
+        self.assertEqual(response.data['total_active_loans'], 2)
+        self.assertEqual(response.data['alerts']['payment_due'], 1)
+
+
+class ActiveLoanDashboardSnapshotTest(ActiveLoanTestCase):
+    """Test the cached single-query dashboard snapshot."""
+
+    def test_dashboard_computed_in_one_query(self):
+        """Loan counters come from one aggregate query, accrual totals from one more."""
+        with self.assertNumQueries(2):
+            snapshot = compute_active_loan_dashboard()
+        self.assertEqual(snapshot['total_active_loans'], 1)
+        self.assertEqual(snapshot['total_loan_value'], Decimal('500000.00'))
+        self.assertEqual(snapshot['alerts']['payment_due'], 1)
+        self.assertEqual(snapshot['alerts']['total_alerts'], 1)
+
+    def test_dashboard_served_from_cache(self):
+        """A cached snapshot is served without querying the database."""
+        get_active_loan_dashboard()
+        with self.assertNumQueries(0):
+            get_active_loan_dashboard()
+
+    def test_dashboard_invalidated_on_repayment(self):
+        """Recording a repayment invalidates the snapshot once committed."""
+        self.assertEqual(get_active_loan_dashboard()['alerts']['payment_due'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ActiveLoanRepayment.objects.create(
+                active_loan=self.active_loan,
+                repayment_type='interest',
+                amount=Decimal('5000.00'),
+                payment_date=self.today,
+                due_date=self.today + timedelta(days=5)
+            )
+
+        self.assertEqual(get_active_loan_dashboard()['alerts']['payment_due'], 0)
+
+
+class ActiveLoanAlertTaskTest(ActiveLoanTestCase):
+    """Test the active loan alert tasks deliver in one batch."""
+
+    @patch('applications.tasks.active_loans.create_notifications_batch')
+    def test_payment_reminders_batched(self, mock_batch):
+        """Payment reminders for every loan are delivered in a single batch."""
+        result = send_active_loan_payment_reminders()
+
+        self.assertEqual(result, 'Sent 1 payment reminders')
+        mock_batch.assert_called_once()
+        notifications = mock_batch.call_args[0][0]
+        self.assertEqual([n.user for n in notifications], [self.admin_user])
+        self.assertEqual(notifications[0].related_object_id, self.active_loan.id)
+        self.assertEqual(notifications[0].notification_type, 'active_loan_payment')
+
+
+class InterestAccrualTest(ActiveLoanTestCase):
+    """Test the nightly interest accrual batch and the reads built on it."""
+
+    def test_capitalised_interest_then_accrual(self):
+        """Interest is capitalised during the term, then accrues on the larger balance."""
+        from datetime import date
+
+        accrual = calculate_loan_accrual(
+            date(2024, 5, 1),
+            principal=Decimal('100000.00'),
+            annual_rate=Decimal('10.00'),
+            settlement_date=date(2024, 1, 1),
+            capitalised_interest_months=3
+        )
+
+        # 91 days from 1 Jan to 1 Apr in a leap year, Actual/365
+        self.assertEqual(accrual['capitalised_interest'], Decimal('2493.15'))
+        self.assertEqual(accrual['balance'], Decimal('102493.15'))
+        self.assertEqual(accrual['accrued_interest'], Decimal('842.41'))
+
+    def test_run_accrual_writes_one_row_per_loan(self):
+        """The batch writes accrued interest and arrears for each active loan."""
+        self.assertEqual(run_interest_accrual(self.today), 1)
+
+        accrual = InterestAccrual.objects.get(active_loan=self.active_loan)
+        self.assertEqual(accrual.daily_interest, Decimal('116.4384'))
+        self.assertEqual(accrual.accrued_interest, Decimal('6986.30'))
+        self.assertEqual(accrual.arrears_amount, Decimal('5000.00'))
+        self.assertEqual(accrual.days_in_arrears, 20)
+
+    def test_run_accrual_is_idempotent(self):
+        """Re-running for the same business date does not duplicate rows."""
+        run_interest_accrual(self.today)
+        self.assertEqual(run_interest_accrual(self.today), 0)
+        self.assertEqual(run_interest_accrual(self.today, recalculate=True), 1)
+        self.assertEqual(InterestAccrual.objects.count(), 1)
+
+    def test_paid_interest_restarts_accrual(self):
+        """Accrual restarts from the last paid interest due date."""
+        ActiveLoanRepayment.objects.create(
+            active_loan=self.active_loan,
+            repayment_type='interest',
+            amount=Decimal('5000.00'),
+            payment_date=self.today - timedelta(days=20),
+            due_date=self.today - timedelta(days=20)
+        )
+        run_interest_accrual(self.today)
+
+        accrual = InterestAccrual.objects.get(active_loan=self.active_loan)
+        self.assertEqual(accrual.accrued_interest, Decimal('2328.77'))
+        self.assertEqual(accrual.arrears_amount, Decimal('0.00'))
+
+    def test_serializer_and_dashboard_read_accruals(self):
+        """The loan detail and dashboard read the latest accrual rows."""
+        run_interest_accrual(self.today)
+
+        response = self.client.get(f'/api/applications/active-loans/{self.active_loan.id}/')
+        self.assertResponseSuccess(response)
+        self.assertEqual(Decimal(response.data['current_accrual']['accrued_interest']), Decimal('6986.30'))
+
+        accruals = compute_active_loan_dashboard()['accruals']
+        self.assertEqual(accruals['business_date'], self.today.isoformat())
+        self.assertEqual(accruals['total_arrears'], Decimal('5000.00'))
+        self.assertEqual(accruals['loans_in_arrears'], 1)
@@ -0,0 +1,134 @@
+"""
+Tests for the repayment schedule amortization engine.
+
+This module tests schedule calculation across repayment frequencies,
+interest-only and capitalised-interest phases, and bulk persistence.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from applications.services import generate_repayment_schedule
+from applications.services.amortization import calculate_amortization_schedule
+from applications.tests.base import BaseApplicationTestCase
+from documents.models import Ledger, Repayment
+
+
+class AmortizationScheduleTest(SimpleTestCase):
+    """Test the pure schedule calculation."""
+
+    def test_period_counts_per_frequency(self):
+        """Each frequency produces the expected number of periods for a year."""
+        expected = {'weekly': 52, 'fortnightly': 26, 'monthly': 12, 'quarterly': 4, 'annually': 1}
+        for frequency, periods in expected.items():
+            schedule = calculate_amortization_schedule(
+                10000, 12, 12, frequency=frequency, start_date=date(2024, 1, 1)
+            )
+            self.assertEqual(len(schedule), periods, frequency)
+            self.assertEqual(schedule[-1]['closing_balance'], Decimal('0'), frequency)
+
+    def test_monthly_level_payment(self):
+        """A standard monthly loan repays principal with level payments."""
+        schedule = calculate_amortization_schedule(10000, 12, 12, start_date=date(2024, 1, 1))
+
+        self.assertEqual(schedule[0]['amount'], Decimal('888.49'))
+        self.assertEqual(schedule[0]['interest'], Decimal('100.00'))
+        self.assertEqual(sum(p['principal'] for p in schedule), Decimal('10000'))
+        self.assertTrue(all(p['period_type'] == 'principal_interest' for p in schedule))
+
+    def test_month_end_due_dates_are_clamped(self):
+        """Monthly due dates starting at month end clamp to shorter months."""
+        schedule = calculate_amortization_schedule(1200, 0, 3, start_date=date(2023, 12, 31))
+
+        self.assertEqual(
+            [p['due_date'] for p in schedule],
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)]
+        )
+
+    def test_interest_only_ends_with_balloon(self):
+        """An interest-only loan pays interest each period and principal at the end."""
+        schedule = calculate_amortization_schedule(
+            12000, 12, 6, start_date=date(2024, 1, 1), interest_only_months=6
+        )
+
+        self.assertTrue(all(p['period_type'] == 'interest_only' for p in schedule))
+        self.assertEqual(schedule[0]['amount'], Decimal('120.00'))
+        self.assertEqual(schedule[-1]['amount'], Decimal('12120.00'))
+        self.assertEqual(schedule[-1]['closing_balance'], Decimal('0'))
+
+    def test_capitalised_interest_increases_balance(self):
+        """Capitalised periods take no payment and add interest to the balance."""
+        schedule = calculate_amortization_schedule(
+            10000, 12, 12, start_date=date(2024, 1, 1), capitalised_interest_months=3
+        )
+
+        capitalised = schedule[:3]
+        self.assertTrue(all(p['amount'] == 0 for p in capitalised))
+        self.assertEqual(capitalised[-1]['closing_balance'], Decimal('10303.01'))
+        self.assertEqual(schedule[-1]['closing_balance'], Decimal('0'))
+
+    def test_unsupported_frequency_raises(self):
+        """An unknown frequency is rejected."""
+        with self.assertRaises(ValueError):
+            calculate_amortization_schedule(1000, 5, 12, frequency='daily')
+
+    def test_negative_interest_only_months_raises(self):
+        """A negative interest-only term is rejected."""
+        with self.assertRaises(ValueError):
+            calculate_amortization_schedule(1000, 5, 12, interest_only_months=-3)
+
+
+class RepaymentScheduleGenerationTest(BaseApplicationTestCase):
+    """Test persisting and previewing application repayment schedules."""
+
+    def setUp(self):
+        super().setUp()
+        self.application.repayment_frequency = 'quarterly'
+        self.application.estimated_settlement_date = date(2024, 1, 15)
+        self.application.save()
+
+    def test_preview_does_not_write(self):
+        """Preview returns the schedule without creating repayments."""
+        schedule = generate_repayment_schedule(self.application.id, self.admin_user, preview=True)
+
+        self.assertEqual(len(schedule), 4)
+        self.assertFalse(Repayment.objects.filter(application=self.application).exists())
+
+    def test_generate_bulk_creates_repayments_and_ledger(self):
+        """Generation replaces repayments and posts one ledger entry each."""
+        generate_repayment_schedule(self.application.id, self.admin_user)
+        repayments = generate_repayment_schedule(self.application.id, self.admin_user)
+
+        self.assertEqual(len(repayments), 4)
+        self.assertEqual(Repayment.objects.filter(application=self.application).count(), 4)
+        self.assertEqual(
+            Ledger.objects.filter(
+                application=self.application,
+                transaction_type='repayment_scheduled',
+                related_repayment__isnull=False
+            ).count(),
+            4
+        )
+
+    def test_repayment_schedule_endpoint(self):
+        """The endpoint previews on GET and generates on POST."""
+        url = self.get_application_url(self.application.id, 'repayment-schedule')
+
+        response = self.client.get(url, {'interest_only_months': 6})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['schedule'][0]['period_type'], 'interest_only')
+        self.assertEqual(response.data['schedule'][0]['due_date'], '2024-04-15')
+
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Repayment.objects.filter(application=self.application).count(), 4)
+
+    def test_repayment_schedule_endpoint_rejects_negative_interest_only(self):
+        """A negative interest-only term returns 400 without writing repayments."""
+        url = self.get_application_url(self.application.id, 'repayment-schedule')
+
+        response = self.client.post(url, {'interest_only_months': -6}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Repayment.objects.filter(application=self.application).exists())
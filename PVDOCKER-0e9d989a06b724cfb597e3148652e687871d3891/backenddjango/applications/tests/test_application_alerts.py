@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from applications.models import Application, ApplicationAlert
+from applications.services.alerts import get_alert_rule, run_application_alert_sweep
+from brokers.models import BDM, Broker
+from users.models import Notification, User
+from users.services import clear_notification_preference_cache
+
+
+@patch('users.tasks.dispatch_notification_outbox.delay')
+class ApplicationAlertSweepTestCase(TestCase):
+    """Test case for the unified application alert sweep"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        clear_notification_preference_cache()
+        self.bd_user = User.objects.create_user(email='bd@example.com', password='testpassword', role='bd')
+        self.bdm = BDM.objects.create(user=self.bd_user, name='Test BDM')
+        self.broker = Broker.objects.create(name='Test Broker')
+        self.now = timezone.now()
+
+    def create_application(self, stage='received', updated_days=0, stage_days=None, **kwargs):
+        application = Application.objects.create(
+            stage=stage,
+            bd=self.bdm,
+            broker=self.broker,
+            created_at=self.now - timedelta(days=60),
+            **kwargs
+        )
+        history = []
+        if stage_days is not None:
+            history = [{
+                'from_stage': 'received',
+                'to_stage': stage,
+                'timestamp': (self.now - timedelta(days=stage_days)).isoformat(),
+                'user': 'bd@example.com',
+            }]
+        Application.objects.filter(pk=application.pk).update(
+            updated_at=self.now - timedelta(days=updated_days),
+            stage_history=history
+        )
+        return application
+
+    def test_one_pass_evaluates_all_rules(self, mock_dispatch):
+        """Test stale and stagnant applications are found in one sweep"""
+        stale = self.create_application(updated_days=20)
+        stagnant = self.create_application(stage='valuation_ordered', updated_days=1, stage_days=30)
+        self.create_application(stage='valuation_ordered', updated_days=1, stage_days=2)
+        self.create_application(stage='settled', updated_days=30)
+
+        stats = run_application_alert_sweep(now=self.now)
+
+        self.assertEqual(stats, {'scanned': 3, 'alerts': 2})
+        self.assertEqual(
+            set(ApplicationAlert.objects.values_list('rule', 'application_id')),
+            {('stale_application', stale.id), ('stagnant_application', stagnant.id)}
+        )
+        titles = set(Notification.objects.filter(user=self.bd_user).values_list('title', flat=True))
+        self.assertEqual(titles, {
+            f'Stale Application Alert: {stale.reference_number}',
+            f'Stagnant Application Alert: {stagnant.reference_number}',
+        })
+
+    def test_alerts_are_not_repeated_within_period(self, mock_dispatch):
+        """Test the ledger stops daily re-alerts until the next period"""
+        self.create_application(updated_days=20)
+
+        self.assertEqual(run_application_alert_sweep(now=self.now)['alerts'], 1)
+        self.assertEqual(run_application_alert_sweep(now=self.now + timedelta(days=1))['alerts'], 0)
+        self.assertEqual(Notification.objects.count(), 1)
+
+        # A new period alerts again
+        self.assertEqual(run_application_alert_sweep(now=self.now + timedelta(days=8))['alerts'], 1)
+
+    def test_query_count_does_not_grow_with_applications(self, mock_dispatch):
+        """Test related objects are not loaded per application"""
+        for _ in range(3):
+            self.create_application(updated_days=20)
+        # Warm the recipient's preference cache
+        run_application_alert_sweep(now=self.now)
+        with CaptureQueriesContext(connection) as small:
+            run_application_alert_sweep(now=self.now + timedelta(days=7))
+
+        for _ in range(6):
+            self.create_application(updated_days=20)
+        with CaptureQueriesContext(connection) as large:
+            run_application_alert_sweep(now=self.now + timedelta(days=14))
+
+        self.assertEqual(len(small), len(large))
+
+    def test_single_rule(self, mock_dispatch):
+        """Test a sweep can be limited to one rule"""
+        self.create_application(updated_days=20)
+        self.create_application(stage='valuation_ordered', updated_days=1, stage_days=30)
+
+        stats = run_application_alert_sweep(rules=[get_alert_rule('stagnant_application')], now=self.now)
+
+        self.assertEqual(stats['alerts'], 1)
+        self.assertEqual(list(ApplicationAlert.objects.values_list('rule', flat=True)), ['stagnant_application'])
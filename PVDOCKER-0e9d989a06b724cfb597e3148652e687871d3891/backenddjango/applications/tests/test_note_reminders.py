@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from applications.models import Application
+from applications.tasks import check_note_reminders
+from brokers.models import BDM
+from documents.models import Note
+from users.models import User
+
+
+@patch('crm_backend.tasks.group')
+class NoteReminderTestCase(TestCase):
+    """Test case for note reminders"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.now = timezone.now()
+        self.user = User.objects.create_user(email='author@example.com', password='testpassword', role='broker')
+        bd_user = User.objects.create_user(email='bd@example.com', password='testpassword', role='bd')
+        self.application = Application.objects.create(bd=BDM.objects.create(user=bd_user, name='Test BDM'))
+
+    def create_note(self, remind_in, **kwargs):
+        return Note.objects.create(
+            title='Call borrower',
+            content='Follow up on valuation',
+            remind_date=self.now + remind_in,
+            application=self.application,
+            created_by=self.user,
+            **kwargs
+        )
+
+    def sent_emails(self, mock_group):
+        return [
+            message
+            for call in mock_group.call_args_list
+            for signature in call[0][0]
+            for message in signature.args[0]
+        ]
+
+    def test_due_notes_are_sent_once(self, mock_group):
+        """Test due notes are sent and marked, and a rerun sends nothing"""
+        due = self.create_note(-timedelta(minutes=3))
+        self.create_note(timedelta(minutes=10))
+        self.create_note(-timedelta(days=3))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(check_note_reminders(), 1)
+
+        [email] = self.sent_emails(mock_group)
+        self.assertEqual(email['subject'], 'Note Reminder: Call borrower')
+        self.assertEqual(email['recipient_list'], ['author@example.com', 'bd@example.com'])
+        due.refresh_from_db()
+        self.assertIsNotNone(due.reminder_sent_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(check_note_reminders(), 0)
+        self.assertEqual(len(self.sent_emails(mock_group)), 1)
+
+    def test_rescheduled_note_is_sent_again(self, mock_group):
+        """Test changing remind_date clears the sent marker"""
+        note = self.create_note(-timedelta(minutes=3))
+        with self.captureOnCommitCallbacks(execute=True):
+            check_note_reminders()
+
+        note.refresh_from_db()
+        note.remind_date = self.now + timedelta(hours=1)
+        note.save()
+        self.assertIsNone(note.reminder_sent_at)
+
+    def test_notes_are_sent_in_batches(self, mock_group):
+        """Test related objects are selected rather than loaded per note"""
+        for _ in range(5):
+            self.create_note(-timedelta(minutes=1))
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(check_note_reminders(batch_size=2), 5)
+
+        # One select and one update per batch
+        selects = [q for q in queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 3)
+        self.assertEqual(mock_group.call_count, 3)
@@ -0,0 +1,213 @@
+"""
+Tests for asynchronous and bulk PDF generation
+
+These tests fill a small pdfrw-built form for several applications and check
+the ZIP bundle, the progress reported by the tasks and the async endpoints.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from pdfrw import PdfReader
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from applications.models import Application
+from crm_backend.tasks import get_task_owner
+from applications.tasks.pdf import generate_application_pdf_async, generate_application_pdfs_bulk
+from applications.tests.test_pdf_fill_plan import write_template
+from applications.utils.pdf_batch import (
+    PDF_RENDER_PROCESSES, generate_pdf_bundle, get_pdf_bundle_dir, shutdown_render_pool
+)
+from applications.utils.pdf_filler import FillPlan, clear_fill_plan_cache
+from users.models import User
+
+
+class PDFBulkTestCase(TestCase):
+    """Test case for bulk PDF generation"""
+
+    def setUp(self):
+        clear_fill_plan_cache()
+        self.addCleanup(clear_fill_plan_cache)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.media_settings = override_settings(MEDIA_ROOT=self.directory, PDF_RENDER_PROCESSES=0)
+        self.media_settings.enable()
+        self.addCleanup(self.media_settings.disable)
+
+        self.template_path = os.path.join(self.directory, 'template.pdf')
+        write_template(self.template_path)
+        for target in ['applications.utils.pdf_filler.get_pdf_template_path',
+                       'applications.utils.pdf_batch.get_pdf_template_path']:
+            template_patcher = patch(target, return_value=self.template_path)
+            template_patcher.start()
+            self.addCleanup(template_patcher.stop)
+
+        self.user = User.objects.create_user(email='admin@example.com', password='testpassword', role='admin')
+        self.applications = [
+            Application.objects.create(loan_amount=100000 * (index + 1), loan_term=12, created_by=self.user)
+            for index in range(3)
+        ]
+        self.application_ids = [application.id for application in self.applications]
+        self.zip_path = os.path.join(self.directory, 'bundle.zip')
+
+    def bundle_names(self):
+        with zipfile.ZipFile(self.zip_path) as bundle:
+            for name in bundle.namelist():
+                self.assertTrue(PdfReader(fdata=bundle.read(name)).Root.Pages)
+            return sorted(bundle.namelist())
+
+    def expected_names(self):
+        return sorted(f"{application.reference_number or application.id}.pdf" for application in self.applications)
+
+    def test_bundle_inline(self):
+        """Test that every application is added to the ZIP and progress is reported"""
+        progress = Mock()
+        result = generate_pdf_bundle(self.application_ids, self.zip_path, progress=progress)
+
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(sorted(result['missing_fields']), sorted(str(pk) for pk in self.application_ids))
+        self.assertEqual(self.bundle_names(), self.expected_names())
+        self.assertEqual([call.args for call in progress.call_args_list], [(1, 3), (2, 3), (3, 3)])
+
+    @override_settings(PDF_RENDER_PROCESSES=2)
+    def test_bundle_process_pool(self):
+        """Test that forms rendered in the process pool are added to the ZIP"""
+        self.addCleanup(shutdown_render_pool)
+        result = generate_pdf_bundle(self.application_ids, self.zip_path)
+
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(self.bundle_names(), self.expected_names())
+
+    @override_settings(PDF_RENDER_PROCESSES=2)
+    def test_bulk_task_in_daemonic_process(self):
+        """Test that the bulk task renders in process when run from a daemonic worker child"""
+        self.assertEqual(PDF_RENDER_PROCESSES, 0)
+        context = multiprocessing.get_context('fork')
+        results = context.SimpleQueue()
+
+        def run_task():
+            try:
+                with patch.object(generate_application_pdfs_bulk, 'update_state'):
+                    results.put(generate_application_pdfs_bulk.run(application_ids=self.application_ids))
+            except BaseException as e:
+                results.put(repr(e))
+
+        child = context.Process(target=run_task, daemon=True)
+        child.start()
+        child.join(60)
+        self.assertEqual(child.exitcode, 0)
+
+        result = results.get()
+        self.assertIsInstance(result, dict, result)
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(result['errors'], {})
+
+    def test_missing_application_reported(self):
+        """Test that unknown application IDs are reported without failing the bundle"""
+        result = generate_pdf_bundle(self.application_ids[:1] + [999999], self.zip_path)
+
+        self.assertEqual(result['count'], 1)
+        self.assertEqual(result['errors'], {'999999': 'Application not found'})
+        self.assertEqual(len(self.bundle_names()), 1)
+
+    def test_bundle_reuses_cached_pdfs(self):
+        """Test that a second bundle is built from the generated PDF cache"""
+        generate_pdf_bundle(self.application_ids, self.zip_path)
+        with patch.object(FillPlan, 'fill', autospec=True, side_effect=FillPlan.fill) as fill:
+            result = generate_pdf_bundle(self.application_ids, self.zip_path)
+
+        self.assertEqual(fill.call_count, 0)
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(self.bundle_names(), self.expected_names())
+
+    def test_evicted_cached_pdf_is_rendered(self):
+        """Test that a cached PDF evicted after the lookup is rendered instead"""
+        missing_path = os.path.join(self.directory, 'evicted.pdf')
+        with patch('applications.utils.pdf_batch.get_cached_pdf', return_value=missing_path):
+            result = generate_pdf_bundle(self.application_ids, self.zip_path)
+
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(self.bundle_names(), self.expected_names())
+
+    @override_settings(PDF_COMPRESS=True)
+    def test_bundle_uses_compress_default(self):
+        """Test that bundled PDFs follow the PDF_COMPRESS setting"""
+        write_template(self.template_path, contents='BT /F1 12 Tf 72 720 Td (Application Form) Tj ET\n' * 50)
+        generate_pdf_bundle(self.application_ids, self.zip_path)
+
+        with zipfile.ZipFile(self.zip_path) as bundle:
+            for name in bundle.namelist():
+                self.assertIn(b'/FlateDecode', bundle.read(name))
+
+    def test_bulk_task_deletes_expired_bundles(self):
+        """Test that the bulk task deletes bundles past their retention period"""
+        os.makedirs(get_pdf_bundle_dir())
+        expired_path = os.path.join(get_pdf_bundle_dir(), 'expired.zip')
+        recent_path = os.path.join(get_pdf_bundle_dir(), 'recent.zip')
+        for path in [expired_path, recent_path]:
+            with open(path, 'wb'):
+                pass
+        os.utime(expired_path, (0, 0))
+
+        with patch.object(generate_application_pdfs_bulk, 'update_state'):
+            result = generate_application_pdfs_bulk.run(application_ids=self.application_ids)
+
+        self.assertFalse(os.path.exists(expired_path))
+        self.assertTrue(os.path.exists(recent_path))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, result['zip_path'][len('media/'):])))
+
+    def test_bulk_task_reports_progress(self):
+        """Test that the bulk task reports progress and returns the ZIP path"""
+        with patch.object(generate_application_pdfs_bulk, 'update_state') as update_state:
+            result = generate_application_pdfs_bulk.run(application_ids=self.application_ids)
+
+        self.assertEqual(result['count'], 3)
+        self.assertTrue(result['zip_path'].startswith('media/application_forms/bulk/'))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, result['zip_path'][len('media/'):])))
+        progress = [call.kwargs['meta']['progress'] for call in update_state.call_args_list]
+        self.assertEqual(progress, [0, 33, 66, 100])
+
+    def test_single_task_returns_pdf_path(self):
+        """Test that the single application task fills the form"""
+        with patch.object(generate_application_pdf_async, 'update_state'):
+            result = generate_application_pdf_async.run(application_id=self.application_ids[0])
+
+        self.assertEqual(result['application_id'], self.application_ids[0])
+        self.assertTrue(result['pdf_path'].startswith('media/application_forms/cache/'))
+        self.assertIsInstance(result['missing_fields'], list)
+
+    def test_views_queue_tasks(self):
+        """Test that the async and bulk endpoints queue tasks"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        task = Mock(id='task-id', status='PENDING')
+
+        with patch.object(generate_application_pdf_async, 'delay', return_value=task) as delay:
+            url = reverse('application-generate-pdf', kwargs={'application_id': self.application_ids[0]})
+            response = client.post(f"{url}?async=true")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['task_id'], 'task-id')
+        delay.assert_called_once_with(application_id=self.application_ids[0])
+        self.assertEqual(get_task_owner('task-id'), self.user.id)
+
+        with patch.object(generate_application_pdfs_bulk, 'delay', return_value=task) as delay:
+            url = reverse('application-generate-pdf-bulk')
+            response = client.post(url, {'application_ids': self.application_ids}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertTrue(response.data['status_url'].endswith(reverse('task-status', kwargs={'task_id': 'task-id'})))
+            delay.assert_called_once_with(application_ids=self.application_ids)
+
+            response = client.post(url, {'application_ids': [999999]}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            response = client.post(url, {'application_ids': []}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(delay.call_count, 1)
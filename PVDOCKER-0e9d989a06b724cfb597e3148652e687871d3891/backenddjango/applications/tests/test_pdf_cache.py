@@ -0,0 +1,159 @@
+"""
+Tests for the generated PDF cache
+
+These tests fill a small pdfrw-built form and check that identical input is
+served from the cache, that writes are atomic and that the cache is kept
+within its size budget.
+"""
+
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from applications.models import Application
+from applications.tests.test_pdf_fill_plan import field_values, write_template
+from applications.utils.pdf_cache import evict_pdf_cache, get_cached_pdf, pdf_cache_key, store_pdf
+from applications.utils.pdf_filler import FillPlan, clear_fill_plan_cache, get_filled_pdf, open_filled_pdf
+from users.models import User
+
+
+def write_bytes(path, content=b'x' * 100):
+    with open(path, 'wb') as output:
+        output.write(content)
+
+
+class PDFCacheTestCase(TestCase):
+    """Test case for the generated PDF cache"""
+
+    def setUp(self):
+        clear_fill_plan_cache()
+        self.addCleanup(clear_fill_plan_cache)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.media_settings = override_settings(MEDIA_ROOT=self.directory)
+        self.media_settings.enable()
+        self.addCleanup(self.media_settings.disable)
+
+        self.template_path = os.path.join(self.directory, 'template.pdf')
+        write_template(self.template_path, contents='BT /F1 12 Tf 72 720 Td (Application Form) Tj ET\n' * 50)
+        template_patcher = patch('applications.utils.pdf_filler.get_pdf_template_path', return_value=self.template_path)
+        template_patcher.start()
+        self.addCleanup(template_patcher.stop)
+
+        self.user = User.objects.create_user(email='admin@example.com', password='testpassword', role='admin')
+        self.application = Application.objects.create(loan_amount=500000, loan_term=12, created_by=self.user)
+
+    def cached_files(self):
+        cache_dir = os.path.join(self.directory, 'application_forms', 'cache')
+        return sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []
+
+    def test_identical_input_served_from_cache(self):
+        """Test that the form is filled once for unchanged application data"""
+        with patch.object(FillPlan, 'fill', autospec=True, side_effect=FillPlan.fill) as fill:
+            first_path, first_missing = get_filled_pdf(self.application)
+            second_path, second_missing = get_filled_pdf(self.application)
+
+        self.assertEqual(fill.call_count, 1)
+        self.assertEqual(first_path, second_path)
+        self.assertEqual(first_missing, second_missing)
+        self.assertEqual(self.cached_files(), [os.path.basename(first_path)])
+
+    def test_changed_input_refilled(self):
+        """Test that changed application data gets a new cached PDF"""
+        first_path, _ = get_filled_pdf(self.application)
+        self.application.loan_amount = 600000
+        self.application.save()
+        second_path, _ = get_filled_pdf(Application.objects.get(id=self.application.id))
+
+        self.assertNotEqual(first_path, second_path)
+
+    def test_cache_key_includes_template_version(self):
+        """Test that the same mapping is cached separately per template version"""
+        mapping = {'text1': 'Value'}
+        self.assertEqual(pdf_cache_key(mapping, 'v1'), pdf_cache_key(dict(mapping), 'v1'))
+        self.assertNotEqual(pdf_cache_key(mapping, 'v1'), pdf_cache_key(mapping, 'v2'))
+
+    def test_failed_write_leaves_no_files(self):
+        """Test that a failed fill leaves neither a cached nor a temporary file"""
+        def write(path):
+            write_bytes(path, b'partial')
+            raise ValueError('fill failed')
+
+        with self.assertRaises(ValueError):
+            store_pdf('abc', write)
+
+        self.assertEqual(self.cached_files(), [])
+        self.assertIsNone(get_cached_pdf('abc'))
+
+    def test_evicts_least_recently_used(self):
+        """Test that eviction deletes the least recently used files first"""
+        for index, key in enumerate(['old', 'used', 'new']):
+            path = store_pdf(key, write_bytes)
+            os.utime(path, (1000 + index, 1000 + index))
+        # Reading a cached file marks it as recently used
+        get_cached_pdf('old')
+
+        self.assertEqual(evict_pdf_cache(max_bytes=200), 1)
+        self.assertEqual(self.cached_files(), ['new.pdf', 'old.pdf'])
+
+    def test_view_serves_cached_pdf(self):
+        """Test that the view returns the cached PDF and its path"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse('application-generate-pdf', kwargs={'application_id': self.application.id})
+
+        response = client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['pdf_path'].startswith('media/application_forms/cache/'))
+        self.assertIsInstance(response.data['missing_fields'], list)
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_view_streams_without_persisting(self):
+        """Test that GET fills the form in memory unless persist is requested"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse('application-generate-pdf', kwargs={'application_id': self.application.id})
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertEqual(self.cached_files(), [])
+
+        response = client.get(f"{url}?persist=true")
+        self.assertEqual(b''.join(response.streaming_content), content)
+        self.assertEqual(len(self.cached_files()), 1)
+
+        # Later requests are served from the cache
+        with patch.object(FillPlan, 'fill', autospec=True, side_effect=FillPlan.fill) as fill:
+            response = client.get(url)
+            self.assertEqual(b''.join(response.streaming_content), content)
+        self.assertEqual(fill.call_count, 0)
+
+    def test_compressed_output(self):
+        """Test that compression shrinks the PDF without changing its fields"""
+        pdf_file, _ = open_filled_pdf(self.application)
+        uncompressed = pdf_file.read()
+        pdf_file, _ = open_filled_pdf(self.application, compress=True)
+        compressed = pdf_file.read()
+
+        self.assertIn(b'/FlateDecode', compressed)
+        self.assertLess(len(compressed), len(uncompressed))
+        self.assertEqual(field_values(compressed.decode('latin-1')), field_values(uncompressed.decode('latin-1')))
+
+        # Compressing leaves the uncompressed plan untouched
+        pdf_file, _ = open_filled_pdf(self.application, compress=False)
+        self.assertEqual(pdf_file.read(), uncompressed)
+        self.assertEqual(self.cached_files(), [])
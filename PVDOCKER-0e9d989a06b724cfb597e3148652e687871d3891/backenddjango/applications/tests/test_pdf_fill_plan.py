@@ -0,0 +1,152 @@
+"""
+Tests for the PDF fill plan
+
+These tests build a small form with pdfrw and check that templates are
+parsed once per process and that filling leaves the cached template clean.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.test import TestCase
+from pdfrw import IndirectPdfDict, PdfArray, PdfDict, PdfName, PdfReader, PdfString, PdfWriter
+
+from applications.utils import pdf_filler
+from applications.utils.pdf_filler import clear_fill_plan_cache, fill_pdf_with_mapping, get_fill_plan
+
+
+def widget(rect, name=None, **kwargs):
+    annotation = IndirectPdfDict(
+        Type=PdfName.Annot,
+        Subtype=PdfName.Widget,
+        Rect=PdfArray(rect),
+        **kwargs
+    )
+    if name:
+        annotation.T = PdfString.encode(name)
+    return annotation
+
+
+def write_template(path, contents=None):
+    """Write a one-page form with text, checkbox and employment fields."""
+    employment_group = IndirectPdfDict(FT=PdfName.Btn, T=PdfString.encode('Employment'))
+    employment_box = widget([300, 400, 310, 410], 'Check Box124', Parent=employment_group)
+    employment_group.Kids = PdfArray([employment_box])
+
+    page = PdfDict(
+        Type=PdfName.Page,
+        MediaBox=PdfArray([0, 0, 612, 792]),
+        Annots=PdfArray([
+            widget([50, 700, 250, 720], 'Text1', FT=PdfName.Tx),
+            widget([50, 650, 60, 660], 'Check Box20', FT=PdfName.Btn, AS=PdfName.Off),
+            employment_box,
+            widget([100.4, 200.3, 110, 210], FT=PdfName.Btn),
+        ])
+    )
+    if contents:
+        page.Contents = IndirectPdfDict(stream=contents)
+    writer = PdfWriter()
+    writer.addpage(page)
+    writer.write(path)
+
+
+def field_values(pdf):
+    """Map each annotation, by name or position, to its (V, AS) values."""
+    values = {}
+    for annotation in PdfReader(fdata=pdf).pages[0].Annots:
+        key = annotation.T.decode() if annotation.T else tuple(float(r) for r in annotation.Rect[:2])
+        values[key] = (annotation.V, annotation.AS)
+    return values
+
+
+class FillPlanTestCase(TestCase):
+    """Test case for the cached PDF fill plan"""
+
+    def setUp(self):
+        clear_fill_plan_cache()
+        self.addCleanup(clear_fill_plan_cache)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.template_path = os.path.join(self.directory, 'template.pdf')
+        write_template(self.template_path)
+
+    def fill(self, field_mapping):
+        output_path = os.path.join(self.directory, 'filled.pdf')
+        missing_fields = fill_pdf_with_mapping(self.template_path, field_mapping, output_path)
+        with open(output_path, 'rb') as output:
+            return field_values(output.read().decode('latin-1')), missing_fields
+
+    def test_template_parsed_once(self):
+        """Test that repeated fills reuse the parsed template"""
+        with patch.object(pdf_filler, 'PdfReader', wraps=PdfReader) as reader:
+            self.fill({'text1': 'First'})
+            self.fill({'text1': 'Second'})
+
+        self.assertEqual(reader.call_count, 1)
+
+    def test_changed_template_reparsed(self):
+        """Test that a template changed on disk is parsed again"""
+        plan = get_fill_plan(self.template_path)
+        stat = os.stat(self.template_path)
+        os.utime(self.template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertIsNot(get_fill_plan(self.template_path), plan)
+
+    def test_fill_values(self):
+        """Test that text fields and checkboxes are filled from the mapping"""
+        values, missing_fields = self.fill({'text1': 'Jane Borrower', 'checkbox20': True})
+
+        self.assertEqual(values['Text1'][0].decode(), 'Jane Borrower')
+        self.assertEqual(values['Check Box20'], (PdfName.Yes, PdfName.Yes))
+        self.assertEqual(missing_fields, ['checkbox124'])
+
+    def test_fill_leaves_template_clean(self):
+        """Test that values from one fill do not leak into the next"""
+        self.fill({'text1': 'Jane Borrower', 'checkbox20': True, 'checkbox124': True})
+        values, _ = self.fill({})
+
+        self.assertEqual(values['Text1'], (None, None))
+        self.assertEqual(values['Check Box20'], (None, PdfName.Off))
+        self.assertEqual(values['Check Box124'], (None, None))
+
+    def test_employment_checkbox_by_parent(self):
+        """Test that employment checkboxes are mapped by parent object number"""
+        plan = get_fill_plan(self.template_path)
+        parent_key = next(keys[0] for _, _, _, keys in plan.fields if keys[-1] == 'checkbox124')
+        self.assertTrue(parent_key.startswith('parent'))
+
+        values, _ = self.fill({parent_key: True, 'checkbox124': False})
+
+        self.assertEqual(values['Check Box124'], (PdfName.Yes, PdfName.Yes))
+
+    def test_employment_checkbox_by_coordinates(self):
+        """Test that employment checkboxes in the mapping are found by position"""
+        values, _ = self.fill({
+            'employment_checkboxes': [
+                {'type': 'full_time', 'rect': [100, 200, 110, 210], 'value': True},
+                {'type': 'casual', 'rect': [500, 500, 510, 510], 'value': True},
+            ]
+        })
+
+        self.assertEqual(values[(100.4, 200.3)], (PdfName.Yes, PdfName.Yes))
+
+    def test_fill_to_file_object(self):
+        """Test that a plan can write to an in-memory buffer"""
+        output = io.BytesIO()
+        get_fill_plan(self.template_path).fill({'text1': 'Buffered'}, output)
+
+        values = field_values(output.getvalue().decode('latin-1'))
+        self.assertEqual(values['Text1'][0].decode(), 'Buffered')
+
+    def test_diagnostics_only_in_debug(self):
+        """Test that template diagnostics are skipped unless debugging"""
+        with patch.object(pdf_filler, 'log_fill_diagnostics') as diagnostics:
+            self.fill({})
+            diagnostics.assert_not_called()
+
+            with self.settings(PDF_FILLER_DEBUG=True):
+                self.fill({})
+            diagnostics.assert_called_once()
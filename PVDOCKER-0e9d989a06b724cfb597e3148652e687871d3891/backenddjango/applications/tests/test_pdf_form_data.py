@@ -0,0 +1,101 @@
+"""
+Tests for the PDF form data loader
+
+The loader must give the field mapping the same input as the application
+detail serializer while using a fixed number of queries.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from applications.models import Application, LoanRequirement, SecurityProperty
+from applications.serializers.application import ApplicationDetailSerializer
+from applications.utils.pdf_data import PDF_FORM_PREFETCHES, load_pdf_form_data
+from applications.utils.pdf_field_mapping import generate_pdf_field_mapping_from_json
+from borrowers.models import Asset, Borrower, Director, Guarantor, Liability
+
+
+class PDFFormDataTestCase(TestCase):
+    """Test case for the PDF form data loader"""
+
+    def setUp(self):
+        self.application = Application.objects.create(
+            loan_amount=Decimal('750000.00'),
+            loan_term=24,
+            interest_rate=Decimal('9.50'),
+            estimated_settlement_date=date(2024, 6, 15),
+            loan_purpose='purchase',
+            additional_comments='Test application',
+            exit_strategy='refinance',
+            has_pending_litigation=True,
+        )
+
+        company = Borrower.objects.create(
+            is_company=True,
+            company_name='Test Holdings Pty Ltd',
+            company_abn='12345678901',
+            annual_company_income=Decimal('500000.00'),
+            is_trustee=True,
+            registered_address_suburb='Sydney',
+        )
+        Director.objects.create(borrower=company, name='Jane Director', roles='director,secretary', director_id='123456789012')
+        Director.objects.create(borrower=company, name='John Officer', roles='public_officer', director_id='987')
+        Asset.objects.create(borrower=company, asset_type='Property', address='1 Company St', value=Decimal('900000.00'),
+                             amount_owing=Decimal('300000.00'), to_be_refinanced=True)
+        Asset.objects.create(borrower=company, asset_type='Vehicle', value=Decimal('45000.00'))
+        Liability.objects.create(borrower=company, liability_type='credit_card', amount=Decimal('5000.00'),
+                                 to_be_refinanced=True)
+
+        individuals = [
+            Borrower.objects.create(
+                first_name='Alice', last_name='Borrower', title='ms', date_of_birth=date(1980, 1, 2),
+                email='alice@example.com', occupation='Engineer', employment_type='full_time',
+                annual_income=Decimal('120000.00'), address_suburb='Parramatta',
+            ),
+            Borrower.objects.create(first_name='Bob', last_name='Borrower', employment_type='contract'),
+        ]
+        # Individual borrower assets are not part of the detail serializer output
+        Asset.objects.create(borrower=individuals[0], asset_type='Savings', value=Decimal('20000.00'))
+
+        guarantor = Guarantor.objects.create(
+            guarantor_type='individual', first_name='Grace', last_name='Guarantor',
+            date_of_birth=date(1975, 5, 6), employment_type='casual', annual_income=Decimal('90000.00'),
+        )
+        Asset.objects.create(guarantor=guarantor, asset_type='Property', address='2 Guarantor Rd',
+                             value=Decimal('650000.00'), amount_owing=Decimal('100000.00'), bg_type='BG2')
+        Asset.objects.create(guarantor=guarantor, asset_type='Savings', value=Decimal('15000.50'))
+        Liability.objects.create(guarantor=guarantor, liability_type='other_creditor', amount=Decimal('2500.00'),
+                                 bg_type='bg2')
+
+        self.application.borrowers.add(company, *individuals)
+        self.application.guarantors.add(guarantor)
+
+        SecurityProperty.objects.create(
+            application=self.application, address_street_no='10', address_street_name='Main St',
+            property_type='other', description_if_applicable='Mixed use', estimated_value=Decimal('1200000.00'),
+            bedrooms=3, building_size=Decimal('210.50'), is_single_story=True, occupancy='investment',
+        )
+        LoanRequirement.objects.create(application=self.application, description='Purchase', amount=Decimal('700000.00'))
+        LoanRequirement.objects.create(application=self.application, description='Costs', amount=Decimal('50000.00'))
+
+    def test_mapping_matches_detail_serializer(self):
+        """Test that the loader produces the same field mapping as the detail serializer"""
+        request = APIRequestFactory().get('/')
+        serialized = ApplicationDetailSerializer(
+            Application.objects.get(id=self.application.id), context={'request': request}
+        ).data
+        loaded = load_pdf_form_data(Application.objects.get(id=self.application.id))
+
+        expected = generate_pdf_field_mapping_from_json(serialized)
+        self.assertGreater(len(expected), 100)
+        self.assertEqual(generate_pdf_field_mapping_from_json(loaded), expected)
+
+    def test_query_budget(self):
+        """Test that the loader uses one query per prefetched relation"""
+        application = Application.objects.get(id=self.application.id)
+
+        with self.assertNumQueries(len(PDF_FORM_PREFETCHES)):
+            load_pdf_form_data(application)
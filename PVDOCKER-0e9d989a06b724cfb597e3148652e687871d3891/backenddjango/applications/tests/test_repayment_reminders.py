@@ -0,0 +1,110 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from applications.models import Application
+from applications.tasks import check_repayment_reminders
+from borrowers.models import Borrower
+from brokers.models import BDM
+from documents.models import Repayment
+from users.models import User
+
+
+@patch('crm_backend.tasks.group')
+class RepaymentReminderTestCase(TestCase):
+    """Test case for set-based repayment reminders"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.today = timezone.now().date()
+        self.bd_user = User.objects.create_user(email='bd@example.com', password='testpassword', role='bd')
+        self.bdm = BDM.objects.create(user=self.bd_user, name='Test BDM')
+        self.borrower_user = User.objects.create_user(email='borrower@example.com', password='testpassword', role='client')
+        self.borrower = Borrower.objects.create(first_name='John', last_name='Doe', user=self.borrower_user)
+        self.application = Application.objects.create(stage='settled', bd=self.bdm)
+        self.application.borrowers.add(self.borrower)
+
+    def create_repayment(self, days_from_today, **kwargs):
+        return Repayment.objects.create(
+            application=self.application,
+            amount=Decimal('1000.00'),
+            due_date=self.today + timedelta(days=days_from_today),
+            **kwargs
+        )
+
+    def sent_emails(self, mock_group):
+        if not mock_group.called:
+            return []
+        return [
+            message
+            for signature in mock_group.call_args[0][0]
+            for message in signature.args[0]
+        ]
+
+    def test_each_stage_is_flagged(self, mock_group):
+        """Test every stage, including 10 days overdue, is sent and flagged"""
+        upcoming = self.create_repayment(7)
+        overdue_3 = self.create_repayment(-3)
+        overdue_7 = self.create_repayment(-7)
+        overdue_10 = self.create_repayment(-10)
+        self.create_repayment(-7, paid_date=self.today)
+        self.create_repayment(-3, overdue_3_day_sent=True)
+
+        result = check_repayment_reminders()
+
+        self.assertEqual(result, {
+            'reminder_sent': 1, 'overdue_3_day_sent': 1, 'overdue_7_day_sent': 1, 'overdue_10_day_sent': 1
+        })
+        self.assertTrue(Repayment.objects.get(id=upcoming.id).reminder_sent)
+        self.assertTrue(Repayment.objects.get(id=overdue_3.id).overdue_3_day_sent)
+        self.assertTrue(Repayment.objects.get(id=overdue_7.id).overdue_7_day_sent)
+        self.assertTrue(Repayment.objects.get(id=overdue_10.id).overdue_10_day_sent)
+
+    def test_messages_are_grouped_per_recipient(self, mock_group):
+        """Test each recipient gets one email covering all their notices"""
+        self.create_repayment(7)
+        self.create_repayment(-3)
+        self.create_repayment(-10)
+
+        check_repayment_reminders()
+
+        emails = {email['recipient_list'][0]: email for email in self.sent_emails(mock_group)}
+        self.assertEqual(set(emails), {'borrower@example.com', 'bd@example.com'})
+        self.assertEqual(emails['borrower@example.com']['subject'], 'You have 3 repayment notices')
+        self.assertIn('FINAL NOTICE', emails['borrower@example.com']['message'])
+        self.assertIn('Days Overdue: 10', emails['bd@example.com']['message'])
+        mock_group.return_value.apply_async.assert_called_once()
+
+    def test_second_run_sends_nothing(self, mock_group):
+        """Test flags stop repeat sends"""
+        self.create_repayment(-3)
+        check_repayment_reminders()
+        mock_group.reset_mock()
+
+        self.assertEqual(check_repayment_reminders(), {})
+        mock_group.assert_not_called()
+
+    def test_query_count_does_not_grow_with_repayments(self, mock_group):
+        """Test related objects are prefetched and flags updated per stage"""
+        for days in (7, -3, -7, -10):
+            self.create_repayment(days)
+        with CaptureQueriesContext(connection) as small:
+            check_repayment_reminders()
+
+        Repayment.objects.all().delete()
+        for days in (7, -3, -7, -10) * 3:
+            application = Application.objects.create(stage='settled', bd=self.bdm)
+            application.borrowers.add(Borrower.objects.create(first_name='Jane', user=User.objects.create_user(
+                email=f'borrower{application.id}@example.com', password='testpassword', role='client'
+            )))
+            Repayment.objects.create(application=application, amount=Decimal('1000.00'),
+                                     due_date=self.today + timedelta(days=days))
+        with CaptureQueriesContext(connection) as large:
+            check_repayment_reminders()
+
+        self.assertEqual(len(small), len(large))
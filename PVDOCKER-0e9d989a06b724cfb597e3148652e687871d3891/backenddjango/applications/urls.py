@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views.application_views import ApplicationViewSet
 from .views.valuer_qs_views import ValuerViewSet, QuantitySurveyorViewSet
-from .views.pdf_generation import GenerateFilledFormView
+from .views.pdf_generation import GenerateFilledFormView, BulkGenerateFilledFormView
 from .views.funding_calculator_views import ManualFundingCalculationView
 from .views.active_loan_views import ActiveLoanViewSet, ActiveLoanRepaymentViewSet, get_active_loan_by_application
 
@@ -54,8 +54,12 @@ urlpatterns = [
     # Funding calculation history
     path('<int:pk>/funding-calculation-history/', ApplicationViewSet.as_view({'get': 'funding_calculation_history'}), name='application-funding-calculation-history'),
     
+    # Repayment schedule preview and generation
+    path('<int:pk>/repayment-schedule/', ApplicationViewSet.as_view({'get': 'repayment_schedule', 'post': 'repayment_schedule'}), name='application-repayment-schedule'),
+    
     # Generate filled PDF form
     path('<int:application_id>/generate-pdf/', GenerateFilledFormView.as_view(), name='application-generate-pdf'),
+    path('generate-pdf/bulk/', BulkGenerateFilledFormView.as_view(), name='application-generate-pdf-bulk'),
     
     # Manual funding calculator
     path('manual-funding-calculator/', ManualFundingCalculationView.as_view(), name='manual-funding-calculator'),
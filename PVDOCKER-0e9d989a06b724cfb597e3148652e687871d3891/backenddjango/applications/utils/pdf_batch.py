@@ -0,0 +1,281 @@
+"""
+Bulk PDF Generation
+
+This module fills the application form for many applications at once and
+bundles the results into a ZIP file. Field mappings are built in the
+calling process, which owns the database connection, and forms that are
+not already in the generated PDF cache can be rendered in a process pool.
+Pool workers parse the template once when they start and are kept for
+later jobs, so their template caches stay warm. Each PDF is added to the
+ZIP as soon as it is ready.
+
+The pool size can be set with the PDF_RENDER_PROCESSES setting. The
+default of 0 renders in the calling process, because the children of the
+default Celery prefork pool are daemonic and cannot start processes of
+their own. Set it only for workers started with -P threads or -P solo;
+forms are still rendered in the calling process when it is daemonic.
+
+Finished ZIP files are kept in the bulk directory for PDF_BUNDLE_MAX_AGE
+seconds, matching how long Celery keeps the task result that points to
+them. Older files are deleted each time a new bundle is written.
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+
+from .pdf_cache import get_cached_pdf, store_pdf
+from .pdf_filler import get_application_field_mapping, get_compress_default, get_fill_plan, get_pdf_template_path
+
+logger = logging.getLogger(__name__)
+
+PDF_RENDER_PROCESSES = 0
+
+PDF_BUNDLE_MAX_AGE = 60 * 60 * 24
+
+_render_pool = None
+_render_pool_key = None
+_render_pool_lock = threading.Lock()
+
+
+def warm_render_worker(template_path: str, compress: bool = False) -> None:
+    """Parse the template when a pool worker starts."""
+    get_fill_plan(template_path, compress=compress)
+
+
+def render_pdf(template_path: str, field_mapping: Dict[str, Any], compress: bool = False) -> Tuple[bytes, List[str]]:
+    """
+    Fill the template in memory.
+
+    Returns:
+        Tuple of the PDF content and the list of missing fields
+    """
+    output = io.BytesIO()
+    missing_fields = get_fill_plan(template_path, compress=compress).fill(field_mapping, output)
+    return output.getvalue(), missing_fields
+
+
+def can_start_processes() -> bool:
+    """
+    Return whether this process may start child processes.
+
+    Daemonic processes, such as the children of Celery's prefork pool, may
+    not.
+    """
+    if multiprocessing.current_process().daemon:
+        return False
+    try:
+        import billiard
+    except ImportError:
+        return True
+    return not billiard.current_process().daemon
+
+
+def get_render_pool(template_path: str, processes: int, compress: bool = False) -> ProcessPoolExecutor:
+    """
+    Return this process's render pool, starting it if needed.
+
+    The pool is reused between jobs and replaced when the template, pool
+    size or compression changes.
+    """
+    global _render_pool, _render_pool_key
+
+    with _render_pool_lock:
+        key = (template_path, processes, compress)
+        if _render_pool is None or _render_pool_key != key:
+            if _render_pool is not None:
+                _render_pool.shutdown(wait=False)
+            _render_pool = ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=warm_render_worker,
+                initargs=(template_path, compress)
+            )
+            _render_pool_key = key
+        return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    """Stop this process's render pool."""
+    global _render_pool, _render_pool_key
+
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown()
+        _render_pool = None
+        _render_pool_key = None
+
+
+def get_pdf_bundle_dir() -> str:
+    return os.path.join(settings.MEDIA_ROOT, 'application_forms', 'bulk')
+
+
+def evict_pdf_bundles(max_age: int = None) -> int:
+    """
+    Delete ZIP bundles older than the retention period.
+
+    Args:
+        max_age: Age in seconds (optional, defaults to the PDF_BUNDLE_MAX_AGE
+            setting)
+
+    Returns:
+        Number of files deleted
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'PDF_BUNDLE_MAX_AGE', PDF_BUNDLE_MAX_AGE)
+
+    cutoff = time.time() - max_age
+    deleted = 0
+    try:
+        with os.scandir(get_pdf_bundle_dir()) as scan:
+            for entry in scan:
+                if not entry.name.endswith(('.zip', '.tmp')):
+                    continue
+                try:
+                    if entry.stat().st_mtime >= cutoff:
+                        continue
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+                deleted += 1
+    except FileNotFoundError:
+        return 0
+
+    if deleted:
+        logger.info(f"Deleted {deleted} expired PDF bundles")
+    return deleted
+
+
+def write_file(path: str, content: bytes) -> None:
+    with open(path, 'wb') as output:
+        output.write(content)
+
+
+def bundle_filename(application) -> str:
+    return f"{application.reference_number or application.id}.pdf"
+
+
+def generate_pdf_bundle(
+    application_ids: Iterable[int],
+    zip_path: str,
+    progress: Callable[[int, int], Any] = None,
+    compress: bool = None,
+) -> Dict[str, Any]:
+    """
+    Fill the application form for several applications into one ZIP file.
+
+    The ZIP is written to a temporary file and renamed into place once
+    complete. Applications that cannot be filled are reported rather than
+    failing the whole bundle.
+
+    Args:
+        application_ids: IDs of the applications to include
+        zip_path: Path to write the ZIP file to
+        progress: Function called with (done, total) after each application
+            (optional)
+        compress: Compress the PDFs' content streams (optional, defaults to
+            the PDF_COMPRESS setting)
+
+    Returns:
+        Dictionary with the number of PDFs added, the missing fields per
+        application ID and the error per application ID that failed
+    """
+    from ..models import Application
+
+    application_ids = list(dict.fromkeys(application_ids))
+    applications = Application.objects.in_bulk(application_ids)
+    if compress is None:
+        compress = get_compress_default()
+    template_path = get_pdf_template_path()
+    plan = get_fill_plan(template_path, compress=compress)
+    processes = getattr(settings, 'PDF_RENDER_PROCESSES', PDF_RENDER_PROCESSES)
+    if processes > 0 and not can_start_processes():
+        logger.warning("PDF_RENDER_PROCESSES is ignored in a daemonic process; rendering in the calling process")
+        processes = 0
+    pool = get_render_pool(template_path, processes, compress) if processes > 0 else None
+
+    result = {'count': 0, 'missing_fields': {}, 'errors': {}}
+    total = len(application_ids)
+    done = 0
+
+    def finish():
+        nonlocal done
+        done += 1
+        if progress:
+            progress(done, total)
+
+    def add_rendered(bundle, application, key, render):
+        try:
+            content, _ = render()
+        except Exception as e:
+            logger.error(f"Error rendering PDF for application {application.id}: {str(e)}")
+            result['errors'][str(application.id)] = str(e)
+            result['missing_fields'].pop(str(application.id), None)
+        else:
+            bundle.writestr(bundle_filename(application), content)
+            store_pdf(key, lambda path: write_file(path, content))
+            result['count'] += 1
+        finish()
+
+    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(zip_path), suffix='.tmp')
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+            pending = {}
+            for application_id in application_ids:
+                application = applications.get(application_id)
+                if application is None:
+                    result['errors'][str(application_id)] = 'Application not found'
+                    finish()
+                    continue
+
+                try:
+                    field_mapping = get_application_field_mapping(application)
+                except Exception as e:
+                    logger.error(f"Error mapping application {application_id} for PDF bundle: {str(e)}")
+                    result['errors'][str(application_id)] = str(e)
+                    finish()
+                    continue
+
+                key = plan.cache_key(field_mapping)
+                result['missing_fields'][str(application_id)] = plan.missing_fields(field_mapping)
+
+                cached_path = get_cached_pdf(key)
+                if cached_path is not None:
+                    try:
+                        bundle.write(cached_path, bundle_filename(application))
+                    except FileNotFoundError:
+                        # Evicted by another process since the lookup, so render it
+                        logger.info(f"Cached PDF for application {application_id} was evicted, rendering it")
+                    else:
+                        result['count'] += 1
+                        finish()
+                        continue
+
+                if pool is not None:
+                    pending[pool.submit(render_pdf, template_path, field_mapping, compress)] = (application, key)
+                else:
+                    add_rendered(bundle, application, key, lambda: render_pdf(template_path, field_mapping, compress))
+
+            # Add pool results in the order they finish
+            for future in as_completed(pending):
+                application, key = pending[future]
+                add_rendered(bundle, application, key, future.result)
+
+        os.replace(temp_path, zip_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    logger.info(f"PDF bundle {zip_path}: {result['count']} PDFs, {len(result['errors'])} errors")
+    return result
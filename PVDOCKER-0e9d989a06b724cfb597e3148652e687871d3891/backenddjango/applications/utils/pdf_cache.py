@@ -0,0 +1,135 @@
+"""
+Generated PDF Cache
+
+This module keeps filled application PDFs on disk keyed by a hash of
+their input: the field mapping and the template version. Requests with the
+same input are served the cached file instead of filling the form again.
+Files are written to a unique temporary file and renamed into place, so
+concurrent requests never see a partly written PDF, and the least recently
+used files are evicted once the cache is over its size budget.
+
+The cache directory and size budget can be set with the PDF_CACHE_DIR and
+PDF_CACHE_MAX_BYTES settings.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+_eviction_lock = threading.Lock()
+
+
+def get_pdf_cache_dir() -> str:
+    return getattr(settings, 'PDF_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'application_forms', 'cache'))
+
+
+def pdf_cache_key(field_mapping: Dict[str, Any], template_version: str) -> str:
+    """
+    Hash a field mapping and template version into a cache key.
+    """
+    payload = json.dumps(
+        {'template': template_version, 'fields': field_mapping},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached_pdf(key: str):
+    """
+    Return the path of a cached PDF, or None if it is not cached.
+
+    A hit refreshes the file's modification time, which eviction uses as
+    its last-used time.
+    """
+    path = os.path.join(get_pdf_cache_dir(), f"{key}.pdf")
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def store_pdf(key: str, write: Callable[[str], Any]) -> str:
+    """
+    Write a PDF into the cache atomically.
+
+    Args:
+        key: Cache key from pdf_cache_key
+        write: Function writing the PDF to the path it is given
+
+    Returns:
+        Path of the cached PDF
+    """
+    cache_dir = get_pdf_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.pdf")
+
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix=f"{key}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    evict_pdf_cache()
+    return path
+
+
+def evict_pdf_cache(max_bytes: int = None) -> int:
+    """
+    Delete the least recently used PDFs until the cache fits its budget.
+
+    Args:
+        max_bytes: Size budget (optional, defaults to the PDF_CACHE_MAX_BYTES
+            setting)
+
+    Returns:
+        Number of files deleted
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'PDF_CACHE_MAX_BYTES', PDF_CACHE_MAX_BYTES)
+
+    with _eviction_lock:
+        entries = []
+        try:
+            with os.scandir(get_pdf_cache_dir()) as scan:
+                for entry in scan:
+                    if not entry.name.endswith('.pdf'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return 0
+
+        total = sum(size for _, size, _ in entries)
+        deleted = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+
+    if deleted:
+        logger.info(f"Evicted {deleted} cached PDFs")
+    return deleted
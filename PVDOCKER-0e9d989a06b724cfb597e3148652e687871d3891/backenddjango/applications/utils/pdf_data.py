@@ -0,0 +1,153 @@
+"""
+PDF Form Data Loader
+
+This module loads the application data used by the PDF field mapping. It
+reads only the fields generate_pdf_field_mapping_from_json uses, with a
+fixed set of prefetches, and returns them in the same shape as the
+ApplicationDetailSerializer response so the mapping is unchanged.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable
+
+from django.db.models import Prefetch, prefetch_related_objects
+
+from borrowers.models import Asset, Borrower, Director, Guarantor, Liability
+from ..models import LoanRequirement, SecurityProperty
+
+APPLICATION_FIELDS = (
+    'loan_amount', 'loan_term', 'estimated_settlement_date', 'interest_rate',
+    'loan_purpose', 'additional_comments', 'has_other_credit_providers',
+    'other_credit_providers_details', 'exit_strategy', 'exit_strategy_details',
+    'has_pending_litigation', 'has_unsatisfied_judgements', 'has_been_bankrupt',
+    'has_been_refused_credit', 'has_outstanding_ato_debt', 'has_outstanding_tax_returns',
+    'has_payment_arrangements',
+)
+
+INDIVIDUAL_FIELDS = (
+    'title', 'first_name', 'last_name', 'date_of_birth', 'drivers_licence_no',
+    'home_phone', 'mobile', 'email', 'address_unit', 'address_street_no',
+    'address_street_name', 'address_suburb', 'address_state', 'address_postcode',
+    'occupation', 'employer_name', 'employment_type', 'annual_income',
+)
+
+COMPANY_FIELDS = (
+    'company_name', 'company_abn', 'company_acn', 'industry_type', 'contact_number',
+    'annual_company_income', 'is_trustee', 'is_smsf_trustee', 'trustee_name',
+    'registered_address_unit', 'registered_address_street_no', 'registered_address_street_name',
+    'registered_address_suburb', 'registered_address_state', 'registered_address_postcode',
+)
+
+BORROWER_FIELDS = ('is_company',) + INDIVIDUAL_FIELDS + COMPANY_FIELDS
+
+GUARANTOR_FIELDS = ('guarantor_type',) + INDIVIDUAL_FIELDS
+
+DIRECTOR_FIELDS = ('name', 'roles', 'director_id')
+
+# Company assets and liabilities are rendered without bg_type, guarantor
+# ones without to_be_refinanced
+ASSET_FIELDS = ('asset_type', 'address', 'value', 'amount_owing')
+COMPANY_ASSET_FIELDS = ASSET_FIELDS + ('to_be_refinanced',)
+GUARANTOR_ASSET_FIELDS = ASSET_FIELDS + ('bg_type',)
+
+LIABILITY_FIELDS = ('liability_type', 'amount')
+COMPANY_LIABILITY_FIELDS = LIABILITY_FIELDS + ('to_be_refinanced',)
+GUARANTOR_LIABILITY_FIELDS = LIABILITY_FIELDS + ('bg_type',)
+
+SECURITY_PROPERTY_FIELDS = (
+    'address_unit', 'address_street_no', 'address_street_name', 'address_suburb',
+    'address_state', 'address_postcode', 'first_mortgage', 'second_mortgage',
+    'first_mortgage_debt', 'second_mortgage_debt', 'estimated_value', 'purchase_price',
+    'property_type', 'description_if_applicable', 'bedrooms', 'bathrooms', 'car_spaces',
+    'building_size', 'land_size', 'is_single_story', 'has_garage', 'has_carport',
+    'has_off_street_parking', 'occupancy',
+)
+
+LOAN_REQUIREMENT_FIELDS = ('description', 'amount')
+
+PDF_FORM_PREFETCHES = (
+    Prefetch('borrowers', queryset=Borrower.objects.only('id', *BORROWER_FIELDS)),
+    Prefetch('borrowers__directors', queryset=Director.objects.only('id', 'borrower_id', *DIRECTOR_FIELDS)),
+    Prefetch('borrowers__assets', queryset=Asset.objects.only('id', 'borrower_id', *COMPANY_ASSET_FIELDS)),
+    Prefetch('borrowers__liabilities', queryset=Liability.objects.only('id', 'borrower_id', *COMPANY_LIABILITY_FIELDS)),
+    Prefetch('guarantors', queryset=Guarantor.objects.only('id', *GUARANTOR_FIELDS)),
+    Prefetch('guarantors__assets', queryset=Asset.objects.only('id', 'guarantor_id', *GUARANTOR_ASSET_FIELDS)),
+    Prefetch('guarantors__liabilities', queryset=Liability.objects.only('id', 'guarantor_id', *GUARANTOR_LIABILITY_FIELDS)),
+    Prefetch('security_properties', queryset=SecurityProperty.objects.only('id', 'application_id', *SECURITY_PROPERTY_FIELDS)),
+    Prefetch('loan_requirements', queryset=LoanRequirement.objects.only('id', 'application_id', *LOAN_REQUIREMENT_FIELDS)),
+)
+
+
+def to_representation(instance, field_names: Iterable[str]) -> Dict[str, Any]:
+    """
+    Read model fields as the REST framework renders them.
+
+    Decimals become strings with the field's decimal places and dates
+    become ISO 8601 strings.
+    """
+    data = {}
+    for name in field_names:
+        value = getattr(instance, name)
+        if isinstance(value, Decimal):
+            places = instance._meta.get_field(name).decimal_places
+            value = '{:f}'.format(value.quantize(Decimal(1).scaleb(-places)))
+        elif isinstance(value, date):
+            value = value.isoformat()
+        data[name] = value
+    return data
+
+
+def load_pdf_form_data(application) -> Dict[str, Any]:
+    """
+    Load the data the PDF field mapping reads for an application.
+
+    Related rows are fetched with one query per relation in
+    PDF_FORM_PREFETCHES, whatever the number of borrowers or guarantors.
+
+    Args:
+        application: The Application instance
+
+    Returns:
+        Dictionary in the ApplicationDetailSerializer shape, limited to the
+        fields generate_pdf_field_mapping_from_json uses
+    """
+    prefetch_related_objects([application], *PDF_FORM_PREFETCHES)
+
+    data = to_representation(application, APPLICATION_FIELDS)
+    borrowers = list(application.borrowers.all())
+
+    # Individual borrowers are rendered without their assets and liabilities,
+    # matching the detail serializer
+    data['borrowers'] = [
+        to_representation(borrower, BORROWER_FIELDS)
+        for borrower in borrowers if not borrower.is_company
+    ]
+
+    data['company_borrowers'] = [
+        dict(
+            to_representation(borrower, BORROWER_FIELDS),
+            directors=[to_representation(director, DIRECTOR_FIELDS) for director in borrower.directors.all()],
+            assets=[to_representation(asset, COMPANY_ASSET_FIELDS) for asset in borrower.assets.all()],
+            liabilities=[to_representation(liability, COMPANY_LIABILITY_FIELDS) for liability in borrower.liabilities.all()],
+        )
+        for borrower in borrowers if borrower.is_company
+    ]
+
+    data['guarantors'] = [
+        dict(
+            to_representation(guarantor, GUARANTOR_FIELDS),
+            assets=[to_representation(asset, GUARANTOR_ASSET_FIELDS) for asset in guarantor.assets.all()],
+            liabilities=[to_representation(liability, GUARANTOR_LIABILITY_FIELDS) for liability in guarantor.liabilities.all()],
+        )
+        for guarantor in application.guarantors.all()
+    ]
+
+    data['security_properties'] = [
+        to_representation(prop, SECURITY_PROPERTY_FIELDS) for prop in application.security_properties.all()
+    ]
+    data['loan_requirements'] = [
+        to_representation(requirement, LOAN_REQUIREMENT_FIELDS) for requirement in application.loan_requirements.all()
+    ]
+
+    return data
@@ -4,16 +4,41 @@ PDF Form Filler Utility
 This module contains functions to fill PDF forms with application data.
 """
 
+import io
 import os
+import math
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Tuple
 from datetime import datetime, date
 from pdfrw import PdfReader, PdfWriter, PdfDict, PdfName
 from django.conf import settings
+from .pdf_cache import get_cached_pdf, pdf_cache_key, store_pdf
+from .pdf_data import load_pdf_form_data
 from .pdf_field_mapping import generate_pdf_field_mapping_from_json
 
 logger = logging.getLogger(__name__)
 
+# Default for compressing the content streams of generated PDFs
+PDF_COMPRESS = False
+
+
+def get_application_field_mapping(application) -> Dict[str, Any]:
+    """
+    Generate the PDF field mapping for an Application instance.
+    """
+    # Load only the application data the field mapping reads
+    cascade_data = load_pdf_form_data(application)
+    
+    # Generate the PDF field mapping using our tested utility
+    field_mapping = generate_pdf_field_mapping_from_json(cascade_data)
+    
+    # Log the mapping for debugging
+    logger.info(f"Generated PDF field mapping with {len(field_mapping)} fields")
+    logger.debug(f"Field mapping: {field_mapping}")
+    
+    return field_mapping
+
 
 def fill_pdf_form(application, output_path: str) -> List[str]:
     """
@@ -27,24 +52,7 @@ def fill_pdf_form(application, output_path: str) -> List[str]:
         List of missing fields that couldn't be filled
     """
     try:
-        # Get the cascade data for the application
-        from ..serializers.application import ApplicationDetailSerializer
-        from rest_framework.test import APIRequestFactory
-        
-        # Create a mock request for the serializer
-        factory = APIRequestFactory()
-        request = factory.get('/')
-        
-        # Serialize the application with cascade data
-        serializer = ApplicationDetailSerializer(application, context={'request': request})
-        cascade_data = serializer.data
-        
-        # Generate the PDF field mapping using our tested utility
-        field_mapping = generate_pdf_field_mapping_from_json(cascade_data)
-        
-        # Log the mapping for debugging
-        logger.info(f"Generated PDF field mapping with {len(field_mapping)} fields")
-        logger.debug(f"Field mapping: {field_mapping}")
+        field_mapping = get_application_field_mapping(application)
         
         # Get the template PDF path
         template_path = get_pdf_template_path()
@@ -60,236 +68,371 @@ def fill_pdf_form(application, output_path: str) -> List[str]:
         raise
 
 
-def fill_pdf_with_mapping(template_path: str, field_mapping: Dict[str, Any], output_path: str) -> List[str]:
+def get_compress_default() -> bool:
+    return getattr(settings, 'PDF_COMPRESS', PDF_COMPRESS)
+
+
+def get_filled_pdf(application, compress: bool = None) -> Tuple[str, List[str]]:
     """
-    Fill PDF form with field mapping data using pdfrw library.
+    Fill a PDF form with application data through the generated PDF cache.
+    
+    The form is only filled when no cached PDF exists for the same field
+    mapping and template version.
     
     Args:
-        template_path: Path to the PDF template
-        field_mapping: Dictionary mapping field IDs to values
-        output_path: Path where the filled PDF should be saved
+        application: The Application instance
+        compress: Compress the PDF's content streams (optional, defaults to
+            the PDF_COMPRESS setting)
     
     Returns:
-        List of missing fields that couldn't be filled
+        Tuple of the cached PDF path and the list of missing fields
     """
-    if not os.path.exists(template_path):
-        raise FileNotFoundError(f"Template PDF not found at: {template_path}")
+    if compress is None:
+        compress = get_compress_default()
     
     try:
-        # Read the template PDF
-        template_pdf = PdfReader(template_path)
+        field_mapping = get_application_field_mapping(application)
+        template_path = get_pdf_template_path()
+        plan = get_fill_plan(template_path, compress=compress)
         
-        # Create a new PDF writer
-        writer = PdfWriter()
+        key = plan.cache_key(field_mapping)
+        pdf_path = get_cached_pdf(key)
+        if pdf_path is None:
+            pdf_path = store_pdf(key, lambda temp_path: plan.fill(field_mapping, temp_path))
+            logger.info(f"PDF form filled and cached: {pdf_path}")
         
-        missing_fields = []
-        all_checkbox_fields = []  # Collect all checkbox field names
+        return pdf_path, plan.missing_fields(field_mapping)
         
-        # Process each page
-        for page_num, page in enumerate(template_pdf.pages):
-            # Get form annotations
-            if '/Annots' in page:
-                annotations = page['/Annots']
-                if annotations:
-                    logger.debug(f"Page {page_num + 1} has {len(annotations)} annotations")
-                    for annotation in annotations:
-                        if annotation and '/T' in annotation:
-                            field_name = str(annotation['/T']).strip('()/')
-                            
-                            # Log all field names to see the exact format
-                            if field_name.startswith('Check Box'):
-                                all_checkbox_fields.append(field_name)
-                                logger.debug(f"Found checkbox field: '{field_name}'")
-                            
-                            # Handle text fields (text1, text2, etc.)
-                            if field_name.startswith('Text') and field_name[4:].isdigit():
-                                field_id = f"text{field_name[4:]}"
-                                if field_id in field_mapping:
-                                    value = str(field_mapping[field_id])
-                                    annotation.update(PdfDict(V=value, AS=value))
-                                    logger.debug(f"Filling text field {field_name} with value: {value}")
-                                else:
-                                    logger.debug(f"Missing text field data for {field_id} -> {field_name}")
-                                    missing_fields.append(field_id)
-                            
-                            # Handle checkbox fields (Check Box20, Check Box21, etc.)
-                            elif field_name.startswith('Check Box') and field_name[9:].isdigit():
-                                checkbox_num = field_name[9:]
-                                field_id = f"checkbox{checkbox_num}"
-                                
-                                # Extra debugging for employment checkboxes (124-127)
-                                if checkbox_num in ['124', '125', '126', '127']:
-                                    logger.info(f"EMPLOYMENT CHECKBOX: Processing {field_name} -> {field_id}")
-                                    logger.info(f"EMPLOYMENT CHECKBOX: Raw field name from PDF: '{field_name}'")
-                                    logger.info(f"EMPLOYMENT CHECKBOX: Extracted number: '{checkbox_num}'")
-                                    logger.info(f"EMPLOYMENT CHECKBOX: Mapped field ID: '{field_id}'")
-                                    
-                                    # Check for parent ID in the annotation
-                                    parent_id = None
-                                    if '/Parent' in annotation:
-                                        parent_id = str(annotation['/Parent']).strip('()/').split(',')[0]
-                                        logger.info(f"EMPLOYMENT CHECKBOX: Parent ID: {parent_id}")
-                                        
-                                        # Try to map using parent ID
-                                        parent_field_id = f"parent{parent_id}"
-                                        if parent_field_id in field_mapping:
-                                            logger.info(f"EMPLOYMENT CHECKBOX: Found mapping by parent ID: {parent_field_id} = {field_mapping[parent_field_id]}")
-                                            if field_mapping[parent_field_id]:
-                                                annotation.update(PdfDict(AS=PdfName.Yes, V=PdfName.Yes))
-                                                logger.info(f"EMPLOYMENT CHECKBOX: Setting checkbox {field_name} to checked via parent ID")
-                                            else:
-                                                annotation.update(PdfDict(AS=PdfName.Off, V=PdfName.Off))
-                                                logger.info(f"EMPLOYMENT CHECKBOX: Setting checkbox {field_name} to unchecked via parent ID")
-                                            continue
-                                    
-                                    # Try direct field name mapping
-                                    if field_name in field_mapping:
-                                        logger.info(f"EMPLOYMENT CHECKBOX: Found mapping by exact name: {field_name} = {field_mapping[field_name]}")
-                                        if field_mapping[field_name]:
-                                            annotation.update(PdfDict(AS=PdfName.Yes, V=PdfName.Yes))
-                                            logger.info(f"EMPLOYMENT CHECKBOX: Setting checkbox {field_name} to checked via exact name")
-                                        else:
-                                            annotation.update(PdfDict(AS=PdfName.Off, V=PdfName.Off))
-                                            logger.info(f"EMPLOYMENT CHECKBOX: Setting checkbox {field_name} to unchecked via exact name")
-                                        continue
-                                    
-                                    if field_id in field_mapping:
-                                        logger.info(f"EMPLOYMENT CHECKBOX: Value in mapping: {field_mapping[field_id]}")
-                                    else:
-                                        logger.info(f"EMPLOYMENT CHECKBOX: NOT FOUND IN MAPPING!")
-                                        # Try alternative formats
-                                        alt_formats = [
-                                            f"checkbox{int(checkbox_num)}",  # Without leading zeros
-                                            f"checkbox{checkbox_num.zfill(3)}",  # With leading zeros
-                                            f"checkbox{checkbox_num.lstrip('0')}",  # Strip leading zeros
-                                            f"Check Box{checkbox_num}",  # Original PDF format
-                                            f"Check Box {checkbox_num}"  # With space
-                                        ]
-                                        logger.info(f"EMPLOYMENT CHECKBOX: Trying alternative formats: {alt_formats}")
-                                        for alt_format in alt_formats:
-                                            if alt_format in field_mapping:
-                                                logger.info(f"EMPLOYMENT CHECKBOX: Found in alternative format: {alt_format} = {field_mapping[alt_format]}")
-                                
-                                logger.debug(f"Processing checkbox field: {field_name} -> {field_id}")
-                                if field_id in field_mapping:
-                                    checkbox_value = field_mapping[field_id]
-                                    logger.debug(f"Checkbox {field_id} value: {checkbox_value} (type: {type(checkbox_value)})")
-                                    if field_mapping[field_id]:
-                                        annotation.update(PdfDict(AS=PdfName.Yes, V=PdfName.Yes))
-                                        logger.debug(f"Setting checkbox {field_name} to checked")
-                                    else:
-                                        annotation.update(PdfDict(AS=PdfName.Off, V=PdfName.Off))
-                                        logger.debug(f"Setting checkbox {field_name} to unchecked")
-                                else:
-                                    logger.debug(f"Checkbox {field_id} not found in field mapping")
-                                    logger.debug(f"Missing checkbox data for {field_id} -> {field_name}")
-                                    missing_fields.append(field_id)
-            
-            # Add the page to writer
-            writer.addPage(page)
+    except Exception as e:
+        logger.error(f"Error filling PDF form: {str(e)}")
+        raise
+
+
+def open_filled_pdf(application, compress: bool = None) -> Tuple[Any, List[str]]:
+    """
+    Fill a PDF form with application data without writing it to disk.
+    
+    A PDF already in the generated PDF cache is opened from there; otherwise
+    the form is filled into an in-memory buffer.
+    
+    Args:
+        application: The Application instance
+        compress: Compress the PDF's content streams (optional, defaults to
+            the PDF_COMPRESS setting)
+    
+    Returns:
+        Tuple of a binary file object positioned at the start of the PDF and
+        the list of missing fields
+    """
+    if compress is None:
+        compress = get_compress_default()
+    
+    try:
+        field_mapping = get_application_field_mapping(application)
+        template_path = get_pdf_template_path()
+        plan = get_fill_plan(template_path, compress=compress)
         
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        pdf_path = get_cached_pdf(plan.cache_key(field_mapping))
+        if pdf_path is not None:
+            return open(pdf_path, 'rb'), plan.missing_fields(field_mapping)
         
-        # Write the filled PDF
-        with open(output_path, 'wb') as output_file:
-            writer.write(output_file)
+        buffer = io.BytesIO()
+        missing_fields = plan.fill(field_mapping, buffer)
+        buffer.seek(0)
+        return buffer, missing_fields
         
-        # Log all checkbox fields found in the template
-        logger.info(f"All checkbox fields found in PDF template: {sorted(all_checkbox_fields)}")
+    except Exception as e:
+        logger.error(f"Error filling PDF form: {str(e)}")
+        raise
+
+
+# Coordinate tolerance, in PDF points, for matching employment checkboxes
+CHECKBOX_RECT_TOLERANCE = 1
+
+# Employment checkboxes that can also be mapped by parent object or PDF name
+EMPLOYMENT_CHECKBOX_NUMBERS = {'124', '125', '126', '127'}
+
+
+class FillPlan:
+    """
+    A parsed PDF template with a precompiled lookup plan.
+    
+    The plan lists every fillable annotation with the mapping keys it reads,
+    and indexes widget annotations by position so coordinate-based
+    checkboxes are found without walking the pages. Plans are cached per
+    process by get_fill_plan.
+    
+    A plan created with compress writes flate-compressed content streams.
+    pdfrw compresses the streams of the parsed tree in place, so the
+    template's streams are compressed by the first fill and reused as they
+    are by later ones.
+    """
+    
+    def __init__(self, template_path: str, version: str = None, compress: bool = False):
+        self.template_path = template_path
+        self.version = version
+        self.compress = compress
+        self.reader = PdfReader(template_path)
+        self.pages = list(self.reader.pages)
         
-        # Look for employment-related checkboxes (around 120-130 range)
-        employment_checkboxes = [field for field in all_checkbox_fields if any(str(i) in field for i in range(120, 131))]
-        logger.info(f"Employment-related checkboxes (120-130 range): {sorted(employment_checkboxes)}")
+        # (page index, annotation index, kind, mapping keys) per field, where
+        # the last key is the field ID reported when no key is mapped
+        self.fields = []
+        # Widget positions: (floor x, floor y) -> [(page index, annotation index, x, y)]
+        self.widgets = {}
+        self.checkbox_names = []
+        # Fills mutate the shared tree, so they run one at a time
+        self.lock = threading.Lock()
         
-        # Look for checkboxes that might be for first individual (around 100-130 range)
-        first_individual_checkboxes = [field for field in all_checkbox_fields if any(str(i) in field for i in range(100, 131))]
-        logger.info(f"Potential first individual checkboxes (100-130 range): {sorted(first_individual_checkboxes)}")
+        self._object_numbers = None
         
-        # Look for checkboxes that might be for employment types (any range)
-        employment_keywords = ['full', 'part', 'casual', 'contract', 'employment', 'work']
-        potential_employment_checkboxes = []
-        for field in all_checkbox_fields:
-            # Check if any employment-related keywords might be in the field name
-            # Since we can't see the actual field names, let's look for patterns
-            if any(keyword in field.lower() for keyword in employment_keywords):
-                potential_employment_checkboxes.append(field)
-        logger.info(f"Potential employment checkboxes (by keywords): {sorted(potential_employment_checkboxes)}")
+        for page_index, page in enumerate(self.pages):
+            annotations = page['/Annots'] if '/Annots' in page else None
+            for annotation_index, annotation in enumerate(annotations or []):
+                if not annotation:
+                    continue
+                if '/T' in annotation:
+                    self._plan_field(page_index, annotation_index, annotation)
+                if '/Rect' in annotation and '/Subtype' in annotation and annotation['/Subtype'] == '/Widget':
+                    x, y = [float(str(r).strip('()')) for r in annotation['/Rect'][:2]]
+                    self.widgets.setdefault((math.floor(x), math.floor(y)), []).append(
+                        (page_index, annotation_index, x, y)
+                    )
+    
+    def _plan_field(self, page_index, annotation_index, annotation):
+        field_name = str(annotation['/T']).strip('()/')
         
-        # Comprehensive analysis of checkbox field numbers
-        checkbox_numbers = []
-        for field in all_checkbox_fields:
-            try:
-                # Extract the number from "Check Box123" -> 123
-                number = int(field.replace('Check Box', ''))
-                checkbox_numbers.append(number)
-            except:
-                pass
+        # Handle text fields (Text1, Text2, etc.)
+        if field_name.startswith('Text') and field_name[4:].isdigit():
+            self.fields.append((page_index, annotation_index, 'text', (f"text{field_name[4:]}",)))
         
-        checkbox_numbers.sort()
-        logger.info(f"All checkbox numbers found: {checkbox_numbers}")
+        # Handle checkbox fields (Check Box20, Check Box21, etc.)
+        elif field_name.startswith('Check Box'):
+            self.checkbox_names.append(field_name)
+            checkbox_num = field_name[9:]
+            if not checkbox_num.isdigit():
+                return
+            
+            keys = (f"checkbox{checkbox_num}",)
+            if checkbox_num in EMPLOYMENT_CHECKBOX_NUMBERS:
+                # Employment checkboxes are mapped by parent object number
+                # or by their PDF name before the usual field ID
+                keys = (field_name,) + keys
+                parent = annotation['/Parent'] if '/Parent' in annotation else None
+                if id(parent) in self.object_numbers:
+                    keys = (f"parent{self.object_numbers[id(parent)]}",) + keys
+            self.fields.append((page_index, annotation_index, 'checkbox', keys))
+    
+    @property
+    def object_numbers(self):
+        """Object number of each indirect object, by identity."""
+        if self._object_numbers is None:
+            self._object_numbers = {
+                id(obj): key[0] for key, obj in self.reader.indirect_objects.items()
+            }
+        return self._object_numbers
+    
+    def annotation(self, page_index, annotation_index):
+        return self.pages[page_index]['/Annots'][annotation_index]
+    
+    def widgets_near(self, x, y):
+        """Widget annotations whose top-left corner is within tolerance of (x, y)."""
+        cell_x, cell_y = math.floor(x), math.floor(y)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for page_index, annotation_index, widget_x, widget_y in self.widgets.get((cell_x + dx, cell_y + dy), ()):
+                    if abs(widget_x - x) < CHECKBOX_RECT_TOLERANCE and abs(widget_y - y) < CHECKBOX_RECT_TOLERANCE:
+                        yield page_index, annotation_index
+    
+    def cache_key(self, field_mapping: Dict[str, Any]) -> str:
+        """Generated PDF cache key for filling this template version with a mapping."""
+        template_version = f"{self.template_path}:{self.version}"
+        if self.compress:
+            template_version += ':compressed'
+        return pdf_cache_key(field_mapping, template_version)
+    
+    def missing_fields(self, field_mapping: Dict[str, Any]) -> List[str]:
+        """Field IDs in the template that the mapping has no value for."""
+        return [
+            keys[-1] for _, _, _, keys in self.fields
+            if not any(key in field_mapping for key in keys)
+        ]
+    
+    def fill(self, field_mapping: Dict[str, Any], output) -> List[str]:
+        """
+        Fill the template with a field mapping and write it to output.
         
-        # Look for patterns - checkboxes that might be in groups of 4 (like employment types)
-        potential_groups = []
-        for i in range(len(checkbox_numbers) - 3):
-            group = checkbox_numbers[i:i+4]
-            if len(group) == 4 and all(group[j+1] - group[j] == 1 for j in range(3)):
-                potential_groups.append(group)
+        Values are set on the cached tree and restored once the PDF has been
+        written, so every fill starts from the untouched template.
         
-        logger.info(f"Potential checkbox groups of 4 consecutive numbers: {potential_groups}")
+        Args:
+            field_mapping: Dictionary mapping field IDs to values
+            output: Path or binary file object to write the PDF to
         
-        # Special handling for first individual employment checkboxes
-        # Use the coordinates provided in the mapping
-        if 'employment_checkboxes' in field_mapping:
-            employment_checkboxes = field_mapping['employment_checkboxes']
+        Returns:
+            List of missing fields that couldn't be filled
+        """
+        with self.lock:
+            touched = {}
             
-            # Process each page again to find these specific checkboxes by coordinates
-            logger.info("=== SPECIAL HANDLING FOR EMPLOYMENT CHECKBOXES ===")
-            for page_num, page in enumerate(template_pdf.pages):
-                if '/Annots' in page:
-                    annotations = page['/Annots']
-                    if annotations:
-                        for annotation in annotations:
-                            if annotation and '/Rect' in annotation and '/Subtype' in annotation and annotation['/Subtype'] == '/Widget':
-                                rect = annotation['/Rect']
-                                rect_str = [str(r).strip('()') for r in rect]
-                                
-                                # Check if this annotation matches any of our employment checkboxes
-                                for checkbox in employment_checkboxes:
-                                    # Compare the first two coordinates (top-left corner) with some tolerance
-                                    if (abs(float(rect_str[0]) - float(checkbox['rect'][0])) < 1 and
-                                        abs(float(rect_str[1]) - float(checkbox['rect'][1])) < 1):
-                                        
-                                        logger.info(f"Found employment checkbox for {checkbox['type']} at {rect_str}")
-                                        
-                                        # Check if we should check this checkbox
-                                        if checkbox['value']:
-                                            annotation.update(PdfDict(AS=PdfName.Yes, V=PdfName.Yes))
-                                            logger.info(f"Setting {checkbox['type']} checkbox to checked")
-                                        else:
-                                            annotation.update(PdfDict(AS=PdfName.Off, V=PdfName.Off))
-                                            logger.info(f"Setting {checkbox['type']} checkbox to unchecked")
-        
-        # Special debug for employment checkboxes
-        logger.info("=== EMPLOYMENT CHECKBOX DEBUG ===")
-        for i in range(120, 130):
-            checkbox_id = f"checkbox{i}"
-            if checkbox_id in field_mapping:
-                logger.info(f"{checkbox_id} = {field_mapping[checkbox_id]}")
-            else:
-                logger.info(f"{checkbox_id} = NOT IN MAPPING")
+            def set_values(annotation, values):
+                if id(annotation) not in touched:
+                    touched[id(annotation)] = (annotation, {key: annotation.get(key) for key in (PdfName.V, PdfName.AS)})
+                annotation.update(values)
+            
+            try:
+                missing_fields = []
+                for page_index, annotation_index, kind, keys in self.fields:
+                    key = next((key for key in keys if key in field_mapping), None)
+                    if key is None:
+                        missing_fields.append(keys[-1])
+                        continue
+                    
+                    annotation = self.annotation(page_index, annotation_index)
+                    if kind == 'text':
+                        value = str(field_mapping[key])
+                        set_values(annotation, PdfDict(V=value, AS=value))
+                    elif field_mapping[key]:
+                        set_values(annotation, PdfDict(AS=PdfName.Yes, V=PdfName.Yes))
+                    else:
+                        set_values(annotation, PdfDict(AS=PdfName.Off, V=PdfName.Off))
+                
+                # Employment checkboxes located by the coordinates in the mapping
+                for checkbox in field_mapping.get('employment_checkboxes', []):
+                    state = PdfName.Yes if checkbox['value'] else PdfName.Off
+                    for page_index, annotation_index in self.widgets_near(float(checkbox['rect'][0]), float(checkbox['rect'][1])):
+                        set_values(self.annotation(page_index, annotation_index), PdfDict(AS=state, V=state))
+                
+                writer = PdfWriter(compress=self.compress)
+                for page in self.pages:
+                    writer.addPage(page)
+                
+                if isinstance(output, str):
+                    # Ensure output directory exists
+                    os.makedirs(os.path.dirname(output), exist_ok=True)
+                    with open(output, 'wb') as output_file:
+                        writer.write(output_file)
+                else:
+                    writer.write(output)
+                
+                return missing_fields
+            
+            finally:
+                for annotation, previous in touched.values():
+                    for key, value in previous.items():
+                        if value is None:
+                            if key in annotation:
+                                del annotation[key]
+                        else:
+                            annotation[key] = value
+
+
+_fill_plans = {}
+_fill_plans_lock = threading.Lock()
+
+
+def get_fill_plan(template_path: str, compress: bool = False) -> FillPlan:
+    """
+    Return the fill plan for a template, parsing it once per process.
+    
+    Cached plans are reused until the template file changes on disk.
+    Compressed and uncompressed output use separate plans, since
+    compression changes the parsed tree.
+    
+    Args:
+        template_path: Path to the PDF template
+        compress: Compress the content streams of filled PDFs (optional)
+    
+    Returns:
+        FillPlan for the template
+    """
+    try:
+        stat = os.stat(template_path)
+    except OSError:
+        # Nothing to validate a cached plan against
+        return FillPlan(template_path, compress=compress)
+    version = f"{stat.st_mtime_ns}-{stat.st_size}"
+    
+    with _fill_plans_lock:
+        plan = _fill_plans.get((template_path, compress))
+        if plan is None or plan.version != version:
+            plan = FillPlan(template_path, version, compress=compress)
+            _fill_plans[(template_path, compress)] = plan
+            logger.info(f"Parsed PDF template {template_path}: {len(plan.fields)} fields")
+        return plan
+
+
+def clear_fill_plan_cache():
+    """Drop all cached template plans."""
+    with _fill_plans_lock:
+        _fill_plans.clear()
+
+
+def log_fill_diagnostics(plan: FillPlan, field_mapping: Dict[str, Any]) -> None:
+    """
+    Log the template's checkbox fields and the employment checkbox mapping.
+    
+    Only run when PDF_FILLER_DEBUG is set, since it walks every field.
+    """
+    all_checkbox_fields = sorted(plan.checkbox_names)
+    logger.info(f"All checkbox fields found in PDF template: {all_checkbox_fields}")
+    
+    # Look for employment-related checkboxes (around 120-130 range)
+    employment_checkboxes = [field for field in all_checkbox_fields if any(str(i) in field for i in range(120, 131))]
+    logger.info(f"Employment-related checkboxes (120-130 range): {employment_checkboxes}")
+    
+    # Comprehensive analysis of checkbox field numbers
+    checkbox_numbers = sorted(
+        int(field.replace('Check Box', '')) for field in all_checkbox_fields
+        if field.replace('Check Box', '').isdigit()
+    )
+    logger.info(f"All checkbox numbers found: {checkbox_numbers}")
+    
+    # Look for patterns - checkboxes that might be in groups of 4 (like employment types)
+    potential_groups = [
+        checkbox_numbers[i:i + 4] for i in range(len(checkbox_numbers) - 3)
+        if all(checkbox_numbers[i + j + 1] - checkbox_numbers[i + j] == 1 for j in range(3))
+    ]
+    logger.info(f"Potential checkbox groups of 4 consecutive numbers: {potential_groups}")
+    
+    for page_index, annotation_index, kind, keys in plan.fields:
+        if kind == 'checkbox' and len(keys) > 1:
+            found = {key: field_mapping[key] for key in keys if key in field_mapping}
+            logger.info(f"EMPLOYMENT CHECKBOX: {keys[-1]} keys {keys}, mapped {found or 'NOT FOUND IN MAPPING'}")
+    
+    for checkbox in field_mapping.get('employment_checkboxes', []):
+        matches = list(plan.widgets_near(float(checkbox['rect'][0]), float(checkbox['rect'][1])))
+        logger.info(f"Employment checkbox {checkbox['type']} at {checkbox['rect']}: {len(matches)} widget(s), value {checkbox['value']}")
+
+
+def fill_pdf_with_mapping(template_path: str, field_mapping: Dict[str, Any], output_path: str, debug: bool = None) -> List[str]:
+    """
+    Fill PDF form with field mapping data using pdfrw library.
+    
+    Args:
+        template_path: Path to the PDF template
+        field_mapping: Dictionary mapping field IDs to values
+        output_path: Path where the filled PDF should be saved
+        debug: Log template diagnostics (optional, defaults to the
+            PDF_FILLER_DEBUG setting)
+    
+    Returns:
+        List of missing fields that couldn't be filled
+    """
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"Template PDF not found at: {template_path}")
+    
+    try:
+        plan = get_fill_plan(template_path)
         
-        # Check if there are any checkboxes with similar numbers in different formats
-        all_keys = list(field_mapping.keys())
-        employment_related = [k for k in all_keys if any(f"checkbox{i}" in k.lower() for i in range(120, 130))]
-        logger.info(f"All employment-related keys in mapping: {employment_related}")
+        if debug is None:
+            debug = getattr(settings, 'PDF_FILLER_DEBUG', False)
+        if debug:
+            log_fill_diagnostics(plan, field_mapping)
         
-        # Check the actual PDF field names for these checkboxes
-        logger.info("=== PDF FIELD NAMES FOR EMPLOYMENT CHECKBOXES ===")
-        employment_checkbox_fields = [field for field in all_checkbox_fields if any(str(i) in field for i in range(120, 130))]
-        logger.info(f"Employment checkbox fields in PDF: {sorted(employment_checkbox_fields)}")
+        missing_fields = plan.fill(field_mapping, output_path)
         
-        logger.info(f"PDF generated successfully at: {output_path}")
+        logger.debug(f"PDF generated at {output_path} with {len(missing_fields)} missing fields")
         return missing_fields
         
     except Exception as e:
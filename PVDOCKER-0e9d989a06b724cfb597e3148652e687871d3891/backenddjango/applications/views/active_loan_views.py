@@ -7,7 +7,7 @@ loan creation, updates, repayment tracking, and alert management.
 
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Q, Count, Sum
+from django.db.models import Q, Count
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
@@ -20,6 +20,7 @@ from applications.serializers import (
     ActiveLoanSummarySerializer,
     ActiveLoanRepaymentSerializer
 )
+from applications.services.active_loans import get_active_loan_dashboard
 
 
 class ActiveLoanViewSet(viewsets.ModelViewSet):
@@ -35,6 +36,7 @@ class ActiveLoanViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Get queryset with proper filtering and ordering."""
         queryset = ActiveLoan.objects.select_related('application').prefetch_related('repayments')
+        queryset = queryset.with_next_payment_date().with_current_accrual()
         
         # Filter by active status
         if self.action == 'list':
@@ -58,7 +60,7 @@ class ActiveLoanViewSet(viewsets.ModelViewSet):
                 queryset = queryset.filter(loan_expiry_date__lte=expiry_threshold, loan_expiry_date__gte=today)
             elif alert_status == 'payment_due':
                 # Loans with payments due within 14 days
-                queryset = queryset.filter(interest_payments_required=True)
+                queryset = queryset.filter(interest_payments_required=True).payment_due_within(14)
         
         return queryset.order_by('-created_at')
     
@@ -105,14 +107,13 @@ class ActiveLoanViewSet(viewsets.ModelViewSet):
             is_active=True,
             loan_expiry_date__lte=today + timezone.timedelta(days=30),
             loan_expiry_date__gte=today
-        ).select_related('application')
+        ).select_related('application').with_next_payment_date().with_current_accrual()
         
         # Loans with interest payments due within 14 days
-        payment_alerts = []
-        for loan in ActiveLoan.objects.filter(is_active=True, interest_payments_required=True):
-            next_payment = loan.next_interest_payment_date
-            if next_payment and (next_payment - today).days <= 14:
-                payment_alerts.append(loan)
+        payment_alerts = ActiveLoan.objects.filter(
+            is_active=True,
+            interest_payments_required=True
+        ).payment_due_within(14).select_related('application').with_current_accrual()
         
         return Response({
             'expiry_alerts': ActiveLoanSummarySerializer(expiry_alerts, many=True).data,
@@ -122,51 +123,13 @@ class ActiveLoanViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
-        """Get dashboard statistics for active loans."""
-        today = timezone.now().date()
-        
-        # Basic counts
-        total_active = ActiveLoan.objects.filter(is_active=True).count()
-        total_inactive = ActiveLoan.objects.filter(is_active=False).count()
-        
-        # Alert counts
-        expiry_critical = ActiveLoan.objects.filter(
-            is_active=True,
-            loan_expiry_date__lte=today + timezone.timedelta(days=7),
-            loan_expiry_date__gte=today
-        ).count()
-        
-        expiry_warning = ActiveLoan.objects.filter(
-            is_active=True,
-            loan_expiry_date__lte=today + timezone.timedelta(days=30),
-            loan_expiry_date__gt=today + timezone.timedelta(days=7)
-        ).count()
-        
-        # Payment alerts
-        payment_due_count = 0
-        for loan in ActiveLoan.objects.filter(is_active=True, interest_payments_required=True):
-            next_payment = loan.next_interest_payment_date
-            if next_payment and (next_payment - today).days <= 14:
-                payment_due_count += 1
-        
-        # Total loan value
-        total_loan_value = ActiveLoan.objects.filter(
-            is_active=True
-        ).aggregate(
-            total=Sum('application__loan_amount')
-        )['total'] or 0
+        """
+        Get dashboard statistics for active loans.
         
-        return Response({
-            'total_active_loans': total_active,
-            'total_inactive_loans': total_inactive,
-            'total_loan_value': total_loan_value,
-            'alerts': {
-                'expiry_critical': expiry_critical,
-                'expiry_warning': expiry_warning,
-                'payment_due': payment_due_count,
-                'total_alerts': expiry_critical + expiry_warning + payment_due_count
-            }
-        })
+        Served from a cached snapshot that is invalidated on active loan
+        and repayment writes and refreshed periodically by Celery beat.
+        """
+        return Response(get_active_loan_dashboard())
     
     @action(detail=True, methods=['post'])
     def deactivate(self, request, pk=None):
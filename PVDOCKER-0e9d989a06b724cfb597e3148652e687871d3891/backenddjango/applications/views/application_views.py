@@ -282,6 +282,37 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['get', 'post'])
+    def repayment_schedule(self, request, pk=None):
+        """
+        Preview (GET) or generate (POST) the application's repayment schedule
+        """
+        application = self.get_object()
+        
+        from ..services import calculate_application_schedule
+        from ..services.amortization import persist_repayment_schedule
+        from ..services.financial import make_json_serializable
+        
+        try:
+            interest_only_months = int(request.data.get('interest_only_months') or
+                                       request.query_params.get('interest_only_months') or 0)
+            schedule = calculate_application_schedule(application, interest_only_months=interest_only_months)
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.method == 'POST':
+            repayments = persist_repayment_schedule(application, schedule, request.user)
+            message = f"Repayment schedule generated with {len(repayments)} repayments"
+        else:
+            message = "Repayment schedule preview"
+        
+        return Response({
+            "message": message,
+            "schedule": make_json_serializable([
+                dict(period, due_date=period['due_date'].isoformat()) for period in schedule
+            ])
+        }, status=status.HTTP_201_CREATED if request.method == 'POST' else status.HTTP_200_OK)
+
     @action(detail=True, methods=['get'])
     def funding_calculation_history(self, request, pk=None):
         application = self.get_object()
@@ -466,13 +497,14 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                     application.save()
                     
                     # Create notification for the assigned BD
-                    from users.models import Notification
-                    Notification.objects.create(
-                        user=bd_user,
+                    from users.services import create_notifications_bulk
+                    create_notifications_bulk(
+                        [bd_user],
                         title=f"Application Assignment: {application.reference_number}",
                         message=f"You have been assigned to application {application.reference_number}",
                         notification_type="application_status",
-                        related_object_id=application.id
+                        related_object_id=application.id,
+                        related_object_type='application'
                     )
                     
                     # Create a note about the assignment
@@ -505,13 +537,14 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                     application.save()
                     
                     # Create notification for the new assigned BD
-                    from users.models import Notification
-                    Notification.objects.create(
-                        user=bd_user,
+                    from users.services import create_notifications_bulk
+                    create_notifications_bulk(
+                        [bd_user],
                         title=f"Application Assignment: {application.reference_number}",
                         message=f"You have been assigned to application {application.reference_number}",
                         notification_type="application_status",
-                        related_object_id=application.id
+                        related_object_id=application.id,
+                        related_object_type='application'
                     )
                     
                     # Create a note about the reassignment
@@ -7,10 +7,13 @@ from rest_framework.permissions import IsAuthenticated
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.http import Http404, FileResponse
+from django.urls import reverse
 from ..models import Application
-from ..utils.pdf_filler import fill_pdf_form
+from ..utils.pdf_filler import get_filled_pdf, open_filled_pdf
+from ..tasks.pdf import generate_application_pdf_async, generate_application_pdfs_bulk
 from users.permissions import IsAdminOrBroker
-from ..serializers.application import GeneratePDFSerializer 
+from crm_backend.tasks import remember_task_owner
+from ..serializers.application import GeneratePDFSerializer, BulkGeneratePDFSerializer
 from rest_framework import generics, status
 
 logger = logging.getLogger(__name__)
@@ -36,9 +39,17 @@ class GenerateFilledFormView(generics.GenericAPIView):
             request: The HTTP request
             application_id: The ID of the Application to generate a PDF for
             
+        Query parameters:
+            persist: Save the PDF to the generated PDF cache (default false)
+            compress: Compress the PDF's content streams (defaults to the
+                PDF_COMPRESS setting)
+            
         Returns:
-            Response with the path to the generated PDF and a list of missing fields
+            Response streaming the filled PDF
         """
+        persist = request.query_params.get('persist', 'false').lower() == 'true'
+        compress = self.get_compress_param(request)
+        
         try:
             # Get the application
             try:
@@ -60,20 +71,17 @@ class GenerateFilledFormView(generics.GenericAPIView):
             template_name = request.query_params.get('template_name', 'default_template')
             output_format = request.query_params.get('output_format', 'pdf')
             
-            # Create the output directory if it doesn't exist
-            output_dir = os.path.join(settings.MEDIA_ROOT, 'application_forms')
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # Define the output path
-            output_filename = f"{application_id}_filled.pdf"
-            output_path = os.path.join(output_dir, output_filename)
+            if persist:
+                # Fill the PDF form into the cache, or reuse the cached PDF
+                output_path, missing_fields = get_filled_pdf(application, compress=compress)
+                pdf_file = open(output_path, 'rb')
+            else:
+                # Fill the PDF form in memory unless it is already cached
+                pdf_file, missing_fields = open_filled_pdf(application, compress=compress)
             
-            # Fill the PDF form
-            missing_fields = fill_pdf_form(application, output_path)
-            
-            # Return the file
+            # Stream the file
             response = FileResponse(
-                open(output_path, 'rb'),
+                pdf_file,
                 content_type='application/pdf'
             )
             response['Content-Disposition'] = f'attachment; filename="{application.reference_number}_{template_name}.pdf"'
@@ -101,10 +109,12 @@ class GenerateFilledFormView(generics.GenericAPIView):
             application_id: The ID of the Application to generate a PDF for
             
         Returns:
-            Response with the path to the generated PDF and a list of missing fields
+            Response with the path to the generated PDF and a list of missing fields,
+            or with the task information if the async parameter is true
         """
-        # Get the strict mode parameter
+        # Get the strict mode and async parameters
         strict_mode = request.query_params.get('strict', 'false').lower() == 'true'
+        async_mode = request.query_params.get('async', 'false').lower() == 'true'
         
         try:
             # Get the application
@@ -116,16 +126,20 @@ class GenerateFilledFormView(generics.GenericAPIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Create the output directory if it doesn't exist
-            output_dir = os.path.join(settings.MEDIA_ROOT, 'application_forms')
-            os.makedirs(output_dir, exist_ok=True)
+            # Check if user has permission to access this application
+            if not self.has_application_permission(request.user, application):
+                return Response(
+                    {"error": "You don't have permission to access this application"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
             
-            # Define the output path
-            output_filename = f"{application_id}_filled.pdf"
-            output_path = os.path.join(output_dir, output_filename)
+            # Generate the PDF in a background task
+            if async_mode:
+                task = generate_application_pdf_async.delay(application_id=application.id)
+                return self.task_response(request, task)
             
-            # Fill the PDF form
-            missing_fields = fill_pdf_form(application, output_path)
+            # Fill the PDF form, or reuse the cached PDF for the same data
+            output_path, missing_fields = get_filled_pdf(application, compress=self.get_compress_param(request))
             
             # If strict mode is enabled and there are missing fields, return an error
             if strict_mode and missing_fields:
@@ -136,7 +150,7 @@ class GenerateFilledFormView(generics.GenericAPIView):
             
             # Return the path to the generated PDF and the list of missing fields
             return Response({
-                "pdf_path": f"media/application_forms/{output_filename}",
+                "pdf_path": f"media/{os.path.relpath(output_path, settings.MEDIA_ROOT)}",
                 "missing_fields": missing_fields
             })
             
@@ -153,6 +167,27 @@ class GenerateFilledFormView(generics.GenericAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def get_compress_param(self, request):
+        """
+        Return the compress query parameter, or None to use the default
+        """
+        compress = request.query_params.get('compress')
+        if compress is None:
+            return None
+        return compress.lower() == 'true'
+    
+    def task_response(self, request, task):
+        """
+        Return the task information for a queued PDF generation task
+        """
+        remember_task_owner(task.id, request.user.id)
+        return Response({
+            'task_id': task.id,
+            'status': task.status,
+            'status_url': request.build_absolute_uri(reverse('task-status', kwargs={'task_id': task.id})),
+            'result_url': request.build_absolute_uri(reverse('task-result', kwargs={'task_id': task.id}))
+        }, status=status.HTTP_202_ACCEPTED)
+    
     def has_application_permission(self, user, application):
         """
         Check if user has permission to access this application
@@ -174,3 +209,50 @@ class GenerateFilledFormView(generics.GenericAPIView):
             return True
         
         return False
+
+
+class BulkGenerateFilledFormView(GenerateFilledFormView):
+    """
+    API endpoint for generating filled PDF forms for several applications.
+    
+    The PDFs are generated in a background task and bundled into a ZIP file.
+    Progress and the ZIP path are available from the task status endpoints.
+    """
+    serializer_class = BulkGeneratePDFSerializer
+    http_method_names = ['post', 'options']
+    
+    def post(self, request):
+        """
+        Queue generation of filled PDF forms for several applications.
+        
+        Args:
+            request: The HTTP request with a list of application_ids
+            
+        Returns:
+            Response with the task information
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        application_ids = list(dict.fromkeys(serializer.validated_data['application_ids']))
+        
+        applications = Application.objects.select_related('bd__user', 'broker__user', 'created_by').in_bulk(application_ids)
+        missing_ids = [application_id for application_id in application_ids if application_id not in applications]
+        if missing_ids:
+            return Response(
+                {"error": "Applications not found", "application_ids": missing_ids},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        # Check if user has permission to access every application
+        forbidden_ids = [
+            application_id for application_id, application in applications.items()
+            if not self.has_application_permission(request.user, application)
+        ]
+        if forbidden_ids:
+            return Response(
+                {"error": "You don't have permission to access these applications", "application_ids": forbidden_ids},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        task = generate_application_pdfs_bulk.delay(application_ids=application_ids)
+        return self.task_response(request, task)
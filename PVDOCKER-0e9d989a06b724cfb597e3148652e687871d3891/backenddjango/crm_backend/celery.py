@@ -15,25 +15,41 @@ app.autodiscover_tasks()
 
 # Define periodic tasks
 app.conf.beat_schedule = {
-    'check-stale-applications': {
-        'task': 'applications.tasks.check_stale_applications',
+    'sweep-application-alerts': {
+        'task': 'applications.tasks.notifications.sweep_application_alerts',
         'schedule': crontab(hour=9, minute=0),  # Run daily at 9 AM
     },
-    'check-stagnant-applications': {
-        'task': 'applications.tasks.check_stagnant_applications',
-        'schedule': crontab(hour=10, minute=0),  # Run daily at 10 AM
-    },
     'check-note-reminders': {
-        'task': 'applications.tasks.check_note_reminders',
-        'schedule': crontab(hour=8, minute=0),  # Run daily at 8 AM
+        'task': 'applications.tasks.notifications.check_note_reminders',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes so reminders fire near their time
     },
     'check-repayment-reminders': {
-        'task': 'applications.tasks.check_repayment_reminders',
+        'task': 'applications.tasks.notifications.check_repayment_reminders',
         'schedule': crontab(hour=7, minute=0),  # Run daily at 7 AM
     },
     'check-due-reminders': {
         'task': 'reminders.tasks.check_due_reminders',
-        'schedule': crontab(minute=0),  # Run hourly at the start of each hour
+        'schedule': crontab(minute='*'),  # Sweep every minute for reminders their scheduled task missed
+    },
+    'refresh-active-loan-dashboard': {
+        'task': 'applications.tasks.active_loans.refresh_active_loan_dashboard_snapshot',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+    },
+    'accrue-active-loan-interest': {
+        'task': 'applications.tasks.active_loans.accrue_active_loan_interest',
+        'schedule': crontab(hour=23, minute=45),  # Run nightly at 11:45 PM
+    },
+    'reconcile-unread-notification-counts': {
+        'task': 'users.tasks.reconcile_unread_notification_counts',
+        'schedule': crontab(minute=15),  # Run hourly at quarter past
+    },
+    'dispatch-notification-outbox': {
+        'task': 'users.tasks.dispatch_notification_outbox',
+        'schedule': crontab(minute='*'),  # Run every minute
+    },
+    'apply-data-retention': {
+        'task': 'users.tasks.apply_data_retention',
+        'schedule': crontab(hour=2, minute=30),  # Run daily at 2:30 AM
     },
     # Email digest tasks
     'send-daily-digest': {
@@ -12,7 +12,9 @@ from .tasks import (
     generate_pdf_async,
     calculate_funding_async,
     get_task_status,
-    get_task_result
+    get_task_result,
+    get_task_owner,
+    remember_task_owner
 )
 from applications.models import Application
 
@@ -48,6 +50,7 @@ def generate_document_async_view(request, application_id):
     )
     
     # Return task information
+    remember_task_owner(task.id, request.user.id)
     return Response({
         'task_id': task.id,
         'status': task.status,
@@ -95,6 +98,7 @@ def generate_pdf_async_view(request, application_id):
     )
     
     # Return task information
+    remember_task_owner(task.id, request.user.id)
     return Response({
         'task_id': task.id,
         'status': task.status,
@@ -129,6 +133,7 @@ def calculate_funding_async_view(request, application_id):
     )
     
     # Return task information
+    remember_task_owner(task.id, request.user.id)
     return Response({
         'task_id': task.id,
         'status': task.status,
@@ -137,12 +142,25 @@ def calculate_funding_async_view(request, application_id):
     }, status=status.HTTP_202_ACCEPTED)
 
 
+def task_not_found(task_id):
+    """
+    Response for a task that is unknown or was queued by another user.
+    """
+    return Response(
+        {'error': f'Task with ID {task_id} not found'},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def task_status_view(request, task_id):
     """
-    Get the status of a task.
+    Get the status of a task queued by the current user.
     """
+    if get_task_owner(task_id) != request.user.id:
+        return task_not_found(task_id)
+    
     status_info = get_task_status(task_id)
     return Response(status_info)
 
@@ -151,8 +169,11 @@ def task_status_view(request, task_id):
 @permission_classes([IsAuthenticated])
 def task_result_view(request, task_id):
     """
-    Get the result of a completed task.
+    Get the result of a completed task queued by the current user.
     """
+    if get_task_owner(task_id) != request.user.id:
+        return task_not_found(task_id)
+    
     result_info = get_task_result(task_id)
     
     if result_info['status'] not in ['SUCCESS', 'FAILURE']:
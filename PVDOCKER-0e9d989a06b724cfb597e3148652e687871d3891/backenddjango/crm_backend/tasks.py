@@ -3,14 +3,19 @@ Core asynchronous tasks for the CRM Loan Management System.
 This module contains tasks that are not specific to any particular app.
 """
 
-from celery import shared_task
+from celery import group, shared_task
 from celery.result import AsyncResult
 from django.conf import settings
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.cache import cache
+from django.core.mail import send_mail, EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.utils import timezone
 from django.db.models import Q
+from contextlib import contextmanager
+from itertools import groupby
+from operator import attrgetter
+import threading
 import time
 import json
 import logging
@@ -21,6 +26,10 @@ from docx.shared import Pt, Inches
 
 logger = logging.getLogger(__name__)
 
+# Owner of each queued task, kept as long as Celery keeps task results
+TASK_OWNER_CACHE_KEY = 'tasks:owner:{task_id}'
+TASK_OWNER_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 @shared_task(bind=True)
 def generic_task(self, task_type, *args, **kwargs):
@@ -238,6 +247,30 @@ def calculate_funding_async(self, application_id, calculation_input, user_id):
         raise
 
 
+def remember_task_owner(task_id, user_id):
+    """
+    Record the user who queued a task.
+    
+    Args:
+        task_id: ID of the task
+        user_id: ID of the user who queued the task
+    """
+    cache.set(TASK_OWNER_CACHE_KEY.format(task_id=task_id), user_id, TASK_OWNER_CACHE_TIMEOUT)
+
+
+def get_task_owner(task_id):
+    """
+    Get the user who queued a task.
+    
+    Args:
+        task_id: ID of the task
+        
+    Returns:
+        ID of the user, or None if the task is unknown
+    """
+    return cache.get(TASK_OWNER_CACHE_KEY.format(task_id=task_id))
+
+
 def get_task_status(task_id):
     """
     Get the status of a task.
@@ -382,6 +415,259 @@ def send_email_async(self, subject, message, recipient_list, html_message=None,
         raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
 
 
+class PooledEmailConnection:
+    """
+    One open email connection per worker process, reused across batches.
+
+    The connection is reopened after EMAIL_CONNECTION_KEEPALIVE seconds
+    idle, since SMTP servers drop idle sessions, and after any send error.
+    """
+
+    def __init__(self, keepalive):
+        self.keepalive = keepalive
+        self._connection = None
+        self._backend = None
+        self._last_used = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self):
+        """Hold the connection for the duration of one batch."""
+        with self._lock:
+            try:
+                yield self
+            finally:
+                self._last_used = time.monotonic()
+
+    def get(self):
+        """Return the open connection, opening a fresh one if needed."""
+        if self._connection is not None and (
+            time.monotonic() - self._last_used > self.keepalive
+            or self._backend != settings.EMAIL_BACKEND
+        ):
+            self.reset()
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+            self._backend = settings.EMAIL_BACKEND
+            self._connection.open()
+        self._last_used = time.monotonic()
+        return self._connection
+
+    def reset(self):
+        """Close the connection so the next send opens a new one."""
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+EMAIL_CONNECTION_KEEPALIVE = getattr(settings, 'EMAIL_CONNECTION_KEEPALIVE', 60)
+EMAIL_BATCH_MAX_ATTEMPTS = 4
+
+email_connection_pool = PooledEmailConnection(EMAIL_CONNECTION_KEEPALIVE)
+
+
+def send_email_batch(messages):
+    """
+    Send many emails over one pooled connection.
+
+    Each message is sent on its own so a failure only affects that message;
+    the connection is reset after a failure. EmailLog rows for messages with
+    a user_id are written with one bulk_create.
+
+    Args:
+        messages: List of dictionaries with subject, message and
+            recipient_list keys, and optionally html_message, from_email,
+            user_id, notification_id and email_type
+
+    Returns:
+        Tuple of (sent messages, list of (failed message, exception) pairs)
+    """
+    from users.models import EmailLog
+
+    test_recipient = None
+    if getattr(settings, 'EMAIL_TEST_MODE', False):
+        test_recipient = getattr(settings, 'EMAIL_TEST_RECIPIENT', 'test@example.com')
+        logger.info(f"Email test mode enabled. Redirecting emails to {test_recipient}")
+
+    sent = []
+    failed = []
+    with email_connection_pool.session() as pool:
+        for entry in messages:
+            email = EmailMultiAlternatives(
+                subject=entry['subject'],
+                body=entry['message'],
+                from_email=entry.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+                to=[test_recipient] if test_recipient else entry['recipient_list']
+            )
+            if entry.get('html_message'):
+                email.attach_alternative(entry['html_message'], "text/html")
+
+            try:
+                pool.get().send_messages([email])
+            except Exception as exc:
+                logger.error(f"Error sending email to {entry['recipient_list']}: {str(exc)}")
+                failed.append((entry, exc))
+                pool.reset()
+                continue
+            sent.append(entry)
+
+    try:
+        EmailLog.objects.bulk_create([
+            EmailLog(
+                user_id=entry['user_id'],
+                subject=entry['subject'],
+                status='sent',
+                notification_id=entry.get('notification_id'),
+                message_body=entry.get('html_message') or entry['message'],
+                email_type=entry.get('email_type')
+            )
+            for entry in sent
+            if entry.get('user_id')
+        ])
+    except Exception as e:
+        logger.error(f"Error logging emails: {str(e)}")
+
+    return sent, failed
+
+
+@shared_task
+def send_email_batch_async(messages):
+    """
+    Send a batch of emails asynchronously over one pooled connection.
+
+    Failed messages are retried individually with exponential backoff, so
+    messages that were delivered are never sent again.
+
+    Args:
+        messages: List of message dictionaries as accepted by send_email_batch,
+            optionally with an attempts count
+
+    Returns:
+        Dictionary with sent, retrying and failed counts
+    """
+    logger.info(f"Sending batch of {len(messages)} emails")
+
+    sent, failed = send_email_batch(messages)
+
+    retries = {}
+    given_up = 0
+    for entry, exc in failed:
+        attempts = entry.get('attempts', 0) + 1
+        if attempts >= EMAIL_BATCH_MAX_ATTEMPTS:
+            logger.error(f"Giving up on email to {entry['recipient_list']} after {attempts} attempts: {str(exc)}")
+            given_up += 1
+            continue
+        retries.setdefault(attempts, []).append({**entry, 'attempts': attempts})
+
+    for attempts, entries in retries.items():
+        send_email_batch_async.apply_async(args=[entries], countdown=60 * (2 ** attempts))
+
+    return {
+        'sent': len(sent),
+        'retrying': sum(len(entries) for entries in retries.values()),
+        'failed': given_up,
+    }
+
+
+def send_notification_emails(emails, email_type=None):
+    """
+    Send a batch of notification emails over one pooled connection.
+
+    Recipients are loaded in one query.
+
+    Args:
+        emails: List of dictionaries with user_id, subject, message and
+            notification_id keys, and optionally email_type
+        email_type: Default type of email being sent (optional)
+
+    Returns:
+        Tuple of (number sent, list of failed entries, last exception)
+    """
+    from users.models import User
+
+    users = User.objects.in_bulk([email['user_id'] for email in emails])
+
+    messages = []
+    for email in emails:
+        user = users.get(email['user_id'])
+        if not user or not user.email:
+            logger.warning(f"Skipping notification email: User with ID {email['user_id']} has no email address")
+            continue
+        messages.append({
+            **email,
+            'recipient_list': [user.email],
+            'email_type': email.get('email_type') or email_type,
+        })
+
+    sent, failed = send_email_batch(messages)
+
+    last_exc = failed[-1][1] if failed else None
+    return len(sent), [entry for entry, _ in failed], last_exc
+
+
+DIGEST_BATCH_SIZE = 100
+
+
+def iter_digest_notifications(preference_field, since):
+    """
+    Stream unread notifications since a time for every user opted in to a digest.
+
+    One query fetches the notifications of all digest users ordered by user,
+    and yields (user, notifications) pairs one user at a time.
+
+    Args:
+        preference_field: NotificationPreference flag the user must have set
+        since: Only include notifications created at or after this time
+    """
+    from users.models import Notification
+
+    notifications = Notification.objects.filter(
+        is_read=False,
+        created_at__gte=since,
+        user__is_active=True,
+        **{f'user__notification_preferences__{preference_field}': True}
+    ).select_related('user').order_by('user_id', '-created_at', '-id')
+
+    for _, user_notifications in groupby(notifications.iterator(chunk_size=2000), key=attrgetter('user_id')):
+        user_notifications = list(user_notifications)
+        yield user_notifications[0].user, user_notifications
+
+
+def queue_email_batches(messages, batch_size=100):
+    """
+    Fan emails out to send_email_batch_async in chunks.
+
+    Args:
+        messages: List of message dictionaries as accepted by send_email_batch
+        batch_size: Number of messages per batch task
+
+    Returns:
+        Number of emails queued
+    """
+    if messages:
+        group([
+            send_email_batch_async.s(messages[i:i + batch_size])
+            for i in range(0, len(messages), batch_size)
+        ]).apply_async()
+    return len(messages)
+
+
+def send_digest_emails(messages):
+    """
+    Fan digest emails out to send_email_batch_async in chunks.
+
+    Args:
+        messages: List of message dictionaries as accepted by send_email_batch
+
+    Returns:
+        Number of emails queued
+    """
+    return queue_email_batches(messages, DIGEST_BATCH_SIZE)
+
+
 @shared_task
 def send_daily_digest():
     """
@@ -389,57 +675,44 @@ def send_daily_digest():
     
     Aggregates notifications from the past 24 hours and sends them in a digest email.
     """
-    from users.models import User, NotificationPreference, Notification
-    from django.template.loader import render_to_string
-    from django.utils.html import strip_tags
+    from django.template.loader import get_template
     
     logger.info("Starting daily digest email task")
     
-    # Get users who have opted in for daily digest
-    users_with_digest = User.objects.filter(
-        notification_preferences__daily_digest=True,
-        is_active=True
-    ).select_related('notification_preferences')
+    now = timezone.now()
+    date = now.strftime('%Y-%m-%d')
     
     # Time threshold for notifications (24 hours ago)
-    time_threshold = timezone.now() - timedelta(days=1)
-    
-    for user in users_with_digest:
-        # Get unread notifications from the past 24 hours
-        notifications = Notification.objects.filter(
-            user=user,
-            created_at__gte=time_threshold,
-            is_read=False
-        ).order_by('-created_at')
-        
-        # Skip if no notifications
-        if not notifications.exists():
-            logger.info(f"No notifications for daily digest for user {user.email}")
-            continue
-        
+    time_threshold = now - timedelta(days=1)
+    
+    # Compile the template once for all users
+    template = get_template('emails/daily_digest.html')
+    
+    messages = []
+    for user, notifications in iter_digest_notifications('daily_digest', time_threshold):
         # Prepare context for email template
         context = {
             'user': user,
             'notifications': notifications,
-            'notification_count': notifications.count(),
-            'date': timezone.now().strftime('%Y-%m-%d')
+            'notification_count': len(notifications),
+            'date': date
         }
         
         # Render email template
-        html_content = render_to_string('emails/daily_digest.html', context)
-        text_content = strip_tags(html_content)
-        
-        # Send email
-        send_email_async.delay(
-            subject=f"Your Daily Digest for {timezone.now().strftime('%Y-%m-%d')}",
-            message=text_content,
-            recipient_list=[user.email],
-            html_message=html_content,
-            user_id=user.id,
-            email_type='daily_digest'
-        )
-        
-        logger.info(f"Daily digest email queued for {user.email} with {notifications.count()} notifications")
+        html_content = template.render(context)
+        
+        messages.append({
+            'subject': f"Your Daily Digest for {date}",
+            'message': strip_tags(html_content),
+            'recipient_list': [user.email],
+            'html_message': html_content,
+            'user_id': user.id,
+            'email_type': 'daily_digest'
+        })
+    
+    queued = send_digest_emails(messages)
+    logger.info(f"Daily digest emails queued for {queued} users")
+    return queued
 
 
 @shared_task
@@ -449,65 +722,51 @@ def send_weekly_digest():
     
     Aggregates notifications from the past 7 days and sends them in a digest email.
     """
-    from users.models import User, NotificationPreference, Notification
-    from django.template.loader import render_to_string
-    from django.utils.html import strip_tags
+    from django.template.loader import get_template
     
     logger.info("Starting weekly digest email task")
     
-    # Get users who have opted in for weekly digest
-    users_with_digest = User.objects.filter(
-        notification_preferences__weekly_digest=True,
-        is_active=True
-    ).select_related('notification_preferences')
+    now = timezone.now()
     
     # Time threshold for notifications (7 days ago)
-    time_threshold = timezone.now() - timedelta(days=7)
-    
-    for user in users_with_digest:
-        # Get unread notifications from the past 7 days
-        notifications = Notification.objects.filter(
-            user=user,
-            created_at__gte=time_threshold,
-            is_read=False
-        ).order_by('-created_at')
-        
-        # Skip if no notifications
-        if not notifications.exists():
-            logger.info(f"No notifications for weekly digest for user {user.email}")
-            continue
-        
+    time_threshold = now - timedelta(days=7)
+    start_date = time_threshold.strftime('%Y-%m-%d')
+    end_date = now.strftime('%Y-%m-%d')
+    
+    # Compile the template once for all users
+    template = get_template('emails/weekly_digest.html')
+    
+    messages = []
+    for user, notifications in iter_digest_notifications('weekly_digest', time_threshold):
         # Group notifications by type for better organization
         notification_groups = {}
         for notification in notifications:
-            if notification.notification_type not in notification_groups:
-                notification_groups[notification.notification_type] = []
-            notification_groups[notification.notification_type].append(notification)
+            notification_groups.setdefault(notification.notification_type, []).append(notification)
         
         # Prepare context for email template
         context = {
             'user': user,
             'notification_groups': notification_groups,
-            'notification_count': notifications.count(),
-            'start_date': time_threshold.strftime('%Y-%m-%d'),
-            'end_date': timezone.now().strftime('%Y-%m-%d')
+            'notification_count': len(notifications),
+            'start_date': start_date,
+            'end_date': end_date
         }
         
         # Render email template
-        html_content = render_to_string('emails/weekly_digest.html', context)
-        text_content = strip_tags(html_content)
-        
-        # Send email
-        send_email_async.delay(
-            subject=f"Your Weekly Digest ({time_threshold.strftime('%Y-%m-%d')} to {timezone.now().strftime('%Y-%m-%d')})",
-            message=text_content,
-            recipient_list=[user.email],
-            html_message=html_content,
-            user_id=user.id,
-            email_type='weekly_digest'
-        )
-        
-        logger.info(f"Weekly digest email queued for {user.email} with {notifications.count()} notifications")
+        html_content = template.render(context)
+        
+        messages.append({
+            'subject': f"Your Weekly Digest ({start_date} to {end_date})",
+            'message': strip_tags(html_content),
+            'recipient_list': [user.email],
+            'html_message': html_content,
+            'user_id': user.id,
+            'email_type': 'weekly_digest'
+        })
+    
+    queued = send_digest_emails(messages)
+    logger.info(f"Weekly digest emails queued for {queued} users")
+    return queued
 
 
 @shared_task
@@ -0,0 +1,23 @@
+"""
+Tests for the Celery beat schedule.
+"""
+
+from django.test import SimpleTestCase
+
+from crm_backend.celery import app
+
+
+class BeatScheduleTestCase(SimpleTestCase):
+    """
+    Test case for the periodic task schedule.
+    """
+    
+    def test_scheduled_tasks_are_registered(self):
+        """
+        Test that every scheduled task name is registered with a worker.
+        """
+        app.loader.import_default_modules()
+        
+        for entry_name, entry in app.conf.beat_schedule.items():
+            with self.subTest(entry=entry_name):
+                self.assertIn(entry['task'], app.tasks)
@@ -2,13 +2,15 @@
 Tests for asynchronous task views.
 """
 
-from django.test import TestCase
-from django.urls import reverse
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse, NoReverseMatch
 from rest_framework.test import APIClient
 from rest_framework import status
 from unittest.mock import patch, MagicMock
 from django.contrib.auth import get_user_model
 from applications.models import Application
+from crm_backend.tasks import get_task_owner, remember_task_owner
 
 User = get_user_model()
 
@@ -46,7 +48,23 @@ class TaskViewsTestCase(TestCase):
         # Set up API client
         self.client = APIClient()
         self.client.force_authenticate(user=self.user)
+        
+        # Record the test user as the owner of the test task
+        cache.clear()
+        self.addCleanup(cache.clear)
+        remember_task_owner('test-task-id', self.user.id)
+    
+    def test_only_task_endpoints_mounted(self):
+        """
+        Test that only the task status and result endpoints are routed.
+        """
+        self.assertEqual(reverse('task-status', kwargs={'task_id': 'test-task-id'}), '/api/tasks/test-task-id/status/')
+        self.assertEqual(reverse('task-result', kwargs={'task_id': 'test-task-id'}), '/api/tasks/test-task-id/result/')
+        for name in ['generate-document-async', 'generate-pdf-async', 'funding-calculation-async']:
+            with self.assertRaises(NoReverseMatch):
+                reverse(name, kwargs={'application_id': self.application.id})
     
+    @override_settings(ROOT_URLCONF='crm_backend.task_urls')
     @patch('crm_backend.task_views.generate_document_async')
     def test_generate_document_async_view(self, mock_task):
         """
@@ -64,6 +82,7 @@ class TaskViewsTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
         self.assertEqual(response.data['task_id'], 'test-task-id')
         self.assertEqual(response.data['status'], 'PENDING')
+        self.assertEqual(get_task_owner('test-task-id'), self.user.id)
         
         # Check task was called with correct arguments
         mock_task.delay.assert_called_once_with(
@@ -72,6 +91,7 @@ class TaskViewsTestCase(TestCase):
             user_id=self.user.id
         )
     
+    @override_settings(ROOT_URLCONF='crm_backend.task_urls')
     @patch('crm_backend.task_views.generate_pdf_async')
     def test_generate_pdf_async_view(self, mock_task):
         """
@@ -105,6 +125,7 @@ class TaskViewsTestCase(TestCase):
             user_id=self.user.id
         )
     
+    @override_settings(ROOT_URLCONF='crm_backend.task_urls')
     @patch('crm_backend.task_views.calculate_funding_async')
     def test_calculate_funding_async_view(self, mock_task):
         """
@@ -208,4 +229,25 @@ class TaskViewsTestCase(TestCase):
         self.assertEqual(response.data['status'], 'PENDING')
         
         # Check function was called with correct arguments
-        mock_get_result.assert_called_once_with('test-task-id')
\ No newline at end of file
+        mock_get_result.assert_called_once_with('test-task-id')
+    
+    @patch('crm_backend.task_views.get_task_result')
+    @patch('crm_backend.task_views.get_task_status')
+    def test_task_views_other_user(self, mock_get_status, mock_get_result):
+        """
+        Test that tasks queued by another user or unknown tasks are not found.
+        """
+        other_user = User.objects.create_user(
+            email='other@example.com',
+            password='testpassword',
+            role='admin'
+        )
+        self.client.force_authenticate(user=other_user)
+        
+        for task_id in ['test-task-id', 'unknown-task-id']:
+            for name in ['task-status', 'task-result']:
+                response = self.client.get(reverse(name, kwargs={'task_id': task_id}))
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        mock_get_status.assert_not_called()
+        mock_get_result.assert_not_called()
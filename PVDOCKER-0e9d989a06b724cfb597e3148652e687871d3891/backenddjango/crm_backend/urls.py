@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework import permissions
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from .task_views import task_status_view, task_result_view
 
 # Remove drf-yasg and use drf-spectacular instead
 urlpatterns = [
@@ -16,6 +17,9 @@ urlpatterns = [
     path('api/products/', include('products.urls')),
     path('api/reports/', include('reports.urls')),
     path('api/reminders/', include('reminders.urls')),
+    # Status and result of asynchronous tasks
+    path('api/tasks/<str:task_id>/status/', task_status_view, name='task-status'),
+    path('api/tasks/<str:task_id>/result/', task_result_view, name='task-result'),
     # API documentation with drf-spectacular
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Document, Note, Fee, Repayment, Ledger, NoteComment
+from .models import Document, Note, Fee, Repayment, Ledger, NoteComment, BankStatementImport, BankStatementLine
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
@@ -121,3 +121,19 @@ class NoteCommentAdmin(admin.ModelAdmin):
             return f"{obj.content[:50]}..."
         return obj.content
     content_preview.short_description = 'Content'
+
+@admin.register(BankStatementImport)
+class BankStatementImportAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'file_format', 'total_lines', 'matched_lines', 'unmatched_lines', 'duplicate_lines', 'created_at')
+    list_filter = ('file_format', 'created_at')
+    search_fields = ('file_name',)
+    raw_id_fields = ('created_by',)
+    readonly_fields = ('created_at',)
+
+@admin.register(BankStatementLine)
+class BankStatementLineAdmin(admin.ModelAdmin):
+    list_display = ('statement', 'line_number', 'transaction_date', 'amount', 'reference', 'status', 'match_method')
+    list_filter = ('status', 'match_method', 'transaction_date')
+    search_fields = ('reference', 'description', 'transaction_id')
+    raw_id_fields = ('statement', 'matched_repayment')
+    readonly_fields = ('created_at', 'updated_at')
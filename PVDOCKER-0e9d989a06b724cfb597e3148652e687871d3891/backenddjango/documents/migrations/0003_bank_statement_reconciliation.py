@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('documents', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankStatementImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(blank=True, default='', max_length=255, null=True)),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('ofx', 'OFX')], default='csv', max_length=10)),
+                ('total_lines', models.PositiveIntegerField(default=0)),
+                ('matched_lines', models.PositiveIntegerField(default=0)),
+                ('unmatched_lines', models.PositiveIntegerField(default=0)),
+                ('duplicate_lines', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankStatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_number', models.PositiveIntegerField()),
+                ('transaction_date', models.DateField(blank=True, null=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('reference', models.CharField(blank=True, default='', max_length=255, null=True)),
+                ('description', models.TextField(blank=True, default='', null=True)),
+                ('transaction_id', models.CharField(blank=True, db_index=True, help_text='Bank transaction identifier (e.g. OFX FITID)', max_length=100, null=True)),
+                ('status', models.CharField(choices=[('matched', 'Matched'), ('unmatched', 'Unmatched'), ('duplicate', 'Duplicate'), ('ignored', 'Ignored')], default='unmatched', max_length=20)),
+                ('match_method', models.CharField(blank=True, choices=[('reference', 'Reference'), ('amount_date', 'Amount and Date'), ('manual', 'Manual')], max_length=20, null=True)),
+                ('review_note', models.CharField(blank=True, default='', max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('matched_repayment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statement_lines', to='documents.repayment')),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='documents.bankstatementimport')),
+            ],
+            options={
+                'ordering': ['statement', 'line_number'],
+                'indexes': [models.Index(fields=['status', 'transaction_date'], name='documents_b_status_755da5_idx')],
+            },
+        ),
+    ]
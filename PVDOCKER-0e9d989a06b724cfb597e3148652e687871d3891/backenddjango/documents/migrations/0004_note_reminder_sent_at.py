@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:37
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def mark_past_reminders_sent(apps, schema_editor):
+    # Reminders in the past were handled by the old daily task
+    Note = apps.get_model('documents', 'Note')
+    Note.objects.filter(remind_date__lt=timezone.now()).update(reminder_sent_at=F('remind_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_bank_statement_reconciliation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['remind_date'], name='documents_note_remind_idx'),
+        ),
+        migrations.RunPython(mark_past_reminders_sent, migrations.RunPython.noop),
+    ]
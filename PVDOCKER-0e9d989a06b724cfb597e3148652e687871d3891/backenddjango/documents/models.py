@@ -84,6 +84,7 @@ class Note(models.Model):
     title = models.CharField(max_length=255, null=True, blank=True, default='Note')
     content = models.TextField(null=True, blank=True, default='')
     remind_date = models.DateTimeField(null=True, blank=True)
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)
     
     # Relationships
     application = models.ForeignKey('applications.Application', on_delete=models.CASCADE, related_name='notes', null=True, blank=True)
@@ -97,11 +98,15 @@ class Note(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    # Track changes to assigned_to field
-    tracker = FieldTracker(fields=['assigned_to'])
+    # Track changes to assigned_to and remind_date fields
+    tracker = FieldTracker(fields=['assigned_to', 'remind_date'])
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Due note reminder lookups
+            models.Index(fields=['remind_date'], name='documents_note_remind_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -111,6 +116,10 @@ class Note(models.Model):
         if self.tracker.has_changed('assigned_to'):
             self._assigned_to_changed = True
         
+        # A rescheduled reminder should be sent again
+        if self.pk and self.tracker.has_changed('remind_date'):
+            self.reminder_sent_at = None
+        
         super().save(*args, **kwargs)
 
 
@@ -219,6 +228,81 @@ class Ledger(models.Model):
         return f"{self.get_transaction_type_display()} - ${self.amount}"
 
 
+class BankStatementImport(models.Model):
+    """
+    Model for an imported bank statement file
+    """
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ofx', 'OFX'),
+    ]
+    
+    file_name = models.CharField(max_length=255, null=True, blank=True, default='')
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    total_lines = models.PositiveIntegerField(default=0)
+    matched_lines = models.PositiveIntegerField(default=0)
+    unmatched_lines = models.PositiveIntegerField(default=0)
+    duplicate_lines = models.PositiveIntegerField(default=0)
+    
+    # Metadata
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Bank statement {self.file_name} ({self.created_at:%Y-%m-%d})"
+
+
+class BankStatementLine(models.Model):
+    """
+    Model for a single transaction line from an imported bank statement.
+    
+    Unmatched lines form the reconciliation review queue.
+    """
+    STATUS_CHOICES = [
+        ('matched', 'Matched'),
+        ('unmatched', 'Unmatched'),
+        ('duplicate', 'Duplicate'),
+        ('ignored', 'Ignored'),
+    ]
+    
+    MATCH_METHOD_CHOICES = [
+        ('reference', 'Reference'),
+        ('amount_date', 'Amount and Date'),
+        ('manual', 'Manual'),
+    ]
+    
+    statement = models.ForeignKey(BankStatementImport, on_delete=models.CASCADE, related_name='lines')
+    line_number = models.PositiveIntegerField()
+    transaction_date = models.DateField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    reference = models.CharField(max_length=255, null=True, blank=True, default='')
+    description = models.TextField(null=True, blank=True, default='')
+    transaction_id = models.CharField(max_length=100, null=True, blank=True, db_index=True,
+                                      help_text="Bank transaction identifier (e.g. OFX FITID)")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='unmatched')
+    match_method = models.CharField(max_length=20, choices=MATCH_METHOD_CHOICES, null=True, blank=True)
+    review_note = models.CharField(max_length=255, null=True, blank=True, default='')
+    
+    # Relationships
+    matched_repayment = models.ForeignKey(Repayment, on_delete=models.SET_NULL, null=True, blank=True, related_name='statement_lines')
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['statement', 'line_number']
+        indexes = [
+            models.Index(fields=['status', 'transaction_date']),
+        ]
+    
+    def __str__(self):
+        return f"Line {self.line_number}: ${self.amount} on {self.transaction_date} ({self.status})"
+
+
 class NoteComment(models.Model):
     """
     Model for comments on notes
@@ -0,0 +1,477 @@
+"""
+Bank statement reconciliation
+
+Streams CSV or OFX bank statements, matches credit lines to open
+repayments using in-memory indexes, and applies every match in a single
+transaction with bulk writes. Matched repayments are locked and re-checked
+in that transaction, so concurrent imports never pay a repayment twice.
+Lines that cannot be matched confidently are left in the review queue as
+unmatched BankStatementLine rows.
+"""
+
+import csv
+import io
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BankStatementImport, BankStatementLine, Ledger, Repayment
+
+
+# Lines received this many days either side of a due date can match by amount
+AMOUNT_DATE_TOLERANCE_DAYS = 7
+
+BULK_BATCH_SIZE = 1000
+
+CSV_DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y%m%d']
+
+# Accepted CSV header names for each statement field
+CSV_COLUMNS = {
+    'date': ['date', 'transaction date', 'posted date', 'value date'],
+    'amount': ['amount', 'credit', 'credit amount'],
+    'reference': ['reference', 'ref', 'payment reference'],
+    'description': ['description', 'narrative', 'details', 'memo'],
+    'transaction_id': ['transaction id', 'id', 'fitid'],
+}
+
+REFERENCE_TOKEN = re.compile(r'[A-Z0-9][A-Z0-9-]{3,}')
+OFX_TAG = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+def normalize_reference(value):
+    """Normalize a reference for index lookups (upper case, alphanumeric only)"""
+    return re.sub(r'[^A-Z0-9]', '', (value or '').upper())
+
+
+def parse_amount(value):
+    """
+    Parse a statement amount, tolerating currency symbols and separators
+
+    Returns:
+        Decimal amount or None if the value cannot be parsed
+    """
+    cleaned = re.sub(r'[^0-9.\-]', '', str(value or ''))
+    try:
+        return Decimal(cleaned).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def parse_statement_date(value):
+    """
+    Parse a statement date in any supported CSV or OFX format
+
+    Returns:
+        date or None if the value cannot be parsed
+    """
+    value = (value or '').strip()
+    # OFX dates are YYYYMMDD optionally followed by a time and timezone
+    if len(value) > 8 and value[:8].isdigit():
+        value = value[:8]
+    for date_format in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def detect_statement_format(file_name):
+    """Return the statement format implied by a file name"""
+    return 'ofx' if (file_name or '').lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+
+def iter_csv_transactions(text_stream):
+    """
+    Yield raw transaction dictionaries from a CSV statement
+
+    Args:
+        text_stream: Text file object positioned at the header row
+    """
+    reader = csv.reader(text_stream)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    header = [column.strip().lower() for column in header]
+    positions = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in header:
+                positions[field] = header.index(alias)
+                break
+
+    if 'amount' not in positions or 'date' not in positions:
+        raise ValueError("CSV statement must have date and amount columns")
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield {
+            field: row[position].strip() if position < len(row) else ''
+            for field, position in positions.items()
+        }
+
+
+def iter_ofx_transactions(text_stream):
+    """
+    Yield raw transaction dictionaries from an OFX statement
+
+    Transactions are read one <STMTTRN> block at a time, so the whole
+    statement is never held in memory.
+
+    Args:
+        text_stream: Text file object
+    """
+    buffer = ''
+    for chunk in text_stream:
+        buffer += chunk
+        while '</STMTTRN>' in buffer.upper():
+            end = buffer.upper().index('</STMTTRN>')
+            block, buffer = buffer[:end], buffer[end + len('</STMTTRN>'):]
+            tags = {name.upper(): value.strip() for name, value in OFX_TAG.findall(block)}
+            yield {
+                'date': tags.get('DTPOSTED', ''),
+                'amount': tags.get('TRNAMT', ''),
+                'reference': tags.get('REFNUM') or tags.get('CHECKNUM') or '',
+                'description': ' '.join(filter(None, [tags.get('NAME'), tags.get('MEMO')])),
+                'transaction_id': tags.get('FITID', ''),
+            }
+
+
+def iter_statement_lines(file, file_format='csv'):
+    """
+    Stream unsaved BankStatementLine objects from a statement file
+
+    Args:
+        file: Binary file object (e.g. an uploaded file)
+        file_format: 'csv' or 'ofx'
+
+    Yields:
+        Unsaved BankStatementLine objects without a statement set
+    """
+    text_stream = io.TextIOWrapper(getattr(file, 'file', file), encoding='utf-8-sig', newline='')
+    try:
+        transactions = iter_ofx_transactions(text_stream) if file_format == 'ofx' else iter_csv_transactions(text_stream)
+        for line_number, raw in enumerate(transactions, start=1):
+            amount = parse_amount(raw.get('amount'))
+            line = BankStatementLine(
+                line_number=line_number,
+                transaction_date=parse_statement_date(raw.get('date')),
+                amount=amount if amount is not None else Decimal('0.00'),
+                reference=raw.get('reference', '')[:255],
+                description=raw.get('description', ''),
+                transaction_id=raw.get('transaction_id') or None,
+            )
+            if amount is None or line.transaction_date is None:
+                line.status = 'ignored'
+                line.review_note = 'Could not parse date or amount'
+            elif amount <= 0:
+                line.status = 'ignored'
+                line.review_note = 'Debit transaction'
+            yield line
+    finally:
+        # Leave the underlying upload open for the caller
+        text_stream.detach()
+
+
+def build_repayment_indexes(repayments):
+    """
+    Index open repayments by application reference and by amount
+
+    Args:
+        repayments: Iterable of unpaid Repayment objects with application
+            loaded, ordered by due date
+
+    Returns:
+        Tuple of (by_reference, by_amount). by_reference maps a normalized
+        reference to a list of repayments; by_amount maps an amount to a
+        (due_dates, repayments) pair of parallel lists for date range lookups
+    """
+    by_reference = defaultdict(list)
+    by_amount = defaultdict(lambda: ([], []))
+    for repayment in repayments:
+        by_reference[normalize_reference(repayment.application.reference_number)].append(repayment)
+        if repayment.due_date:
+            due_dates, amount_repayments = by_amount[repayment.amount]
+            due_dates.append(repayment.due_date)
+            amount_repayments.append(repayment)
+    return by_reference, by_amount
+
+
+def match_statement_line(line, by_reference, by_amount, matched_ids):
+    """
+    Find the open repayment a statement line pays
+
+    A line matches by reference when it quotes an application reference and
+    that application has an open repayment for the exact amount. Otherwise
+    it matches by amount when exactly one open repayment for that amount is
+    due within AMOUNT_DATE_TOLERANCE_DAYS of the transaction date.
+
+    Args:
+        line: BankStatementLine
+        by_reference: Reference index from build_repayment_indexes
+        by_amount: Amount index from build_repayment_indexes
+        matched_ids: Set of repayment IDs already claimed in this import
+
+    Returns:
+        Tuple of (repayment, match_method, review_note); repayment is None
+        when the line is left for review
+    """
+    text = f"{line.reference or ''} {line.description or ''}".upper()
+    referenced = False
+    for token in REFERENCE_TOKEN.findall(text):
+        candidates = by_reference.get(normalize_reference(token))
+        if not candidates:
+            continue
+        referenced = True
+        for repayment in candidates:
+            if repayment.id not in matched_ids and repayment.amount == line.amount:
+                return repayment, 'reference', ''
+
+    if referenced:
+        return None, None, 'Reference found but no open repayment for this amount'
+
+    candidates = []
+    if line.amount in by_amount:
+        due_dates, amount_repayments = by_amount[line.amount]
+        tolerance = timedelta(days=AMOUNT_DATE_TOLERANCE_DAYS)
+        start = bisect_left(due_dates, line.transaction_date - tolerance)
+        end = bisect_right(due_dates, line.transaction_date + tolerance)
+        candidates = [r for r in amount_repayments[start:end] if r.id not in matched_ids]
+
+    if len(candidates) == 1:
+        return candidates[0], 'amount_date', ''
+    if candidates:
+        return None, None, f'{len(candidates)} open repayments match this amount and date'
+    return None, None, 'No matching open repayment'
+
+
+def lock_open_repayments(repayment_ids):
+    """
+    Lock repayments for update and return the IDs of those still unpaid
+
+    Must be called inside a transaction, so a repayment paid by a concurrent
+    import or manual match is not paid twice.
+
+    Args:
+        repayment_ids: IDs of the repayments to lock
+
+    Returns:
+        Set of the IDs that are still unpaid
+    """
+    return set(
+        Repayment.objects.select_for_update()
+        .filter(id__in=repayment_ids, paid_date__isnull=True)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def apply_repayment_matches(matches, user):
+    """
+    Mark matched repayments paid and post their ledger entries in bulk
+
+    Also records an ActiveLoanRepayment for repayments on active loans and
+    marks the matching scheduled interest payment as paid. Must be called
+    inside a transaction, with the repayments locked by lock_open_repayments.
+
+    Args:
+        matches: List of (BankStatementLine, Repayment) pairs
+        user: User performing the reconciliation
+    """
+    from applications.models import ActiveLoan, ActiveLoanRepayment, InterestPaymentDue
+    from applications.services.active_loans import invalidate_active_loan_dashboard
+
+    if not matches:
+        return
+
+    now = timezone.now()
+    repayments = []
+    for line, repayment in matches:
+        repayment.paid_date = line.transaction_date
+        repayment.updated_at = now
+        repayments.append(repayment)
+    Repayment.objects.bulk_update(repayments, ['paid_date', 'updated_at'], batch_size=BULK_BATCH_SIZE)
+
+    # bulk_update bypasses the post_save signal that normally posts the ledger entry
+    Ledger.objects.bulk_create([
+        Ledger(
+            application_id=repayment.application_id,
+            transaction_type='repayment_received',
+            amount=repayment.amount,
+            description=f"Repayment received for {repayment.due_date}",
+            transaction_date=timezone.make_aware(
+                datetime.combine(repayment.paid_date, datetime.min.time())
+            ),
+            related_repayment=repayment,
+            created_by=user
+        )
+        for repayment in repayments
+    ], batch_size=BULK_BATCH_SIZE)
+
+    active_loans = dict(
+        ActiveLoan.objects.filter(
+            application_id__in={repayment.application_id for repayment in repayments},
+            is_active=True
+        ).values_list('application_id', 'id')
+    )
+    if not active_loans:
+        return
+
+    loan_repayments = [
+        ActiveLoanRepayment(
+            active_loan_id=active_loans[repayment.application_id],
+            repayment_type='principal_interest',
+            amount=line.amount,
+            payment_date=line.transaction_date,
+            due_date=repayment.due_date,
+            reference_number=(line.transaction_id or line.reference or '')[:100] or None,
+            notes='Reconciled from bank statement',
+            is_late=bool(repayment.due_date and line.transaction_date > repayment.due_date)
+        )
+        for line, repayment in matches
+        if repayment.application_id in active_loans
+    ]
+    ActiveLoanRepayment.objects.bulk_create(loan_repayments, batch_size=BULK_BATCH_SIZE)
+
+    paid_schedule = {(r.active_loan_id, r.due_date) for r in loan_repayments if r.due_date}
+    due_rows = [
+        row for row in InterestPaymentDue.objects.filter(
+            active_loan_id__in={loan_id for loan_id, _ in paid_schedule},
+            due_date__in={due_date for _, due_date in paid_schedule},
+            paid=False
+        )
+        if (row.active_loan_id, row.due_date) in paid_schedule
+    ]
+    for row in due_rows:
+        row.paid = True
+    InterestPaymentDue.objects.bulk_update(due_rows, ['paid'], batch_size=BULK_BATCH_SIZE)
+
+    transaction.on_commit(invalidate_active_loan_dashboard)
+
+
+def import_bank_statement(file, user, file_name=None, file_format=None):
+    """
+    Import a bank statement and reconcile it against open repayments
+
+    The statement is parsed as a stream, matched against in-memory indexes
+    of every open repayment, and all writes happen in one transaction.
+    Lines whose transaction ID was already imported are marked duplicate.
+
+    Args:
+        file: Binary file object (e.g. an uploaded file)
+        user: User performing the import
+        file_name: Original file name (optional, defaults to file.name)
+        file_format: 'csv' or 'ofx' (optional, detected from the file name)
+
+    Returns:
+        BankStatementImport object with line counts populated
+    """
+    file_name = file_name or getattr(file, 'name', '') or ''
+    file_format = file_format or detect_statement_format(file_name)
+
+    lines = list(iter_statement_lines(file, file_format))
+
+    transaction_ids = {line.transaction_id for line in lines if line.transaction_id}
+    seen_ids = set(
+        BankStatementLine.objects.filter(transaction_id__in=transaction_ids)
+        .exclude(status='duplicate')
+        .values_list('transaction_id', flat=True)
+    ) if transaction_ids else set()
+
+    open_repayments = (
+        Repayment.objects.filter(paid_date__isnull=True)
+        .select_related('application')
+        .only('id', 'amount', 'due_date', 'application_id', 'application__reference_number')
+        .order_by('due_date', 'id')
+    )
+    by_reference, by_amount = build_repayment_indexes(open_repayments.iterator(chunk_size=BULK_BATCH_SIZE))
+
+    matched_ids = set()
+    matches = []
+    for line in lines:
+        if line.status == 'ignored':
+            continue
+        if line.transaction_id and line.transaction_id in seen_ids:
+            line.status = 'duplicate'
+            line.review_note = 'Transaction already imported'
+            continue
+        if line.transaction_id:
+            seen_ids.add(line.transaction_id)
+
+        repayment, match_method, review_note = match_statement_line(line, by_reference, by_amount, matched_ids)
+        if repayment:
+            matched_ids.add(repayment.id)
+            line.status = 'matched'
+            line.match_method = match_method
+            line.matched_repayment = repayment
+            matches.append((line, repayment))
+        else:
+            line.status = 'unmatched'
+            line.review_note = review_note
+
+    with transaction.atomic():
+        # Repayments paid since the indexes were built go back to review
+        open_ids = lock_open_repayments([repayment.id for _, repayment in matches])
+        for line, repayment in matches:
+            if repayment.id not in open_ids:
+                line.status = 'unmatched'
+                line.match_method = None
+                line.matched_repayment = None
+                line.review_note = 'Repayment was paid during the import'
+        matches = [(line, repayment) for line, repayment in matches if repayment.id in open_ids]
+
+        statement = BankStatementImport.objects.create(
+            file_name=file_name,
+            file_format=file_format,
+            total_lines=len(lines),
+            matched_lines=len(matches),
+            unmatched_lines=sum(1 for line in lines if line.status == 'unmatched'),
+            duplicate_lines=sum(1 for line in lines if line.status == 'duplicate'),
+            created_by=user
+        )
+        for line in lines:
+            line.statement = statement
+        BankStatementLine.objects.bulk_create(lines, batch_size=BULK_BATCH_SIZE)
+        apply_repayment_matches(matches, user)
+
+    return statement
+
+
+def resolve_statement_line(line, repayment, user):
+    """
+    Manually match a line from the review queue to a repayment
+
+    Args:
+        line: Unmatched BankStatementLine
+        repayment: Unpaid Repayment the line pays
+        user: User resolving the line
+
+    Returns:
+        Updated BankStatementLine
+    """
+    with transaction.atomic():
+        if not BankStatementLine.objects.select_for_update().filter(pk=line.pk, status='unmatched').exists():
+            raise ValueError("Only unmatched lines can be resolved")
+        if not lock_open_repayments([repayment.id]):
+            raise ValueError("Repayment has already been paid")
+
+        line.status = 'matched'
+        line.match_method = 'manual'
+        line.matched_repayment = repayment
+        line.review_note = ''
+        line.save(update_fields=['status', 'match_method', 'matched_repayment', 'review_note', 'updated_at'])
+        BankStatementImport.objects.filter(pk=line.statement_id).update(
+            matched_lines=F('matched_lines') + 1,
+            unmatched_lines=F('unmatched_lines') - 1
+        )
+        apply_repayment_matches([(line, repayment)], user)
+
+    return line
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Document, Note, Fee, Repayment, Ledger, NoteComment
+from .models import Document, Note, Fee, Repayment, Ledger, NoteComment, BankStatementImport, BankStatementLine
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -101,7 +101,7 @@ class NoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Note
         fields = '__all__'
-        read_only_fields = ['created_by', 'created_at', 'updated_at']
+        read_only_fields = ['created_by', 'reminder_sent_at', 'created_at', 'updated_at']
         extra_kwargs = {
             # Make most fields optional and allow null/blank values for minimal data creation
             'title': {'required': False, 'allow_null': True, 'allow_blank': True},
@@ -244,4 +244,50 @@ class ApplicationLedgerSerializer(serializers.Serializer):
     total_funded = serializers.DecimalField(max_digits=15, decimal_places=2)
     total_repaid = serializers.DecimalField(max_digits=15, decimal_places=2)
     total_fees = serializers.DecimalField(max_digits=15, decimal_places=2)
-    balance = serializers.DecimalField(max_digits=15, decimal_places=2)
\ No newline at end of file
+    balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+
+
+class BankStatementLineSerializer(serializers.ModelSerializer):
+    """
+    Serializer for imported bank statement lines
+    """
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = BankStatementLine
+        fields = [
+            'id', 'statement', 'line_number', 'transaction_date', 'amount', 'reference',
+            'description', 'transaction_id', 'status', 'status_display', 'match_method',
+            'review_note', 'matched_repayment', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class BankStatementImportSerializer(serializers.ModelSerializer):
+    """
+    Serializer for bank statement imports
+    """
+    created_by_name = serializers.StringRelatedField(source='created_by')
+    
+    class Meta:
+        model = BankStatementImport
+        fields = [
+            'id', 'file_name', 'file_format', 'total_lines', 'matched_lines',
+            'unmatched_lines', 'duplicate_lines', 'created_by', 'created_by_name', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class BankStatementUploadSerializer(serializers.Serializer):
+    """
+    Serializer for uploading a bank statement file
+    """
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=BankStatementImport.FORMAT_CHOICES, required=False)
+
+
+class BankStatementLineResolveSerializer(serializers.Serializer):
+    """
+    Serializer for manually matching a statement line to a repayment
+    """
+    repayment = serializers.PrimaryKeyRelatedField(queryset=Repayment.objects.filter(paid_date__isnull=True))
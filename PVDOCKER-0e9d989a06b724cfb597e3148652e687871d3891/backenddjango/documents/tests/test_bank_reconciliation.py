@@ -0,0 +1,228 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from applications.models import ActiveLoan, ActiveLoanRepayment, Application
+from documents.models import BankStatementImport, Ledger, Repayment
+from documents.reconciliation import build_repayment_indexes, import_bank_statement, resolve_statement_line
+
+User = get_user_model()
+
+
+class BankReconciliationTestBase(APITestCase):
+    """
+    Base test class for bank statement reconciliation tests
+    """
+    def setUp(self):
+        self.accounts_user = User.objects.create_user(
+            email='accounts@example.com',
+            password='password123',
+            role='accounts'
+        )
+        self.application = Application.objects.create(
+            reference_number='APP-RECON001',
+            loan_amount=Decimal('100000.00'),
+            created_by=self.accounts_user
+        )
+        self.other_application = Application.objects.create(
+            reference_number='APP-RECON002',
+            loan_amount=Decimal('50000.00'),
+            created_by=self.accounts_user
+        )
+        self.due_date = date(2024, 3, 1)
+        self.repayment = Repayment.objects.create(
+            application=self.application,
+            amount=Decimal('1500.00'),
+            due_date=self.due_date
+        )
+        self.other_repayment = Repayment.objects.create(
+            application=self.other_application,
+            amount=Decimal('820.50'),
+            due_date=self.due_date
+        )
+
+    def make_csv(self, rows, name='statement.csv'):
+        content = 'Date,Amount,Reference,Description,Transaction ID\n' + '\n'.join(rows)
+        return SimpleUploadedFile(name, content.encode('utf-8'), content_type='text/csv')
+
+
+class TestBankStatementImport(BankReconciliationTestBase):
+    """
+    Tests for importing and matching bank statements
+    """
+    def test_matches_by_reference_and_amount_date(self):
+        statement = import_bank_statement(self.make_csv([
+            '2024-03-02,1500.00,APP-RECON001,Loan repayment,T1',
+            '03/03/2024,$820.50,,Transfer from borrower,T2',
+            '2024-03-02,999.99,,Unknown payer,T3',
+            '2024-03-02,-50.00,,Bank fee,T4',
+        ]), self.accounts_user)
+
+        self.assertEqual(statement.total_lines, 4)
+        self.assertEqual(statement.matched_lines, 2)
+        self.assertEqual(statement.unmatched_lines, 1)
+
+        lines = {line.transaction_id: line for line in statement.lines.all()}
+        self.assertEqual(lines['T1'].match_method, 'reference')
+        self.assertEqual(lines['T2'].match_method, 'amount_date')
+        self.assertEqual(lines['T3'].status, 'unmatched')
+        self.assertEqual(lines['T4'].status, 'ignored')
+
+        self.repayment.refresh_from_db()
+        self.assertEqual(self.repayment.paid_date, date(2024, 3, 2))
+        self.assertEqual(
+            Ledger.objects.filter(transaction_type='repayment_received', related_repayment=self.repayment).count(),
+            1
+        )
+
+    def test_reference_with_wrong_amount_goes_to_review(self):
+        statement = import_bank_statement(self.make_csv([
+            '2024-03-02,1400.00,APP-RECON001,Short payment,T1',
+        ]), self.accounts_user)
+
+        line = statement.lines.get()
+        self.assertEqual(line.status, 'unmatched')
+        self.assertIn('Reference found', line.review_note)
+        self.repayment.refresh_from_db()
+        self.assertIsNone(self.repayment.paid_date)
+
+    def test_ambiguous_amount_goes_to_review(self):
+        Repayment.objects.create(
+            application=self.other_application,
+            amount=Decimal('1500.00'),
+            due_date=self.due_date + timedelta(days=2)
+        )
+        statement = import_bank_statement(self.make_csv([
+            '2024-03-02,1500.00,,Transfer,T1',
+        ]), self.accounts_user)
+
+        self.assertEqual(statement.lines.get().status, 'unmatched')
+
+    def test_reimported_transactions_are_duplicates(self):
+        rows = ['2024-03-02,1500.00,APP-RECON001,Loan repayment,T1']
+        import_bank_statement(self.make_csv(rows), self.accounts_user)
+        statement = import_bank_statement(self.make_csv(rows), self.accounts_user)
+
+        self.assertEqual(statement.duplicate_lines, 1)
+        self.assertEqual(Ledger.objects.filter(transaction_type='repayment_received').count(), 1)
+
+    def test_repayment_paid_during_import_goes_to_review(self):
+        def pay_after_indexing(repayments):
+            indexes = build_repayment_indexes(repayments)
+            # Another import pays the repayment before this one commits
+            Repayment.objects.filter(pk=self.repayment.pk).update(paid_date=date(2024, 3, 1))
+            return indexes
+
+        with patch('documents.reconciliation.build_repayment_indexes', side_effect=pay_after_indexing):
+            statement = import_bank_statement(self.make_csv([
+                '2024-03-02,1500.00,APP-RECON001,Loan repayment,T1',
+            ]), self.accounts_user)
+
+        self.assertEqual((statement.matched_lines, statement.unmatched_lines), (0, 1))
+        line = statement.lines.get()
+        self.assertEqual(line.status, 'unmatched')
+        self.assertIsNone(line.matched_repayment)
+        self.repayment.refresh_from_db()
+        self.assertEqual(self.repayment.paid_date, date(2024, 3, 1))
+        self.assertFalse(Ledger.objects.filter(transaction_type='repayment_received').exists())
+
+    def test_resolve_rejects_repayment_paid_elsewhere(self):
+        statement = import_bank_statement(self.make_csv([
+            '2024-03-20,1500.00,,Late transfer,T1',
+        ]), self.accounts_user)
+        line = statement.lines.get()
+        stale_repayment = Repayment.objects.get(pk=self.repayment.pk)
+        Repayment.objects.filter(pk=self.repayment.pk).update(paid_date=date(2024, 3, 1))
+
+        with self.assertRaises(ValueError):
+            resolve_statement_line(line, stale_repayment, self.accounts_user)
+
+        line.refresh_from_db()
+        self.assertEqual(line.status, 'unmatched')
+        self.assertFalse(Ledger.objects.filter(transaction_type='repayment_received').exists())
+
+    def test_ofx_statement(self):
+        content = (
+            'OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            '<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240302120000<TRNAMT>1500.00'
+            '<FITID>OFX1<NAME>BORROWER<MEMO>APP-RECON001</STMTTRN>\n'
+            '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+        )
+        statement = import_bank_statement(
+            SimpleUploadedFile('statement.ofx', content.encode('utf-8')),
+            self.accounts_user
+        )
+
+        self.assertEqual(statement.file_format, 'ofx')
+        self.assertEqual(statement.matched_lines, 1)
+
+    def test_active_loan_repayment_recorded(self):
+        self.application.stage = 'settled'
+        self.application.save()
+        active_loan, _ = ActiveLoan.objects.get_or_create(
+            application=self.application,
+            defaults={'settlement_date': date(2024, 1, 1), 'loan_expiry_date': date(2025, 1, 1)}
+        )
+
+        import_bank_statement(self.make_csv([
+            '2024-03-05,1500.00,APP-RECON001,Loan repayment,T1',
+        ]), self.accounts_user)
+
+        loan_repayment = ActiveLoanRepayment.objects.get(active_loan=active_loan)
+        self.assertEqual(loan_repayment.amount, Decimal('1500.00'))
+        self.assertTrue(loan_repayment.is_late)
+
+    def test_bulk_import_query_count(self):
+        rows = [f'2024-06-01,{index}.00,,Payment {index},B{index}' for index in range(1, 501)]
+        with CaptureQueriesContext(connection) as queries:
+            statement = import_bank_statement(self.make_csv(rows), self.accounts_user)
+        self.assertEqual(statement.unmatched_lines, 500)
+        # Lines are inserted in bulk batches rather than one query per line
+        self.assertLess(len(queries), 20)
+
+
+class TestBankStatementAPI(BankReconciliationTestBase):
+    """
+    Tests for the bank statement endpoints and review queue
+    """
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.accounts_user)
+
+    def test_upload_and_resolve_review_line(self):
+        response = self.client.post('/api/documents/bank-statements/', {
+            'file': self.make_csv(['2024-03-20,1500.00,,Late transfer,T1']),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['unmatched_lines'], 1)
+
+        response = self.client.get('/api/documents/bank-statement-lines/', {'status': 'unmatched'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        line_id = response.data['results'][0]['id'] if 'results' in response.data else response.data[0]['id']
+
+        response = self.client.post(
+            f'/api/documents/bank-statement-lines/{line_id}/resolve/',
+            {'repayment': self.repayment.id},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['match_method'], 'manual')
+
+        self.repayment.refresh_from_db()
+        self.assertEqual(self.repayment.paid_date, date(2024, 3, 20))
+        statement = BankStatementImport.objects.get()
+        self.assertEqual((statement.matched_lines, statement.unmatched_lines), (1, 0))
+
+    def test_broker_cannot_import(self):
+        broker = User.objects.create_user(email='broker@example.com', password='password123', role='broker')
+        self.client.force_authenticate(user=broker)
+
+        response = self.client.get('/api/documents/bank-statement-lines/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
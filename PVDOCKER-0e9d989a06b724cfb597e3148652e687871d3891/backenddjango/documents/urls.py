@@ -8,6 +8,8 @@ router.register(r'notes', views.NoteViewSet, basename='note')
 router.register(r'fees', views.FeeViewSet, basename='fee')
 router.register(r'repayments', views.RepaymentViewSet, basename='repayment')
 router.register(r'note-comments', views.NoteCommentViewSet, basename='note-comment')
+router.register(r'bank-statements', views.BankStatementImportViewSet, basename='bank-statement')
+router.register(r'bank-statement-lines', views.BankStatementLineViewSet, basename='bank-statement-line')
 
 urlpatterns = router.urls + [
     path('documents/<int:pk>/create-version/', views.DocumentCreateVersionView.as_view(), name='document-create-version'),
@@ -7,7 +7,7 @@ from rest_framework.generics import GenericAPIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from .models import Document, Note, Fee, Repayment, Ledger, NoteComment
+from .models import Document, Note, Fee, Repayment, Ledger, NoteComment, BankStatementImport, BankStatementLine
 from .serializers import (
     DocumentSerializer,
     NoteSerializer,
@@ -15,7 +15,11 @@ from .serializers import (
     RepaymentSerializer,
     LedgerSerializer,
     ApplicationLedgerSerializer,
-    NoteCommentSerializer
+    NoteCommentSerializer,
+    BankStatementImportSerializer,
+    BankStatementLineSerializer,
+    BankStatementUploadSerializer,
+    BankStatementLineResolveSerializer
 )
 from .filters import DocumentFilter, NoteFilter, FeeFilter, RepaymentFilter, NoteCommentFilter
 from users.permissions import IsAdmin, IsAdminOrBroker, IsAdminOrBD, IsAdminOrBrokerOrBD, CanAccessNote
@@ -790,3 +794,80 @@ class ApplicationLedgerView(GenericAPIView):
         })
         
         return Response(serializer.data)
+
+
+class BankStatementPermissionMixin:
+    """
+    Super user, accounts and admin users can reconcile bank statements
+    """
+    def get_permissions(self):
+        user = getattr(self.request, 'user', None)
+        if user and user.is_authenticated and getattr(user, 'role', None) in ['super_user', 'accounts']:
+            return [IsAuthenticated()]
+        return [IsAdmin()]
+
+
+class BankStatementImportViewSet(BankStatementPermissionMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for importing bank statements and listing past imports
+    """
+    queryset = BankStatementImport.objects.select_related('created_by')
+    serializer_class = BankStatementImportSerializer
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def create(self, request):
+        serializer = BankStatementUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        from .reconciliation import import_bank_statement
+        try:
+            statement = import_bank_statement(
+                serializer.validated_data['file'],
+                request.user,
+                file_format=serializer.validated_data.get('file_format')
+            )
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({'error': f'Could not read bank statement: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(self.get_serializer(statement).data, status=status.HTTP_201_CREATED)
+
+
+class BankStatementLineViewSet(BankStatementPermissionMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for the bank statement review queue
+    
+    Filter with ?status=unmatched (the review queue) and ?statement=<id>.
+    """
+    serializer_class = BankStatementLineSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['statement', 'status', 'match_method']
+    
+    def get_queryset(self):
+        return BankStatementLine.objects.all()
+    
+    @action(detail=True, methods=['post'])
+    def resolve(self, request, pk=None):
+        line = self.get_object()
+        serializer = BankStatementLineResolveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        from .reconciliation import resolve_statement_line
+        try:
+            line = resolve_statement_line(line, serializer.validated_data['repayment'], request.user)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(self.get_serializer(line).data)
+    
+    @action(detail=True, methods=['post'])
+    def ignore(self, request, pk=None):
+        line = self.get_object()
+        if line.status != 'unmatched':
+            return Response({'error': 'Only unmatched lines can be ignored'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        line.status = 'ignored'
+        line.review_note = request.data.get('review_note', '') or 'Ignored during review'
+        line.save(update_fields=['status', 'review_note', 'updated_at'])
+        BankStatementImport.objects.filter(pk=line.statement_id).update(unmatched_lines=F('unmatched_lines') - 1)
+        
+        return Response(self.get_serializer(line).data)
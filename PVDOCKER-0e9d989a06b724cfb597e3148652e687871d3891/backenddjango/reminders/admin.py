@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Reminder
+from .models import Reminder, ReminderCampaign
 
 
 @admin.register(Reminder)
@@ -8,4 +8,13 @@ class ReminderAdmin(admin.ModelAdmin):
     list_filter = ('recipient_type', 'is_sent', 'send_datetime')
     search_fields = ('subject', 'recipient_email', 'email_body')
     date_hierarchy = 'send_datetime'
-    readonly_fields = ('sent_at', 'error_message')
\ No newline at end of file
+    readonly_fields = ('sent_at', 'error_message')
+
+
+@admin.register(ReminderCampaign)
+class ReminderCampaignAdmin(admin.ModelAdmin):
+    list_display = ('name', 'recipient_source', 'send_datetime', 'status', 'recipient_count')
+    list_filter = ('status', 'recipient_source')
+    search_fields = ('name', 'subject')
+    date_hierarchy = 'send_datetime'
+    readonly_fields = ('status', 'recipient_count', 'completed_at')
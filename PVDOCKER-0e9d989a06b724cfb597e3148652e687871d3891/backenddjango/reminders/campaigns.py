@@ -0,0 +1,162 @@
+"""
+Reminder Campaigns
+
+This module expands a campaign's recipient filters into borrowers with a
+single query, renders the subject and body templates for each recipient
+and creates the campaign's reminders with bulk_create. The reminders are
+sent in batches by the send_campaign task at the campaign's send time.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.template import Context, Engine
+from django.utils import timezone
+
+from applications.models import Application
+from borrowers.models import Borrower
+from .models import Reminder
+
+# Filters a campaign may use to select recipients
+CAMPAIGN_FILTERS = {
+    'application_ids',
+    'borrower_ids',
+    'stages',
+    'repayment_due_from',
+    'repayment_due_to',
+}
+
+# Campaign templates are plain text, so nothing is HTML-escaped
+template_engine = Engine(autoescape=False)
+
+REMINDER_CREATE_BATCH_SIZE = 1000
+
+
+def filter_applications(filters):
+    """
+    Applications matching a campaign's application filters
+
+    Repayment filters match applications with an unpaid repayment due in
+    the given date range.
+    """
+    applications = Application.objects.all()
+    if 'application_ids' in filters:
+        applications = applications.filter(id__in=filters['application_ids'])
+    if 'stages' in filters:
+        applications = applications.filter(stage__in=filters['stages'])
+    if 'repayment_due_from' in filters or 'repayment_due_to' in filters:
+        repayment_filter = Q(repayments__paid_date__isnull=True)
+        if 'repayment_due_from' in filters:
+            repayment_filter &= Q(repayments__due_date__gte=filters['repayment_due_from'])
+        if 'repayment_due_to' in filters:
+            repayment_filter &= Q(repayments__due_date__lte=filters['repayment_due_to'])
+        # Applications with several matching repayments appear once per repayment
+        applications = applications.filter(repayment_filter).distinct()
+    return applications
+
+
+def campaign_recipients(recipient_source, filters):
+    """
+    Expand campaign filters into recipients
+
+    Args:
+        recipient_source: 'applications' for one recipient per borrower of
+            each matching application, or 'borrowers' for each matching
+            borrower once
+        filters: Dictionary of CAMPAIGN_FILTERS values
+
+    Returns:
+        Queryset of dictionaries with borrower_id, email, first_name,
+        last_name, application_id and application_reference keys
+    """
+    if recipient_source == 'applications':
+        links = Application.borrowers.through.objects.filter(
+            application__in=filter_applications(filters)
+        ).exclude(Q(borrower__email__isnull=True) | Q(borrower__email=''))
+        if 'borrower_ids' in filters:
+            links = links.filter(borrower_id__in=filters['borrower_ids'])
+        return links.order_by('application_id', 'borrower_id').values(
+            'borrower_id',
+            'application_id',
+            email=F('borrower__email'),
+            first_name=F('borrower__first_name'),
+            last_name=F('borrower__last_name'),
+            application_reference=F('application__reference_number'),
+        )
+
+    borrowers = Borrower.objects.exclude(Q(email__isnull=True) | Q(email=''))
+    if 'borrower_ids' in filters:
+        borrowers = borrowers.filter(id__in=filters['borrower_ids'])
+    if filters.keys() - {'borrower_ids'}:
+        borrowers = borrowers.filter(borrower_applications__in=filter_applications(filters))
+    return borrowers.distinct().order_by('id').values(
+        'email',
+        'first_name',
+        'last_name',
+        borrower_id=F('id'),
+    )
+
+
+def create_campaign_reminders(campaign):
+    """
+    Create one reminder per campaign recipient
+
+    The templates are compiled once and rendered for each recipient with
+    their first_name, last_name, full_name and application_reference.
+
+    Returns:
+        Number of reminders created
+    """
+    subject_template = template_engine.from_string(campaign.subject)
+    body_template = template_engine.from_string(campaign.email_body)
+
+    reminders = []
+    for recipient in campaign_recipients(campaign.recipient_source, campaign.filters).iterator():
+        first_name = recipient['first_name'] or ''
+        last_name = recipient['last_name'] or ''
+        context = Context({
+            'first_name': first_name,
+            'last_name': last_name,
+            'full_name': f"{first_name} {last_name}".strip(),
+            'application_reference': recipient.get('application_reference') or '',
+        })
+        reminders.append(Reminder(
+            campaign=campaign,
+            recipient_type='client',
+            recipient_email=recipient['email'],
+            send_datetime=campaign.send_datetime,
+            subject=subject_template.render(context).strip(),
+            email_body=body_template.render(context),
+            created_by=campaign.created_by,
+            send_as_user=campaign.send_as_user,
+            reply_to_user=campaign.reply_to_user,
+            related_borrower_id=recipient['borrower_id'],
+            related_application_id=recipient.get('application_id'),
+        ))
+
+    Reminder.objects.bulk_create(reminders, batch_size=REMINDER_CREATE_BATCH_SIZE)
+    campaign.recipient_count = len(reminders)
+    campaign.save(update_fields=['recipient_count', 'updated_at'])
+    return len(reminders)
+
+
+def schedule_campaign(campaign):
+    """
+    Queue the campaign's batch sender for its send time once the current
+    transaction commits
+    """
+    from .tasks import send_campaign
+
+    campaign_id = campaign.id
+    eta = max(campaign.send_datetime, timezone.now())
+    transaction.on_commit(lambda: send_campaign.apply_async(args=[campaign_id], eta=eta))
+
+
+def with_campaign_stats(queryset):
+    """
+    Annotate campaigns with sent, failed and pending reminder counts
+    """
+    return queryset.annotate(
+        sent_count=Count('reminders', filter=Q(reminders__is_sent=True)),
+        failed_count=Count('reminders', filter=Q(reminders__is_sent=False, reminders__error_message__isnull=False)),
+        pending_count=Count('reminders', filter=Q(reminders__is_sent=False, reminders__error_message__isnull=True)),
+    )
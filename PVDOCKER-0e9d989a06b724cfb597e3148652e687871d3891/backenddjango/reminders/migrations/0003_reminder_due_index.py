@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['is_sent', 'send_datetime'], name='reminders_due_idx'),
+        ),
+    ]
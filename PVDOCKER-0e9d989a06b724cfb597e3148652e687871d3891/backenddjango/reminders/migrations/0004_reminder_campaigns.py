@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reminders', '0003_reminder_due_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('subject', models.CharField(max_length=255)),
+                ('email_body', models.TextField()),
+                ('recipient_source', models.CharField(choices=[('applications', 'Borrowers of each matching application'), ('borrowers', 'Each matching borrower once')], max_length=20)),
+                ('filters', models.JSONField(blank=True, default=dict)),
+                ('send_datetime', models.DateTimeField()),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('sending', 'Sending'), ('completed', 'Completed')], default='scheduled', max_length=20)),
+                ('recipient_count', models.PositiveIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_reminder_campaigns', to=settings.AUTH_USER_MODEL)),
+                ('reply_to_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reply_to_reminder_campaigns', to=settings.AUTH_USER_MODEL)),
+                ('send_as_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='send_as_reminder_campaigns', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='campaign',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='reminders.remindercampaign'),
+        ),
+    ]
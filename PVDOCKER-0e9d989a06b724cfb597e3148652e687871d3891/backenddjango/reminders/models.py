@@ -2,6 +2,50 @@ from django.db import models
 from django.conf import settings
 
 
+class ReminderCampaign(models.Model):
+    """
+    Model for bulk reminder campaigns (mail merge)
+
+    The subject and body are templates rendered once per recipient. The
+    recipients are expanded from the filters when the campaign is created.
+    """
+    RECIPIENT_SOURCE_CHOICES = [
+        ('applications', 'Borrowers of each matching application'),
+        ('borrowers', 'Each matching borrower once'),
+    ]
+
+    STATUS_CHOICES = [
+        ('scheduled', 'Scheduled'),
+        ('sending', 'Sending'),
+        ('completed', 'Completed'),
+    ]
+
+    name = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    email_body = models.TextField()
+    recipient_source = models.CharField(max_length=20, choices=RECIPIENT_SOURCE_CHOICES)
+    filters = models.JSONField(default=dict, blank=True)
+    send_datetime = models.DateTimeField()
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='created_reminder_campaigns')
+    send_as_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, related_name='send_as_reminder_campaigns', null=True, blank=True)
+    reply_to_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, related_name='reply_to_reminder_campaigns', null=True, blank=True)
+
+    # Status fields
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
+    recipient_count = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Campaign: {self.name} ({self.recipient_count} recipients)"
+
+
 class Reminder(models.Model):
     """
     Model for email reminders
@@ -30,6 +74,7 @@ class Reminder(models.Model):
     # Optional related objects
     related_application = models.ForeignKey('applications.Application', on_delete=models.SET_NULL, null=True, blank=True, related_name='reminders')
     related_borrower = models.ForeignKey('borrowers.Borrower', on_delete=models.SET_NULL, null=True, blank=True, related_name='reminders')
+    campaign = models.ForeignKey(ReminderCampaign, on_delete=models.CASCADE, null=True, blank=True, related_name='reminders')
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -37,6 +82,10 @@ class Reminder(models.Model):
     
     class Meta:
         ordering = ['send_datetime']
+        indexes = [
+            # Due reminder lookups by the sweeper
+            models.Index(fields=['is_sent', 'send_datetime'], name='reminders_due_idx'),
+        ]
         
     def __str__(self):
         return f"Reminder: {self.subject} (to: {self.recipient_email})"
\ No newline at end of file
@@ -1,5 +1,9 @@
+from datetime import date
+
+from django.template import TemplateSyntaxError
 from rest_framework import serializers
-from .models import Reminder
+from .models import Reminder, ReminderCampaign
+from .campaigns import CAMPAIGN_FILTERS, template_engine
 from users.models import User
 
 
@@ -68,4 +72,76 @@ class ReminderSerializer(serializers.ModelSerializer):
                     # This is a simplified check - in a real system, you might have a more complex relationship model
                     raise serializers.ValidationError("BD users can only send as themselves")
         
-        return value
\ No newline at end of file
+        return value
+
+
+class ReminderCampaignSerializer(serializers.ModelSerializer):
+    """
+    Serializer for reminder campaigns with progress stats
+
+    The subject and email body are templates that can use {{ first_name }},
+    {{ last_name }}, {{ full_name }} and {{ application_reference }}.
+    """
+    created_by_name = serializers.StringRelatedField(source='created_by')
+    sent_count = serializers.IntegerField(read_only=True)
+    failed_count = serializers.IntegerField(read_only=True)
+    pending_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ReminderCampaign
+        fields = [
+            'id', 'name', 'subject', 'email_body', 'recipient_source', 'filters',
+            'send_datetime', 'created_by', 'created_by_name', 'send_as_user',
+            'reply_to_user', 'status', 'recipient_count', 'sent_count',
+            'failed_count', 'pending_count', 'completed_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_by', 'status', 'recipient_count', 'completed_at', 'created_at', 'updated_at']
+
+    validate_send_as_user = ReminderSerializer.validate_send_as_user
+
+    def validate_filters(self, value):
+        """
+        Validate that only supported recipient filters are used
+        """
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Filters must be an object.")
+        unknown = set(value) - CAMPAIGN_FILTERS
+        if unknown:
+            raise serializers.ValidationError(f"Unsupported filters: {', '.join(sorted(unknown))}")
+
+        for key in ('application_ids', 'borrower_ids'):
+            if key in value:
+                ids = value[key]
+                if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+                    raise serializers.ValidationError({key: "Must be a list of IDs."})
+        if 'stages' in value and not isinstance(value['stages'], list):
+            raise serializers.ValidationError({'stages': "Must be a list of stages."})
+        for key in ('repayment_due_from', 'repayment_due_to'):
+            if key in value:
+                try:
+                    date.fromisoformat(value[key])
+                except (TypeError, ValueError):
+                    raise serializers.ValidationError({key: "Use YYYY-MM-DD format."})
+        return value
+
+    def validate(self, attrs):
+        """
+        Validate that the templates compile
+        """
+        for field in ('subject', 'email_body'):
+            if field in attrs:
+                try:
+                    template_engine.from_string(attrs[field])
+                except TemplateSyntaxError as e:
+                    raise serializers.ValidationError({field: f"Invalid template: {e}"})
+        return attrs
+
+
+class CampaignReminderErrorSerializer(serializers.ModelSerializer):
+    """
+    Serializer for campaign reminders that failed to send
+    """
+
+    class Meta:
+        model = Reminder
+        fields = ['id', 'recipient_email', 'related_borrower', 'related_application', 'error_message', 'updated_at']
@@ -1,56 +1,189 @@
+import logging
+
 from celery import shared_task
 from django.utils import timezone
 from django.core.mail import EmailMessage
 from django.conf import settings
-from .models import Reminder
+from django.db import transaction
+from .models import Reminder, ReminderCampaign
+
+logger = logging.getLogger(__name__)
+
+# Due reminders claimed per sweeper transaction
+REMINDER_SWEEP_BATCH_SIZE = 100
+
+
+def build_reminder_email(reminder):
+    """
+    Build the email message for a reminder
+    """
+    email = EmailMessage(
+        subject=reminder.subject,
+        body=reminder.email_body,
+        to=[reminder.recipient_email],
+    )
+
+    # Set custom From header if send_as_user is specified
+    if reminder.send_as_user and reminder.send_as_user.email:
+        # Format: "User Name <user@example.com>"
+        email.from_email = f'"{reminder.send_as_user.get_full_name()}" <{reminder.send_as_user.email}>'
+    else:
+        email.from_email = settings.DEFAULT_FROM_EMAIL
+
+    # Set Reply-To header if specified
+    if reminder.reply_to_user and reminder.reply_to_user.email:
+        email.reply_to = [reminder.reply_to_user.email]
+
+    return email
+
+
+def deliver_reminders(reminders):
+    """
+    Send reminders over the pooled email connection and record the outcome
+
+    Each reminder is sent on its own so one failure does not stop the
+    rest. Sent reminders are marked sent and failed reminders keep their
+    error message, both with one bulk update.
+
+    Args:
+        reminders: Reminder objects, ideally with send_as_user and
+            reply_to_user selected
+
+    Returns:
+        Dictionary mapping failed reminder ID to error text
+    """
+    from crm_backend.tasks import email_connection_pool
+
+    errors = {}
+    with email_connection_pool.session() as pool:
+        for reminder in reminders:
+            try:
+                pool.get().send_messages([build_reminder_email(reminder)])
+            except Exception as e:
+                logger.error(f"Error sending reminder {reminder.id}: {str(e)}")
+                errors[reminder.id] = str(e)
+                pool.reset()
+
+    now = timezone.now()
+    for reminder in reminders:
+        if reminder.id in errors:
+            reminder.error_message = errors[reminder.id]
+        else:
+            reminder.is_sent = True
+            reminder.sent_at = now
+            reminder.error_message = None
+        reminder.updated_at = now
+    Reminder.objects.bulk_update(reminders, ['is_sent', 'sent_at', 'error_message', 'updated_at'])
+
+    return errors
+
+
+def claim_due_reminders(queryset, limit=None):
+    """
+    Lock unsent, due reminders so no other worker sends them
+
+    Must be called inside a transaction. Rows locked by another worker are
+    skipped rather than waited on.
+    """
+    claimed = queryset.select_for_update(skip_locked=True, of=('self',)).filter(
+        is_sent=False,
+        send_datetime__lte=timezone.now()
+    ).select_related('send_as_user', 'reply_to_user').order_by('send_datetime', 'id')
+    if limit is not None:
+        claimed = claimed[:limit]
+    return list(claimed)
+
+
+def drain_due_reminders(queryset, batch_size=REMINDER_SWEEP_BATCH_SIZE):
+    """
+    Claim and send due reminders from a queryset in batches
+
+    Each batch is claimed and sent in its own transaction. Reminders that
+    fail are skipped for the rest of the run and left for the next sweep.
+
+    Returns:
+        Dictionary with sent and failed counts
+    """
+    stats = {'sent': 0, 'failed': 0}
+    failed_ids = []
+
+    while True:
+        with transaction.atomic():
+            reminders = claim_due_reminders(queryset.exclude(id__in=failed_ids), batch_size)
+            if not reminders:
+                break
+            errors = deliver_reminders(reminders)
+
+        failed_ids.extend(errors)
+        stats['sent'] += len(reminders) - len(errors)
+        stats['failed'] += len(errors)
+
+    return stats
+
+
+def schedule_reminder(reminder):
+    """
+    Schedule a reminder to be sent at its send time
+
+    The task is queued once the current transaction commits. If the
+    reminder is later rescheduled the earlier task finds it not yet due
+    and does nothing.
+    """
+    if reminder.is_sent or not reminder.send_datetime:
+        return
+
+    reminder_id = reminder.id
+    eta = max(reminder.send_datetime, timezone.now())
+    transaction.on_commit(lambda: send_reminder.apply_async(args=[reminder_id], eta=eta))
+
+
+@shared_task
+def send_reminder(reminder_id):
+    """
+    Send a single reminder if it is due and not already sent
+    """
+    with transaction.atomic():
+        reminders = claim_due_reminders(Reminder.objects.filter(id=reminder_id))
+        if not reminders:
+            return False
+        errors = deliver_reminders(reminders)
+
+    return reminder_id not in errors
 
 
 @shared_task
-def check_due_reminders():
+def check_due_reminders(batch_size=REMINDER_SWEEP_BATCH_SIZE):
     """
     Check for reminders that are due to be sent and send them
+
+    Reminders are normally sent by their scheduled send_reminder task. This
+    sweeper picks up anything those tasks missed. Rows are claimed with
+    select_for_update(skip_locked=True) so several workers can sweep at
+    once without sending a reminder twice.
     """
-    now = timezone.now()
-    
-    # Find reminders that are due but not yet sent
-    due_reminders = Reminder.objects.filter(
-        send_datetime__lte=now,
-        is_sent=False
+    stats = drain_due_reminders(Reminder.objects.all(), batch_size)
+
+    if stats['sent'] or stats['failed']:
+        logger.info(f"Reminder sweep: {stats['sent']} sent, {stats['failed']} failed")
+
+    return stats
+
+
+@shared_task
+def send_campaign(campaign_id, batch_size=REMINDER_SWEEP_BATCH_SIZE):
+    """
+    Send a campaign's due reminders in batches over the pooled connection
+
+    Failed reminders keep their error and are retried by the sweeper.
+    """
+    ReminderCampaign.objects.filter(id=campaign_id, status='scheduled').update(
+        status='sending', updated_at=timezone.now()
     )
-    
-    for reminder in due_reminders:
-        try:
-            # Create email message
-            email = EmailMessage(
-                subject=reminder.subject,
-                body=reminder.email_body,
-                to=[reminder.recipient_email],
-            )
-            
-            # Set custom From header if send_as_user is specified
-            if reminder.send_as_user and reminder.send_as_user.email:
-                # Format: "User Name <user@example.com>"
-                from_email = f'"{reminder.send_as_user.get_full_name()}" <{reminder.send_as_user.email}>'
-                email.from_email = from_email
-            else:
-                email.from_email = settings.DEFAULT_FROM_EMAIL
-            
-            # Set Reply-To header if specified
-            if reminder.reply_to_user and reminder.reply_to_user.email:
-                email.reply_to = [reminder.reply_to_user.email]
-            
-            # Send email
-            email.send(fail_silently=False)
-            
-            # Update reminder status
-            reminder.is_sent = True
-            reminder.sent_at = timezone.now()
-            reminder.save()
-            
-        except Exception as e:
-            # Log error and update reminder
-            reminder.error_message = str(e)
-            reminder.save()
-            
-            # Re-raise for Celery to handle
-            raise
\ No newline at end of file
+
+    stats = drain_due_reminders(Reminder.objects.filter(campaign_id=campaign_id), batch_size)
+
+    now = timezone.now()
+    ReminderCampaign.objects.filter(id=campaign_id).update(status='completed', completed_at=now, updated_at=now)
+    logger.info(f"Reminder campaign {campaign_id}: {stats['sent']} sent, {stats['failed']} failed")
+
+    return stats
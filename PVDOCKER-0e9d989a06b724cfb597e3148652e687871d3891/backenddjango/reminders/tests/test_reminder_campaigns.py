@@ -0,0 +1,142 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from applications.models import Application
+from borrowers.models import Borrower
+from crm_backend.tasks import email_connection_pool
+from documents.models import Repayment
+from reminders.models import Reminder, ReminderCampaign
+from reminders.tasks import send_campaign
+from users.models import User
+
+
+@patch('reminders.tasks.send_campaign.apply_async')
+class ReminderCampaignTestCase(APITestCase):
+    """Test case for bulk reminder campaigns"""
+
+    def setUp(self):
+        """Set up test data"""
+        email_connection_pool.reset()
+        self.user = User.objects.create_user(
+            email='admin@example.com',
+            password='testpassword',
+            role='admin'
+        )
+        self.client.force_authenticate(user=self.user)
+        today = timezone.now().date()
+
+        self.borrowers = []
+        self.applications = []
+        for i in range(3):
+            borrower = Borrower.objects.create(first_name=f'Borrower{i}', last_name='Smith', email=f'borrower{i}@example.com')
+            application = Application.objects.create(stage='funded', loan_amount=100000)
+            application.borrowers.add(borrower)
+            self.borrowers.append(borrower)
+            self.applications.append(application)
+
+        # Two applications have repayments due next week, one of them paid already
+        Repayment.objects.create(application=self.applications[0], due_date=today + timedelta(days=7), amount=100)
+        Repayment.objects.create(application=self.applications[0], due_date=today + timedelta(days=9), amount=100)
+        Repayment.objects.create(application=self.applications[1], due_date=today + timedelta(days=8), amount=100, paid_date=today)
+        Repayment.objects.create(application=self.applications[2], due_date=today + timedelta(days=30), amount=100)
+
+        # A second borrower on the first application, and one without an email
+        self.co_borrower = Borrower.objects.create(first_name='Co', last_name='Borrower', email='co@example.com')
+        self.applications[0].borrowers.add(self.co_borrower, Borrower.objects.create(first_name='No', last_name='Email'))
+        # The first borrower is also on the third application
+        self.applications[2].borrowers.add(self.borrowers[0])
+
+        self.url = reverse('reminder-campaign-list')
+        self.next_week = {
+            'repayment_due_from': (today + timedelta(days=1)).isoformat(),
+            'repayment_due_to': (today + timedelta(days=14)).isoformat(),
+        }
+
+    def create_campaign(self, **data):
+        payload = {
+            'name': 'Repayments due',
+            'subject': 'Repayment due for {{ application_reference }}',
+            'email_body': 'Dear {{ full_name }}, your repayment is due next week.',
+            'recipient_source': 'applications',
+            'filters': self.next_week,
+            'send_datetime': (timezone.now() + timedelta(hours=1)).isoformat(),
+        }
+        payload.update(data)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, payload, format='json')
+
+    def test_create_expands_recipients(self, mock_apply_async):
+        """Test recipients are expanded from the filters and merged into the templates"""
+        response = self.create_campaign()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['recipient_count'], 2)
+        self.assertEqual(response.data['pending_count'], 2)
+        campaign = ReminderCampaign.objects.get()
+        mock_apply_async.assert_called_once_with(args=[campaign.id], eta=campaign.send_datetime)
+
+        reminders = {reminder.recipient_email: reminder for reminder in campaign.reminders.all()}
+        self.assertEqual(set(reminders), {'borrower0@example.com', 'co@example.com'})
+        reminder = reminders['borrower0@example.com']
+        self.assertEqual(reminder.subject, f'Repayment due for {self.applications[0].reference_number}')
+        self.assertEqual(reminder.email_body, 'Dear Borrower0 Smith, your repayment is due next week.')
+        self.assertEqual(reminder.related_application, self.applications[0])
+        self.assertEqual(reminder.related_borrower, self.borrowers[0])
+        self.assertEqual(reminder.created_by, self.user)
+
+    def test_borrower_source_sends_each_borrower_once(self, mock_apply_async):
+        """Test borrowers on several matching applications get one reminder"""
+        response = self.create_campaign(recipient_source='borrowers', filters={'stages': ['funded']})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(Reminder.objects.values_list('recipient_email', flat=True)),
+            ['borrower0@example.com', 'borrower1@example.com', 'borrower2@example.com', 'co@example.com']
+        )
+
+    def test_rejects_unknown_filters_and_bad_templates(self, mock_apply_async):
+        """Test only supported filters and valid templates are accepted"""
+        response = self.create_campaign(filters={'email__contains': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('filters', response.data)
+
+        response = self.create_campaign(email_body='Dear {% if %}')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email_body', response.data)
+
+        self.assertFalse(ReminderCampaign.objects.exists())
+
+    def test_send_campaign_reports_progress(self, mock_apply_async):
+        """Test the batch sender records sent and failed reminders"""
+        self.create_campaign(send_datetime=(timezone.now() - timedelta(minutes=1)).isoformat())
+        campaign = ReminderCampaign.objects.get()
+        original = EmailBackend.send_messages
+
+        def flaky_send(backend, messages):
+            if messages[0].to == ['co@example.com']:
+                raise ConnectionError('Mailbox unavailable')
+            return original(backend, messages)
+
+        with patch.object(EmailBackend, 'send_messages', flaky_send):
+            stats = send_campaign(campaign.id, batch_size=1)
+
+        self.assertEqual(stats, {'sent': 1, 'failed': 1})
+        self.assertEqual(len(mail.outbox), 1)
+
+        response = self.client.get(reverse('reminder-campaign-detail', args=[campaign.id]))
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual(
+            (response.data['sent_count'], response.data['failed_count'], response.data['pending_count']),
+            (1, 1, 0)
+        )
+
+        response = self.client.get(reverse('reminder-campaign-errors', args=[campaign.id]))
+        errors = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([error['recipient_email'] for error in errors], ['co@example.com'])
+        self.assertEqual(errors[0]['error_message'], 'Mailbox unavailable')
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from crm_backend.tasks import email_connection_pool
+from reminders.models import Reminder
+from reminders.tasks import check_due_reminders, send_reminder
+from users.models import User
+
+
+class ReminderDispatchTestCase(APITestCase):
+    """Test case for scheduled reminder delivery"""
+
+    def setUp(self):
+        """Set up test data"""
+        email_connection_pool.reset()
+        self.user = User.objects.create_user(
+            email='admin@example.com',
+            password='testpassword',
+            role='admin',
+            first_name='Admin',
+            last_name='User'
+        )
+
+    def create_reminder(self, send_datetime, **kwargs):
+        return Reminder.objects.create(
+            recipient_type='custom',
+            recipient_email=kwargs.pop('recipient_email', 'client@example.com'),
+            send_datetime=send_datetime,
+            subject=kwargs.pop('subject', 'Reminder'),
+            email_body='Body',
+            created_by=self.user,
+            **kwargs
+        )
+
+    @patch('reminders.tasks.send_reminder.apply_async')
+    def test_create_schedules_reminder_with_eta(self, mock_apply_async):
+        """Test creating a reminder queues a task for its send time"""
+        self.client.force_authenticate(user=self.user)
+        send_datetime = timezone.now() + timedelta(hours=2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('reminder-list'), {
+                'recipient_type': 'custom',
+                'recipient_email': 'client@example.com',
+                'send_datetime': send_datetime.isoformat(),
+                'subject': 'Reminder',
+                'email_body': 'Body',
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        mock_apply_async.assert_called_once_with(args=[response.data['id']], eta=send_datetime)
+
+    def test_send_reminder_sends_once(self):
+        """Test a due reminder is sent once and not again"""
+        reminder = self.create_reminder(timezone.now() - timedelta(minutes=1), send_as_user=self.user)
+
+        self.assertTrue(send_reminder(reminder.id))
+        self.assertFalse(send_reminder(reminder.id))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].from_email, '"Admin User" <admin@example.com>')
+        reminder.refresh_from_db()
+        self.assertTrue(reminder.is_sent)
+        self.assertIsNotNone(reminder.sent_at)
+
+    def test_send_reminder_skips_rescheduled_reminder(self):
+        """Test an early task does nothing once the reminder was moved later"""
+        reminder = self.create_reminder(timezone.now() + timedelta(hours=1))
+
+        self.assertFalse(send_reminder(reminder.id))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_sweeper_isolates_failures(self):
+        """Test one failing reminder does not stop the rest of the sweep"""
+        past = timezone.now() - timedelta(minutes=5)
+        failing = self.create_reminder(past, recipient_email='bad@example.com')
+        for i in range(3):
+            self.create_reminder(past, recipient_email=f'client{i}@example.com')
+        future = self.create_reminder(timezone.now() + timedelta(hours=1))
+        original = EmailBackend.send_messages
+
+        def flaky_send(backend, messages):
+            if messages[0].to == ['bad@example.com']:
+                raise ConnectionError('SMTP unavailable')
+            return original(backend, messages)
+
+        with patch.object(EmailBackend, 'send_messages', flaky_send):
+            stats = check_due_reminders(batch_size=2)
+
+        self.assertEqual(stats, {'sent': 3, 'failed': 1})
+        self.assertEqual(len(mail.outbox), 3)
+        failing.refresh_from_db()
+        self.assertFalse(failing.is_sent)
+        self.assertEqual(failing.error_message, 'SMTP unavailable')
+        future.refresh_from_db()
+        self.assertFalse(future.is_sent)
+
+        # The failed reminder is retried on the next sweep
+        self.assertEqual(check_due_reminders(), {'sent': 1, 'failed': 0})
+        failing.refresh_from_db()
+        self.assertTrue(failing.is_sent)
+        self.assertIsNone(failing.error_message)
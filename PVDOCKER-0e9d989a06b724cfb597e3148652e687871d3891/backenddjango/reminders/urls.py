@@ -3,6 +3,8 @@ from rest_framework.routers import DefaultRouter
 from . import views
 
 router = DefaultRouter()
+# Registered first so 'campaigns/' is not taken as a reminder ID
+router.register(r'campaigns', views.ReminderCampaignViewSet, basename='reminder-campaign')
 router.register(r'', views.ReminderViewSet, basename='reminder')
 
 urlpatterns = router.urls
\ No newline at end of file
@@ -1,21 +1,20 @@
-from rest_framework import viewsets, filters
+from django.db import transaction
+from rest_framework import viewsets, filters, mixins
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Reminder
-from .serializers import ReminderSerializer
+from .models import Reminder, ReminderCampaign
+from .serializers import ReminderSerializer, ReminderCampaignSerializer, CampaignReminderErrorSerializer
+from .campaigns import create_campaign_reminders, schedule_campaign, with_campaign_stats
+from .tasks import schedule_reminder
 from users.permissions import IsAdminOrBrokerOrBD
 
 
-class ReminderViewSet(viewsets.ModelViewSet):
+class ReminderAccessMixin:
     """
-    API endpoint for managing reminders
+    Role-based access shared by the reminder endpoints
     """
-    queryset = Reminder.objects.all().order_by('send_datetime')
-    serializer_class = ReminderSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ['subject', 'email_body', 'recipient_email']
-    filterset_fields = ['recipient_type', 'is_sent', 'related_application', 'related_borrower']
-    
     def get_permissions(self):
         """
         Super user, accounts, and admin/broker/BD users can manage reminders
@@ -46,9 +45,70 @@ class ReminderViewSet(viewsets.ModelViewSet):
             return queryset.filter(created_by=user)
         
         return queryset.none()
+
+
+class ReminderViewSet(ReminderAccessMixin, viewsets.ModelViewSet):
+    """
+    API endpoint for managing reminders
+    """
+    queryset = Reminder.objects.all().order_by('send_datetime')
+    serializer_class = ReminderSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    search_fields = ['subject', 'email_body', 'recipient_email']
+    filterset_fields = ['recipient_type', 'is_sent', 'related_application', 'related_borrower', 'campaign']
     
     def perform_create(self, serializer):
         """
         Set the created_by field to the current user
         """
-        serializer.save(created_by=self.request.user)
\ No newline at end of file
+        reminder = serializer.save(created_by=self.request.user)
+        schedule_reminder(reminder)
+    
+    def perform_update(self, serializer):
+        """
+        Reschedule the reminder in case its send time changed
+        """
+        reminder = serializer.save()
+        schedule_reminder(reminder)
+
+
+class ReminderCampaignViewSet(ReminderAccessMixin,
+                              mixins.CreateModelMixin,
+                              mixins.ListModelMixin,
+                              mixins.RetrieveModelMixin,
+                              viewsets.GenericViewSet):
+    """
+    API endpoint for bulk reminder campaigns
+
+    Creating a campaign expands its recipients and creates their reminders
+    straight away; they are sent in batches at the campaign's send time.
+    """
+    queryset = with_campaign_stats(ReminderCampaign.objects.select_related('created_by')).order_by('-created_at')
+    serializer_class = ReminderCampaignSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    search_fields = ['name', 'subject']
+    filterset_fields = ['status', 'recipient_source']
+
+    def perform_create(self, serializer):
+        """
+        Create the campaign's reminders and schedule sending
+        """
+        with transaction.atomic():
+            campaign = serializer.save(created_by=self.request.user)
+            create_campaign_reminders(campaign)
+            schedule_campaign(campaign)
+
+        # Return the stats of the freshly created campaign
+        serializer.instance = self.get_queryset().get(pk=campaign.pk)
+
+    @action(detail=True, methods=['get'])
+    def errors(self, request, pk=None):
+        """
+        List the campaign's reminders that failed to send
+        """
+        campaign = self.get_object()
+        failed = campaign.reminders.filter(is_sent=False, error_message__isnull=False).order_by('id')
+        page = self.paginate_queryset(failed)
+        if page is not None:
+            return self.get_paginated_response(CampaignReminderErrorSerializer(page, many=True).data)
+        return Response(CampaignReminderErrorSerializer(failed, many=True).data)
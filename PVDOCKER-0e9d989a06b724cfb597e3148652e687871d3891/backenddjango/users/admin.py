@@ -2,8 +2,10 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.http import HttpResponse
 from django.urls import path
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import User, Notification, NotificationPreference, EmailLog
+from .models import User, Notification, NotificationPreference, EmailLog, NotificationOutbox
+from .services import invalidate_unread_counts
 from crm_backend.tasks import export_email_logs_to_docx
 
 class CustomUserAdmin(UserAdmin):
@@ -51,14 +53,29 @@ class NotificationAdmin(admin.ModelAdmin):
     def mark_as_read(self, request, queryset):
         for notification in queryset:
             notification.mark_as_read()
+        invalidate_unread_counts(set(queryset.values_list('user_id', flat=True)))
         self.message_user(request, f"{queryset.count()} notifications marked as read.")
     mark_as_read.short_description = "Mark selected notifications as read"
     
     def mark_as_unread(self, request, queryset):
         queryset.update(is_read=False, read_at=None)
+        invalidate_unread_counts(set(queryset.values_list('user_id', flat=True)))
         self.message_user(request, f"{queryset.count()} notifications marked as unread.")
     mark_as_unread.short_description = "Mark selected notifications as unread"
 
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('channel', 'user', 'status', 'attempts', 'available_at', 'created_at', 'sent_at')
+    list_filter = ('channel', 'status')
+    search_fields = ('user__email', 'dedup_key')
+    readonly_fields = ('created_at', 'sent_at')
+    actions = ['retry_messages']
+    
+    def retry_messages(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', available_at=timezone.now())
+        self.message_user(request, f"{updated} outbox messages queued for retry.")
+    retry_messages.short_description = "Retry selected outbox messages"
+
 @admin.register(NotificationPreference)
 class NotificationPreferenceAdmin(admin.ModelAdmin):
     list_display = ('user', 'daily_digest', 'weekly_digest', 'updated_at')
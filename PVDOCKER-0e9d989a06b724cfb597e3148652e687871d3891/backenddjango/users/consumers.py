@@ -1,36 +1,53 @@
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Seconds to collect group messages before sending one frame to the client
+NOTIFICATION_COALESCE_WINDOW = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 0.25)
+
+
 class NotificationConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time notifications
+
+    Notifications and count updates arriving within a short window are
+    coalesced into a single 'notifications' frame carrying the latest unread
+    count. Clients can subscribe to count-only updates by sending
+    {"type": "subscribe", "mode": "count_only"}.
     """
     async def connect(self):
         """
         Connect to the WebSocket
         """
         self.user = self.scope["user"]
-        
+
         # Anonymous users can't connect
-        if self.user.is_anonymous:
+        if not self.user or self.user.is_anonymous:
             await self.close()
             return
-        
+
+        # Coalescing state
+        self.count_only = False
+        self.pending_notifications = []
+        self.pending_count = None
+        self.flush_task = None
+
         # Set the group name to the user's ID
         self.group_name = f"user_{self.user.id}_notifications"
-        
+
         # Join the group
         await self.channel_layer.group_add(
             self.group_name,
             self.channel_name
         )
-        
+
         await self.accept()
-        
+
         # Send initial unread count
         unread_count = await self.get_unread_count()
         await self.send(text_data=json.dumps({
@@ -42,6 +59,9 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """
         Disconnect from the WebSocket
         """
+        if getattr(self, 'flush_task', None):
+            self.flush_task.cancel()
+
         # Leave the group
         if hasattr(self, 'group_name'):
             await self.channel_layer.group_discard(
@@ -55,37 +75,90 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """
         data = json.loads(text_data)
         message_type = data.get('type')
-        
+
         if message_type == 'get_unread_count':
             unread_count = await self.get_unread_count()
             await self.send(text_data=json.dumps({
                 'type': 'unread_count',
                 'count': unread_count
             }))
+        elif message_type == 'subscribe':
+            self.count_only = data.get('mode') == 'count_only'
+            if self.count_only:
+                self.pending_notifications = []
+            await self.send(text_data=json.dumps({
+                'type': 'subscribed',
+                'mode': 'count_only' if self.count_only else 'full'
+            }))
 
     async def notification_message(self, event):
         """
-        Receive notification from group and send to WebSocket
+        Receive notification from group and queue it for the next frame
         """
-        # Send the notification to the WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'notification',
-            'notification': event['notification']
-        }))
-    
+        await self.queue_delivery([event['notification']])
+
+    async def notification_batch(self, event):
+        """
+        Receive a batch of notifications from group and queue them, with
+        the unread count, for the next frame
+        """
+        await self.queue_delivery(event['notifications'], event['count'])
+
     async def notification_count(self, event):
         """
-        Receive notification count update from group and send to WebSocket
+        Receive notification count update from group and queue it for the
+        next frame
         """
-        # Send the count to the WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'unread_count',
-            'count': event['count']
-        }))
-    
+        await self.queue_delivery([], event['count'])
+
+    async def queue_delivery(self, notifications, count=None):
+        """
+        Buffer notifications and the latest count until the window closes
+        """
+        if not self.count_only:
+            self.pending_notifications.extend(notifications)
+        if count is not None:
+            self.pending_count = count
+        elif notifications:
+            # The count is unknown until the frame is sent
+            self.pending_count = None
+
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_after_window())
+
+    async def flush_after_window(self):
+        """
+        Send the buffered updates once the coalescing window has passed
+        """
+        await asyncio.sleep(NOTIFICATION_COALESCE_WINDOW)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Send buffered notifications and the latest count as one frame
+        """
+        notifications, self.pending_notifications = self.pending_notifications, []
+        count, self.pending_count = self.pending_count, None
+        if count is None:
+            count = await self.get_unread_count()
+
+        if notifications:
+            await self.send(text_data=json.dumps({
+                'type': 'notifications',
+                'notifications': notifications,
+                'count': count
+            }))
+        else:
+            await self.send(text_data=json.dumps({
+                'type': 'unread_count',
+                'count': count
+            }))
+
     @database_sync_to_async
     def get_unread_count(self):
         """
         Get the unread notification count for the user
         """
-        return self.user.notifications.filter(is_read=False).count()
+        from .services import get_unread_count
+        return get_unread_count(self.user.id)
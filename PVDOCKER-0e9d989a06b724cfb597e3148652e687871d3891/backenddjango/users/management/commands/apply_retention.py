@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.retention import (
+    RETENTION_CHUNK_PAUSE, RETENTION_CHUNK_SIZE, RETENTION_TIME_BUDGET,
+    apply_retention_policies, get_retention_policy, retention_report
+)
+
+
+class Command(BaseCommand):
+    """Django command to apply, or report on, the data retention policies"""
+
+    help = 'Delete or scrub expired notification and email log rows in throttled chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report expired rows without changing anything')
+        parser.add_argument('--policy', action='append', dest='policies', help='Policy name (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=RETENTION_CHUNK_SIZE)
+        parser.add_argument('--pause', type=float, default=RETENTION_CHUNK_PAUSE)
+        parser.add_argument('--time-budget', type=int, default=RETENTION_TIME_BUDGET)
+
+    def handle(self, *args, **options):
+        try:
+            policies = [get_retention_policy(name) for name in options['policies'] or []] or None
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['dry_run']:
+            for entry in retention_report(policies):
+                self.stdout.write(
+                    f"{entry['policy']}: {entry['expired_rows']} rows to {entry['action']} "
+                    f"(older than {entry['retention_days']} days, oldest {entry['oldest'] or '-'})"
+                )
+            return
+
+        for result in apply_retention_policies(
+            policies,
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+            time_budget=options['time_budget']
+        ):
+            status = 'done' if result['finished'] else 'paused, will resume on the next run'
+            self.stdout.write(f"{result['policy']}: processed {result['processed']} rows ({status})")
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -85,6 +87,11 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Notification feed: a user's notifications, optionally unread only, newest first
+            models.Index(fields=['user', 'is_read', '-created_at'], name='users_notif_user_read_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='users_notif_user_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.notification_type}: {self.title}"
@@ -98,6 +105,48 @@ class Notification(models.Model):
         self.save()
 
 
+class NotificationOutbox(models.Model):
+    """
+    Notification side effects waiting to be delivered
+
+    Rows are written in the same transaction as the notifications they
+    describe and drained by the outbox dispatcher after commit.
+    """
+    CHANNEL_CHOICES = [
+        ('websocket', 'WebSocket'),
+        ('email', 'Email'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_outbox')
+    notification = models.ForeignKey(
+        Notification, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbox_messages'
+    )
+    payload = models.JSONField(default=dict)
+    dedup_key = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='users_outbox_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} for {self.user_id}: {self.status}"
+
+
 class EmailLog(models.Model):
     """
     Model for tracking email sending history
@@ -215,3 +264,15 @@ class NotificationPreference(models.Model):
             'active_loan_manual': self.active_loan_manual_email,
         }
         return preference_map.get(notification_type, False)
+
+
+@receiver([post_save, post_delete], sender=NotificationPreference)
+def invalidate_cached_notification_preferences(sender, instance, **kwargs):
+    """
+    Drop cached preferences when they change, and again on commit so no
+    other process can re-cache the old row in the meantime
+    """
+    from .services import invalidate_notification_preferences
+    
+    invalidate_notification_preferences(instance.user_id)
+    transaction.on_commit(lambda: invalidate_notification_preferences(instance.user_id))
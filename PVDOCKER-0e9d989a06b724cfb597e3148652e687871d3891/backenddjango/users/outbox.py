@@ -0,0 +1,133 @@
+"""
+Notification Outbox Dispatcher
+
+This module drains the NotificationOutbox table written by
+queue_notification_delivery. Pending messages are claimed in batches with
+select_for_update(skip_locked=True) so several dispatchers can run at once,
+delivered over WebSocket or email, and marked sent. Failed messages are
+retried with exponential backoff until OUTBOX_MAX_ATTEMPTS is reached.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import NotificationOutbox
+from .services import send_realtime_notifications
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 200
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 30
+
+
+def deliver_websocket_messages(messages):
+    """
+    Deliver WebSocket outbox messages with one batched group send per user
+
+    Args:
+        messages: List of NotificationOutbox objects on the websocket channel
+
+    Returns:
+        Dictionary mapping failed message ID to error text
+    """
+    by_user = {}
+    for message in messages:
+        by_user.setdefault(message.user_id, []).append(message)
+
+    failed_users = send_realtime_notifications({
+        user_id: [message.payload['notification'] for message in user_messages]
+        for user_id, user_messages in by_user.items()
+    })
+
+    return {
+        message.id: 'WebSocket group send failed'
+        for user_id in failed_users
+        for message in by_user[user_id]
+    }
+
+
+def deliver_email_messages(messages):
+    """
+    Deliver email outbox messages as one batch
+
+    Args:
+        messages: List of NotificationOutbox objects on the email channel
+
+    Returns:
+        Dictionary mapping failed message ID to error text
+    """
+    from crm_backend.tasks import send_notification_emails
+
+    if not messages:
+        return {}
+
+    _, failed, last_exc = send_notification_emails([
+        {
+            'outbox_id': message.id,
+            'user_id': message.user_id,
+            'subject': message.payload['subject'],
+            'message': message.payload['message'],
+            'notification_id': message.notification_id,
+            'email_type': message.payload.get('email_type'),
+        }
+        for message in messages
+    ])
+
+    return {email['outbox_id']: str(last_exc) for email in failed}
+
+
+def dispatch_outbox(batch_size=OUTBOX_BATCH_SIZE, max_batches=None):
+    """
+    Deliver pending outbox messages in batches
+
+    Args:
+        batch_size: Number of messages claimed per batch
+        max_batches: Stop after this many batches (optional, defaults to
+            draining everything that is due)
+
+    Returns:
+        Dictionary with sent, retried and failed message counts
+    """
+    stats = {'sent': 0, 'retried': 0, 'failed': 0}
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            messages = list(
+                NotificationOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', available_at__lte=timezone.now())
+                .order_by('id')[:batch_size]
+            )
+            if not messages:
+                break
+
+            errors = deliver_websocket_messages([m for m in messages if m.channel == 'websocket'])
+            errors.update(deliver_email_messages([m for m in messages if m.channel == 'email']))
+
+            now = timezone.now()
+            sent_ids = [message.id for message in messages if message.id not in errors]
+            NotificationOutbox.objects.filter(id__in=sent_ids).update(status='sent', sent_at=now, last_error='')
+            stats['sent'] += len(sent_ids)
+
+            failures = [message for message in messages if message.id in errors]
+            for message in failures:
+                message.attempts += 1
+                message.last_error = errors[message.id]
+                if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+                    message.status = 'failed'
+                    stats['failed'] += 1
+                else:
+                    message.available_at = now + timedelta(seconds=OUTBOX_RETRY_DELAY * (2 ** message.attempts))
+                    stats['retried'] += 1
+            NotificationOutbox.objects.bulk_update(failures, ['attempts', 'last_error', 'status', 'available_at'])
+
+        batches += 1
+
+    if stats['retried'] or stats['failed']:
+        logger.warning(f"Notification outbox: {stats['retried']} messages to retry, {stats['failed']} failed permanently")
+
+    return stats
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NotificationCursorPagination(CursorPagination):
+    """
+    Cursor pagination for the notification feed
+
+    Pages are keyed on (created_at, id) so fetching older pages stays an
+    index range scan however deep the client scrolls.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,227 @@
+"""
+Data Retention
+
+This module contains the retention policies for the notification and email
+log tables and the chunked job that applies them. Rows are processed in
+primary-key chunks with a pause between chunks so the job never holds long
+locks, and progress is kept in the cache so a run that hits its time budget
+resumes where it stopped.
+
+Policy ages can be overridden with the RETENTION_DAYS setting, a dictionary
+mapping policy name to days.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import EmailLog, Notification, NotificationOutbox
+from .services import invalidate_unread_counts
+
+logger = logging.getLogger(__name__)
+
+RETENTION_CHUNK_SIZE = 1000
+RETENTION_CHUNK_PAUSE = 0.1
+RETENTION_TIME_BUDGET = 15 * 60
+RETENTION_PROGRESS_CACHE_KEY = 'retention:progress:{policy}'
+RETENTION_PROGRESS_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+ACTIVE_LOAN_NOTIFICATION_TYPES = [
+    'active_loan_payment',
+    'active_loan_expiry',
+    'active_loan_critical',
+    'active_loan_manual',
+]
+
+
+class RetentionPolicy:
+    """
+    How long rows of a model are kept and what happens when they expire
+
+    Expired rows are deleted, or when scrub is given, updated with those
+    field values instead so the row stays but its bulky content goes.
+    """
+
+    def __init__(self, name, model, date_field, days, filters=None, scrub=None, description=''):
+        self.name = name
+        self.model = model
+        self.date_field = date_field
+        self.days = days
+        self.filters = filters or Q()
+        self.scrub = scrub
+        self.description = description
+
+    @property
+    def retention_days(self):
+        return getattr(settings, 'RETENTION_DAYS', {}).get(self.name, self.days)
+
+    def cutoff(self, now=None):
+        return (now or timezone.now()) - timedelta(days=self.retention_days)
+
+    def expired(self, now=None):
+        """Queryset of rows this policy applies to."""
+        queryset = self.model.objects.filter(self.filters, **{f'{self.date_field}__lt': self.cutoff(now)})
+        if self.scrub:
+            # Rows already scrubbed need no further work
+            queryset = queryset.exclude(**self.scrub)
+        return queryset.order_by()
+
+
+RETENTION_POLICIES = [
+    RetentionPolicy(
+        'active_loan_notifications', Notification, 'created_at', 90,
+        filters=Q(notification_type__in=ACTIVE_LOAN_NOTIFICATION_TYPES),
+        description='Active loan alerts'
+    ),
+    RetentionPolicy(
+        'read_notifications', Notification, 'created_at', 180,
+        filters=Q(is_read=True),
+        description='Notifications the user has read'
+    ),
+    RetentionPolicy(
+        'notifications', Notification, 'created_at', 365,
+        description='All other notifications'
+    ),
+    RetentionPolicy(
+        'email_log_bodies', EmailLog, 'sent_at', 30,
+        scrub={'message_body': ''},
+        description='Stored email bodies; the log row itself is kept'
+    ),
+    RetentionPolicy(
+        'email_logs', EmailLog, 'sent_at', 365,
+        description='Email log rows'
+    ),
+    RetentionPolicy(
+        'sent_outbox_messages', NotificationOutbox, 'sent_at', 7,
+        filters=Q(status='sent'),
+        description='Delivered notification outbox messages'
+    ),
+    RetentionPolicy(
+        'failed_outbox_messages', NotificationOutbox, 'created_at', 30,
+        filters=Q(status='failed'),
+        description='Undeliverable notification outbox messages'
+    ),
+]
+
+
+def get_retention_policy(name):
+    """
+    Look up a retention policy by name
+
+    Raises:
+        ValueError: If no policy has that name
+    """
+    for policy in RETENTION_POLICIES:
+        if policy.name == name:
+            return policy
+    raise ValueError(f"Unknown retention policy: {name}")
+
+
+def retention_report(policies=None):
+    """
+    Report what each retention policy would remove without changing anything
+
+    Args:
+        policies: Policies to report on (optional, defaults to all)
+
+    Returns:
+        List of dictionaries with the policy name, cutoff, number of
+        expired rows and the oldest expired date
+    """
+    report = []
+    for policy in policies or RETENTION_POLICIES:
+        expired = policy.expired()
+        report.append({
+            'policy': policy.name,
+            'description': policy.description,
+            'action': 'scrub' if policy.scrub else 'delete',
+            'retention_days': policy.retention_days,
+            'cutoff': policy.cutoff().isoformat(),
+            'expired_rows': expired.count(),
+            'oldest': expired.aggregate(oldest=Min(policy.date_field))['oldest'],
+        })
+    return report
+
+
+def apply_retention_policy(policy, chunk_size=RETENTION_CHUNK_SIZE, pause=RETENTION_CHUNK_PAUSE, deadline=None):
+    """
+    Apply one retention policy in primary-key chunks
+
+    Each chunk is a short query on a bounded set of primary keys, followed
+    by a pause. If the deadline passes the cursor is saved so the next run
+    resumes from it.
+
+    Args:
+        policy: RetentionPolicy to apply
+        chunk_size: Rows per chunk
+        pause: Seconds to sleep between chunks
+        deadline: time.monotonic() value to stop at (optional)
+
+    Returns:
+        Dictionary with the policy name, rows processed and whether the
+        policy finished
+    """
+    progress_key = RETENTION_PROGRESS_CACHE_KEY.format(policy=policy.name)
+    progress = cache.get(progress_key) or {'last_pk': 0, 'processed': 0}
+    expired = policy.expired()
+    tracks_unread = policy.model is Notification
+
+    while True:
+        chunk = list(
+            expired.filter(pk__gt=progress['last_pk'])
+            .order_by('pk')
+            .values_list('pk', 'user_id' if tracks_unread else 'pk')[:chunk_size]
+        )
+        if not chunk:
+            cache.delete(progress_key)
+            return {'policy': policy.name, 'processed': progress['processed'], 'finished': True}
+
+        pks = [pk for pk, _ in chunk]
+        rows = policy.model.objects.filter(pk__in=pks)
+        if policy.scrub:
+            rows.update(**policy.scrub)
+        else:
+            rows.delete()
+        if tracks_unread:
+            # Deleted notifications may have been unread
+            invalidate_unread_counts({user_id for _, user_id in chunk})
+
+        progress['last_pk'] = pks[-1]
+        progress['processed'] += len(pks)
+        cache.set(progress_key, progress, RETENTION_PROGRESS_CACHE_TIMEOUT)
+
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.info(f"Retention policy {policy.name} paused at pk {progress['last_pk']}")
+            return {'policy': policy.name, 'processed': progress['processed'], 'finished': False}
+        time.sleep(pause)
+
+
+def apply_retention_policies(policies=None, chunk_size=RETENTION_CHUNK_SIZE, pause=RETENTION_CHUNK_PAUSE,
+                             time_budget=RETENTION_TIME_BUDGET):
+    """
+    Apply retention policies in order within a shared time budget
+
+    Args:
+        policies: Policies to apply (optional, defaults to all)
+        chunk_size: Rows per chunk
+        pause: Seconds to sleep between chunks
+        time_budget: Seconds the whole run may take before pausing
+
+    Returns:
+        List of per-policy result dictionaries
+    """
+    deadline = time.monotonic() + time_budget
+    results = []
+    for policy in policies or RETENTION_POLICIES:
+        if time.monotonic() >= deadline:
+            results.append({'policy': policy.name, 'processed': 0, 'finished': False})
+            continue
+        result = apply_retention_policy(policy, chunk_size=chunk_size, pause=pause, deadline=deadline)
+        logger.info(f"Retention policy {policy.name}: processed {result['processed']} rows")
+        results.append(result)
+    return results
@@ -1,15 +1,35 @@
-from .models import Notification, User, NotificationPreference, EmailLog
+from .models import Notification, User, NotificationPreference, EmailLog, NotificationOutbox
 from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from collections import OrderedDict
+import asyncio
+import hashlib
 import json
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Unread notification counters, kept in the cache and adjusted in place
+UNREAD_COUNT_CACHE_KEY = 'notifications:unread:{user_id}'
+UNREAD_COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+UNREAD_COUNT_RECONCILE_BATCH_SIZE = 1000
+
+# Notification preferences, cached per process and in the shared cache
+PREFERENCE_CACHE_KEY = 'notifications:preferences:{user_id}'
+PREFERENCE_CACHE_TIMEOUT = 60 * 60
+PREFERENCE_LOCAL_CACHE_SIZE = 1024
+PREFERENCE_LOCAL_CACHE_TTL = 30
+
 
 def create_notification(user, title, message, notification_type, related_object_id=None, related_object_type=None):
     """
@@ -26,16 +46,11 @@ def create_notification(user, title, message, notification_type, related_object_
     Returns:
         Created Notification object or None if notification preferences prevent creation
     """
-    # Check if user has notification preferences
-    try:
-        preferences = NotificationPreference.objects.get(user=user)
-        
-        # Check if user wants in-app notifications for this type
-        if not preferences.get_in_app_preference(notification_type):
-            return None
-    except NotificationPreference.DoesNotExist:
-        # If no preferences exist, create default preferences
-        preferences = NotificationPreference.objects.create(user=user)
+    preferences = get_notification_preferences(user.id)
+    
+    # Check if user wants in-app notifications for this type
+    if not preferences.get_in_app_preference(notification_type):
+        return None
     
     # Create the notification
     notification = Notification.objects.create(
@@ -46,63 +61,575 @@ def create_notification(user, title, message, notification_type, related_object_
         related_object_id=related_object_id,
         related_object_type=related_object_type
     )
+    adjust_unread_counts({user.id: 1})
     
-    # Send real-time notification via WebSocket
-    try:
-        channel_layer = get_channel_layer()
-        notification_data = {
-            'id': notification.id,
-            'title': notification.title,
-            'message': notification.message,
-            'notification_type': notification.notification_type,
-            'related_object_id': notification.related_object_id,
-            'related_object_type': notification.related_object_type,
-            'is_read': notification.is_read,
-            'created_at': notification.created_at.isoformat()
-        }
+    # Queue the real-time message and email for delivery after commit
+    emails = []
+    if user.email and preferences.get_email_preference(notification_type):
+        emails.append({
+            'user_id': user.id,
+            'subject': title,
+            'message': message,
+            'notification_id': notification.id
+        })
+    queue_notification_delivery([notification], emails)
+    
+    return notification
+
+
+class _PreferenceLRUCache:
+    """
+    Small thread-safe LRU of notification preferences for this process
+    
+    Entries expire after PREFERENCE_LOCAL_CACHE_TTL seconds so changes made
+    in other processes are picked up from the shared cache.
+    """
+    
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, preferences = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return preferences
+    
+    def set(self, user_id, preferences):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, preferences)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def delete(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_preference_cache = _PreferenceLRUCache(PREFERENCE_LOCAL_CACHE_SIZE, PREFERENCE_LOCAL_CACHE_TTL)
+
+
+def get_notification_preferences(user_id):
+    """
+    Get notification preferences for a user through the preference cache
+    
+    Args:
+        user_id: ID of the user
         
-        # Send notification to user's group
-        async_to_sync(channel_layer.group_send)(
-            f"user_{user.id}_notifications",
-            {
-                'type': 'notification_message',
-                'notification': notification_data
-            }
+    Returns:
+        NotificationPreference object
+    """
+    return get_notification_preferences_bulk([user_id])[user_id]
+
+
+def get_notification_preferences_bulk(user_ids):
+    """
+    Get notification preferences for many users at once
+    
+    Preferences are read from the per-process LRU, then the shared cache in
+    one round trip, and only the remainder from the database in one query.
+    Default preferences are bulk created for users that have none, matching
+    the behaviour of create_notification.
+    
+    Args:
+        user_ids: Iterable of user IDs
+        
+    Returns:
+        Dictionary mapping user ID to NotificationPreference
+    """
+    preferences = {}
+    missing = set()
+    for user_id in set(user_ids):
+        cached = _preference_cache.get(user_id)
+        if cached is None:
+            missing.add(user_id)
+        else:
+            preferences[user_id] = cached
+    if not missing:
+        return preferences
+    
+    keys = {PREFERENCE_CACHE_KEY.format(user_id=user_id): user_id for user_id in missing}
+    for key, cached in cache.get_many(keys.keys()).items():
+        user_id = keys[key]
+        preferences[user_id] = cached
+        _preference_cache.set(user_id, cached)
+        missing.discard(user_id)
+    if not missing:
+        return preferences
+    
+    loaded = {
+        preference.user_id: preference
+        for preference in NotificationPreference.objects.filter(user_id__in=missing)
+    }
+    
+    defaults = [NotificationPreference(user_id=user_id) for user_id in missing - loaded.keys()]
+    if defaults:
+        NotificationPreference.objects.bulk_create(defaults, ignore_conflicts=True)
+        for preference in NotificationPreference.objects.filter(user_id__in=[p.user_id for p in defaults]):
+            loaded[preference.user_id] = preference
+    
+    cache.set_many(
+        {PREFERENCE_CACHE_KEY.format(user_id=user_id): preference for user_id, preference in loaded.items()},
+        PREFERENCE_CACHE_TIMEOUT
+    )
+    for user_id, preference in loaded.items():
+        _preference_cache.set(user_id, preference)
+    preferences.update(loaded)
+    
+    return preferences
+
+
+def invalidate_notification_preferences(user_id):
+    """Drop a user's cached notification preferences in this process and the shared cache."""
+    _preference_cache.delete(user_id)
+    cache.delete(PREFERENCE_CACHE_KEY.format(user_id=user_id))
+
+
+def clear_notification_preference_cache():
+    """Drop every notification preference cached by this process."""
+    _preference_cache.clear()
+
+
+def serialize_notification(notification):
+    """
+    Build the WebSocket payload for a notification
+    
+    Args:
+        notification: Notification object
+        
+    Returns:
+        Dictionary of notification fields
+    """
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'related_object_id': notification.related_object_id,
+        'related_object_type': notification.related_object_type,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat()
+    }
+
+
+def get_unread_count(user_id):
+    """
+    Get the unread notification count for a user from its counter
+    
+    The counter is recomputed with one COUNT query on a cache miss.
+    
+    Args:
+        user_id: ID of the user
+        
+    Returns:
+        Number of unread notifications
+    """
+    return get_unread_counts([user_id]).get(user_id, 0)
+
+
+def get_unread_counts(user_ids):
+    """
+    Get unread notification counts for many users
+    
+    Counters are read from the cache in one round trip. Users without a
+    counter are recomputed together with one grouped query.
+    
+    Args:
+        user_ids: Iterable of user IDs
+        
+    Returns:
+        Dictionary mapping user ID to unread count
+    """
+    keys = {UNREAD_COUNT_CACHE_KEY.format(user_id=user_id): user_id for user_id in user_ids}
+    cached = cache.get_many(keys.keys())
+    counts = {keys[key]: count for key, count in cached.items()}
+    
+    missing = [user_id for key, user_id in keys.items() if key not in cached]
+    if missing:
+        recomputed = dict.fromkeys(missing, 0)
+        recomputed.update(
+            Notification.objects.filter(user_id__in=missing, is_read=False)
+            .order_by()
+            .values_list('user_id')
+            .annotate(count=Count('id'))
         )
+        for user_id, count in recomputed.items():
+            # add() keeps a counter another process created meanwhile
+            cache.add(UNREAD_COUNT_CACHE_KEY.format(user_id=user_id), count, UNREAD_COUNT_CACHE_TIMEOUT)
+        counts.update(recomputed)
+    
+    return counts
+
+
+def adjust_unread_counts(deltas):
+    """
+    Atomically adjust unread counters in place
+    
+    Users without a counter are skipped; their count is recomputed on the
+    next read. A counter that would go negative has drifted and is dropped.
+    
+    Args:
+        deltas: Dictionary mapping user ID to the change in unread count
+    """
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        key = UNREAD_COUNT_CACHE_KEY.format(user_id=user_id)
+        try:
+            if cache.incr(key, delta) < 0:
+                cache.delete(key)
+        except ValueError:
+            # No counter yet
+            pass
+
+
+def invalidate_unread_counts(user_ids):
+    """Drop unread counters so the next read recomputes them."""
+    cache.delete_many([UNREAD_COUNT_CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def reconcile_unread_counts():
+    """
+    Rewrite every user's unread counter from the notifications table
+    
+    Corrects counters that drifted through rolled back transactions, bulk
+    deletes or concurrent recomputes. Counts are read with one grouped
+    query and written in batches.
+    
+    Returns:
+        Number of counters written
+    """
+    counts = dict(
+        Notification.objects.filter(is_read=False)
+        .order_by()
+        .values_list('user_id')
+        .annotate(count=Count('id'))
+    )
+    
+    written = 0
+    user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+    batch = {}
+    for user_id in user_ids.iterator(chunk_size=UNREAD_COUNT_RECONCILE_BATCH_SIZE):
+        batch[UNREAD_COUNT_CACHE_KEY.format(user_id=user_id)] = counts.get(user_id, 0)
+        if len(batch) >= UNREAD_COUNT_RECONCILE_BATCH_SIZE:
+            cache.set_many(batch, UNREAD_COUNT_CACHE_TIMEOUT)
+            written += len(batch)
+            batch = {}
+    if batch:
+        cache.set_many(batch, UNREAD_COUNT_CACHE_TIMEOUT)
+        written += len(batch)
+    
+    return written
+
+
+def mark_notifications_read(user, notification_ids=None):
+    """
+    Mark a user's notifications as read and update their unread counter
+    
+    Only unread notifications are updated, so the number of rows changed
+    is exactly how far the counter drops.
+    
+    Args:
+        user: User whose notifications are marked
+        notification_ids: IDs to mark (optional, defaults to all unread)
         
-        # Update unread count
-        unread_count = Notification.objects.filter(user=user, is_read=False).count()
+    Returns:
+        Tuple of (number of notifications marked, new unread count)
+    """
+    notifications = Notification.objects.filter(user=user, is_read=False)
+    if notification_ids is not None:
+        notifications = notifications.filter(id__in=notification_ids)
+    
+    updated = notifications.update(is_read=True, read_at=timezone.now())
+    
+    if notification_ids is None:
+        cache.set(UNREAD_COUNT_CACHE_KEY.format(user_id=user.id), 0, UNREAD_COUNT_CACHE_TIMEOUT)
+    else:
+        adjust_unread_counts({user.id: -updated})
+    
+    return updated, get_unread_count(user.id)
+
+
+def send_unread_count(user_id, count):
+    """
+    Push a user's unread count to their WebSocket group
+    
+    Args:
+        user_id: ID of the user
+        count: Unread notification count
+    """
+    try:
+        channel_layer = get_channel_layer()
         async_to_sync(channel_layer.group_send)(
-            f"user_{user.id}_notifications",
+            f"user_{user_id}_notifications",
             {
                 'type': 'notification_count',
-                'count': unread_count
+                'count': count
             }
         )
     except Exception as e:
-        # Log the error but don't fail the notification creation
+        # Log the error but don't fail the operation
         logger.error(f"Error sending WebSocket notification: {str(e)}")
+
+
+def send_realtime_notifications(notifications_by_user):
+    """
+    Push notifications to their users' WebSocket groups in one batch
     
-    # Check if user wants email notifications for this type
+    Each user receives a single 'notification_batch' message carrying their
+    notifications and current unread count. All group sends are awaited
+    together in one event loop hop.
+    
+    Args:
+        notifications_by_user: Dictionary mapping user ID to a list of
+            serialized notifications
+        
+    Returns:
+        Set of user IDs whose message could not be sent
+    """
+    if not notifications_by_user:
+        return set()
+    
+    user_ids = list(notifications_by_user)
     try:
-        if preferences.get_email_preference(notification_type):
-            send_email_notification(
-                user=user,
-                subject=title,
-                message=message,
-                notification=notification
-            )
+        channel_layer = get_channel_layer()
+        unread_counts = get_unread_counts(user_ids)
+        
+        async def group_send_all():
+            return await asyncio.gather(*(
+                channel_layer.group_send(
+                    f"user_{user_id}_notifications",
+                    {
+                        'type': 'notification_batch',
+                        'notifications': notifications_by_user[user_id],
+                        'count': unread_counts.get(user_id, 0)
+                    }
+                )
+                for user_id in user_ids
+            ), return_exceptions=True)
+        
+        results = async_to_sync(group_send_all)()
     except Exception as e:
-        # Log the error but don't fail the notification creation
-        logger.error(f"Error sending email notification: {str(e)}")
+        logger.error(f"Error sending WebSocket notifications: {str(e)}")
+        return set(user_ids)
     
-    return notification
+    failed = set()
+    for user_id, result in zip(user_ids, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error sending WebSocket notification to user {user_id}: {str(result)}")
+            failed.add(user_id)
+    return failed
+
+
+def queue_notification_delivery(notifications, emails=None, email_type=None):
+    """
+    Record notification side effects in the outbox for delivery after commit
+    
+    Outbox rows are written in the caller's transaction, so nothing is
+    delivered for changes that roll back. Once the transaction commits the
+    outbox dispatcher is scheduled to drain them.
+    
+    Args:
+        notifications: List of saved Notification objects
+        emails: List of email dictionaries with user_id, subject, message
+            and notification_id keys (optional)
+        email_type: Type of email being sent (optional)
+    """
+    messages = [
+        NotificationOutbox(
+            channel='websocket',
+            user_id=notification.user_id,
+            notification_id=notification.id,
+            payload={'notification': serialize_notification(notification)},
+            dedup_key=f"websocket:notification:{notification.id}"
+        )
+        for notification in notifications
+    ]
+    
+    for email in emails or []:
+        if email.get('notification_id'):
+            dedup_key = f"email:notification:{email['notification_id']}"
+        else:
+            digest = hashlib.sha1(f"{email['subject']}\n{email['message']}".encode('utf-8')).hexdigest()
+            dedup_key = f"email:digest:{email['user_id']}:{digest}:{timezone.now().date().isoformat()}"
+        messages.append(NotificationOutbox(
+            channel='email',
+            user_id=email['user_id'],
+            notification_id=email.get('notification_id'),
+            payload={
+                'subject': email['subject'],
+                'message': email['message'],
+                'email_type': email.get('email_type') or email_type
+            },
+            dedup_key=dedup_key
+        ))
+    
+    if not messages:
+        return
+    
+    NotificationOutbox.objects.bulk_create(messages, ignore_conflicts=True)
+    transaction.on_commit(schedule_outbox_dispatch)
+
+
+def schedule_outbox_dispatch():
+    """Enqueue the outbox dispatcher; the periodic run picks up anything missed."""
+    from .tasks import dispatch_notification_outbox
+    
+    try:
+        dispatch_notification_outbox.delay()
+    except Exception as e:
+        logger.exception(f"Error scheduling notification outbox dispatch: {str(e)}")
+
+
+def create_notifications_bulk(recipients, title, message, notification_type, related_object_id=None,
+                              related_object_type=None, email_type=None):
+    """
+    Create the same notification for many users at once
+    
+    Preferences are fetched in one query, notifications are inserted with
+    bulk_create, and after commit every recipient is notified over
+    WebSocket in one batched operation with a single email task enqueued
+    for the users who opted into email.
+    
+    Args:
+        recipients: Iterable of User objects (duplicates and None are ignored)
+        title: Notification title
+        message: Notification message
+        notification_type: Type of notification
+        related_object_id: ID of related object (optional)
+        related_object_type: Type of related object (optional)
+        email_type: Type of email being sent (optional)
+        
+    Returns:
+        List of created Notification objects
+    """
+    users = {}
+    for user in recipients:
+        if user is not None:
+            users.setdefault(user.id, user)
+    if not users:
+        return []
+    
+    preferences = get_notification_preferences_bulk(users.keys())
+    
+    created = Notification.objects.bulk_create([
+        Notification(
+            user=user,
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            related_object_id=related_object_id,
+            related_object_type=related_object_type
+        )
+        for user_id, user in users.items()
+        if preferences[user_id].get_in_app_preference(notification_type)
+    ])
+    adjust_unread_counts({notification.user_id: 1 for notification in created})
+    
+    emails = [
+        {
+            'user_id': notification.user_id,
+            'subject': title,
+            'message': message,
+            'notification_id': notification.id
+        }
+        for notification in created
+        if notification.user.email and preferences[notification.user_id].get_email_preference(notification_type)
+    ]
+    
+    queue_notification_delivery(created, emails, email_type=email_type)
+    
+    return created
+
+
+def create_notifications_batch(notifications, email_subject=None, email_type=None):
+    """
+    Create many notifications at once and deliver them per user
+    
+    Recipients and their preferences are loaded once, all notifications are
+    inserted with a single bulk_create, and after commit each user receives
+    one WebSocket message and at most one digest-style email covering all
+    of their notifications in the batch.
+    
+    Args:
+        notifications: Iterable of unsaved Notification objects
+        email_subject: Subject for the per-user digest email (optional,
+            defaults to the notification title when a user has only one)
+        email_type: Type of email being sent (optional)
+        
+    Returns:
+        List of created Notification objects
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return []
+    
+    preferences = get_notification_preferences_bulk(n.user_id for n in notifications)
+    
+    # Drop notifications the recipient has opted out of
+    notifications = [
+        n for n in notifications
+        if preferences[n.user_id].get_in_app_preference(n.notification_type)
+    ]
+    if not notifications:
+        return []
+    
+    created = Notification.objects.bulk_create(notifications)
+    
+    by_user = {}
+    for notification in created:
+        by_user.setdefault(notification.user_id, []).append(notification)
+    adjust_unread_counts({user_id: len(user_notifications) for user_id, user_notifications in by_user.items()})
+    
+    # One email per user covering every notification they opted into
+    emails = []
+    for user_id, user_notifications in by_user.items():
+        emailable = [
+            n for n in user_notifications
+            if preferences[user_id].get_email_preference(n.notification_type)
+        ]
+        if not emailable or not emailable[0].user.email:
+            continue
+        
+        if len(emailable) == 1:
+            subject = emailable[0].title
+            message = emailable[0].message
+        else:
+            subject = email_subject or f"You have {len(emailable)} new notifications"
+            message = "\n\n".join(f"{n.title}\n{n.message}" for n in emailable)
+        
+        emails.append({
+            'user_id': user_id,
+            'subject': subject,
+            'message': message,
+            'notification_id': emailable[0].id if len(emailable) == 1 else None
+        })
+    
+    queue_notification_delivery(created, emails, email_type=email_type)
+    
+    return created
 
 
 def create_application_notification(application, notification_type, title, message):
     """
     Create notifications for users related to an application
     
+    Notifies the broker, BD, borrowers with user accounts and all admin
+    users through create_notifications_bulk.
+    
     Args:
         application: Application object
         notification_type: Type of notification
@@ -112,63 +639,32 @@ def create_application_notification(application, notification_type, title, messa
     Returns:
         List of created Notification objects
     """
-    notifications = []
+    recipients = []
     
     # Notify broker
     if application.broker and application.broker.user:
-        broker_notification = create_notification(
-            user=application.broker.user,
-            title=title,
-            message=message,
-            notification_type=notification_type,
-            related_object_id=application.id,
-            related_object_type='application'
-        )
-        if broker_notification:
-            notifications.append(broker_notification)
+        recipients.append(application.broker.user)
     
     # Notify BD
     if application.bd and application.bd.user:
-        bd_notification = create_notification(
-            user=application.bd.user,
-            title=title,
-            message=message,
-            notification_type=notification_type,
-            related_object_id=application.id,
-            related_object_type='application'
-        )
-        if bd_notification:
-            notifications.append(bd_notification)
+        recipients.append(application.bd.user)
     
     # Notify borrowers who have user accounts
-    for borrower in application.borrowers.all():
+    for borrower in application.borrowers.select_related('user'):
         if borrower.user:
-            borrower_notification = create_notification(
-                user=borrower.user,
-                title=title,
-                message=message,
-                notification_type=notification_type,
-                related_object_id=application.id,
-                related_object_type='application'
-            )
-            if borrower_notification:
-                notifications.append(borrower_notification)
+            recipients.append(borrower.user)
     
     # Notify admin users
-    admin_users = User.objects.filter(role='admin')
-    for admin in admin_users:
-        admin_notification = create_notification(
-            user=admin,
-            title=title,
-            message=message,
-            notification_type=notification_type,
-            related_object_id=application.id,
-            related_object_type='application'
-        )
-        if admin_notification:
-            notifications.append(admin_notification)
+    recipients.extend(User.objects.filter(role='admin'))
     
-    return notifications
+    return create_notifications_bulk(
+        recipients,
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        related_object_id=application.id,
+        related_object_type='application'
+    )
 
 
 def send_email_notification(user, subject, message, notification=None, template_name=None, context=None, email_type=None):
@@ -0,0 +1,67 @@
+"""
+Notification maintenance tasks.
+
+This module contains Celery tasks for:
+- Reconciling the cached unread notification counters
+- Dispatching the notification outbox
+- Applying data retention policies to the notification and email log tables
+"""
+
+from celery import shared_task
+import logging
+
+from .outbox import dispatch_outbox
+from .retention import apply_retention_policies, get_retention_policy, retention_report
+from .services import reconcile_unread_counts
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_unread_notification_counts():
+    """
+    Rewrite every user's unread notification counter from the database.
+    
+    Counters are adjusted in place as notifications are created and read;
+    this corrects any drift from rolled back transactions or bulk deletes.
+    """
+    written = reconcile_unread_counts()
+    logger.info(f"Reconciled {written} unread notification counters")
+    return f"Reconciled {written} unread notification counters"
+
+
+@shared_task
+def dispatch_notification_outbox():
+    """
+    Deliver pending notification outbox messages.
+    
+    Scheduled after each commit that writes to the outbox, and periodically
+    to pick up retries and anything a crashed dispatcher left behind.
+    """
+    stats = dispatch_outbox()
+    logger.info(f"Dispatched notification outbox: {stats}")
+    return f"Sent {stats['sent']} outbox messages, {stats['retried']} to retry, {stats['failed']} failed"
+
+
+@shared_task
+def apply_data_retention(dry_run=False, policy_names=None):
+    """
+    Apply data retention policies in throttled primary-key chunks.
+    
+    Args:
+        dry_run: If True, only report what would be removed
+        policy_names: Names of the policies to apply (optional, defaults to all)
+    """
+    policies = [get_retention_policy(name) for name in policy_names] if policy_names else None
+    
+    if dry_run:
+        report = retention_report(policies)
+        for entry in report:
+            logger.info(
+                f"Retention dry run {entry['policy']}: {entry['expired_rows']} rows would be "
+                f"{'scrubbed' if entry['action'] == 'scrub' else 'deleted'} (older than {entry['cutoff']})"
+            )
+        return [{**entry, 'oldest': entry['oldest'].isoformat() if entry['oldest'] else None} for entry in report]
+    
+    results = apply_retention_policies(policies)
+    return results
@@ -0,0 +1,184 @@
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase
+
+from crm_backend.tasks import (
+    EMAIL_BATCH_MAX_ATTEMPTS,
+    email_connection_pool,
+    send_email_batch,
+    send_email_batch_async,
+    send_daily_digest,
+    send_notification_emails,
+    send_weekly_digest,
+)
+from users.models import User, EmailLog, Notification, NotificationPreference
+
+
+class EmailBatchTestCase(TestCase):
+    """Test case for batched email sending over a pooled connection"""
+
+    def setUp(self):
+        """Set up test data"""
+        email_connection_pool.reset()
+        self.user = User.objects.create_user(
+            email='user@example.com',
+            password='testpassword',
+            role='admin'
+        )
+        self.messages = [
+            {
+                'subject': f'Subject {i}',
+                'message': f'Message {i}',
+                'recipient_list': [f'recipient{i}@example.com'],
+                'user_id': self.user.id,
+                'email_type': 'application_status',
+            }
+            for i in range(3)
+        ]
+
+    def test_batch_uses_one_connection(self):
+        """Test a batch opens one connection and logs with one insert"""
+        with patch('crm_backend.tasks.get_connection', wraps=mail.get_connection) as mock_get_connection:
+            with self.assertNumQueries(1):
+                sent, failed = send_email_batch(self.messages)
+
+        self.assertEqual(mock_get_connection.call_count, 1)
+        self.assertEqual(len(sent), 3)
+        self.assertEqual(failed, [])
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(EmailLog.objects.filter(user=self.user, status='sent').count(), 3)
+
+    def test_connection_is_reused_across_batches(self):
+        """Test the pooled connection is kept open between batches"""
+        with patch('crm_backend.tasks.get_connection', wraps=mail.get_connection) as mock_get_connection:
+            send_email_batch(self.messages[:1])
+            send_email_batch(self.messages[1:])
+
+        self.assertEqual(mock_get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failed_message_is_retried_alone(self):
+        """Test only the failed message is re-enqueued"""
+        original = EmailBackend.send_messages
+
+        def flaky_send(backend, messages):
+            if messages[0].subject == 'Subject 1':
+                raise ConnectionError('SMTP unavailable')
+            return original(backend, messages)
+
+        with patch.object(EmailBackend, 'send_messages', flaky_send), \
+                patch.object(send_email_batch_async, 'apply_async') as mock_apply_async:
+            result = send_email_batch_async(self.messages)
+
+        self.assertEqual(result, {'sent': 2, 'retrying': 1, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 2)
+        retried = mock_apply_async.call_args.kwargs['args'][0]
+        self.assertEqual([entry['subject'] for entry in retried], ['Subject 1'])
+        self.assertEqual(retried[0]['attempts'], 1)
+        self.assertEqual(EmailLog.objects.count(), 2)
+
+    def test_message_is_dropped_after_max_attempts(self):
+        """Test a message that keeps failing is not retried forever"""
+        message = {**self.messages[0], 'attempts': EMAIL_BATCH_MAX_ATTEMPTS - 1}
+
+        with patch.object(EmailBackend, 'send_messages', side_effect=ConnectionError('SMTP unavailable')), \
+                patch.object(send_email_batch_async, 'apply_async') as mock_apply_async:
+            result = send_email_batch_async([message])
+
+        self.assertEqual(result, {'sent': 0, 'retrying': 0, 'failed': 1})
+        mock_apply_async.assert_not_called()
+
+    def test_notification_emails_resolve_users(self):
+        """Test notification emails are addressed to the user's email"""
+        sent, failed, last_exc = send_notification_emails([
+            {'user_id': self.user.id, 'subject': 'Title', 'message': 'Body', 'notification_id': None},
+        ], email_type='application_status')
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(failed, [])
+        self.assertIsNone(last_exc)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        self.assertEqual(EmailLog.objects.get().email_type, 'application_status')
+
+
+class DigestTestCase(TestCase):
+    """Test case for set-based digest emails"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.users = []
+        for i in range(3):
+            user = User.objects.create_user(
+                email=f'user{i}@example.com',
+                password='testpassword',
+                first_name=f'User{i}'
+            )
+            NotificationPreference.objects.create(user=user, daily_digest=True, weekly_digest=i != 2)
+            for j in range(i + 1):
+                Notification.objects.create(
+                    user=user,
+                    title=f'Notification {i}.{j}',
+                    message='Message',
+                    notification_type='application_status'
+                )
+            self.users.append(user)
+
+        # Opted out users and read notifications are left out
+        opted_out = User.objects.create_user(email='optout@example.com', password='testpassword')
+        NotificationPreference.objects.create(user=opted_out, daily_digest=False, weekly_digest=False)
+        Notification.objects.create(user=opted_out, title='Skipped', message='Message')
+        Notification.objects.create(user=self.users[0], title='Read', message='Message', is_read=True)
+
+    def sent_messages(self, mock_group):
+        return [
+            message
+            for signature in mock_group.call_args[0][0]
+            for message in signature.args[0]
+        ]
+
+    @patch('crm_backend.tasks.group')
+    def test_daily_digest_uses_one_query(self, mock_group):
+        """Test all digest users are served by a single query"""
+        with self.assertNumQueries(1):
+            queued = send_daily_digest()
+
+        self.assertEqual(queued, 3)
+        messages = self.sent_messages(mock_group)
+        self.assertEqual(
+            sorted(message['recipient_list'][0] for message in messages),
+            ['user0@example.com', 'user1@example.com', 'user2@example.com']
+        )
+        user2_message = next(m for m in messages if m['user_id'] == self.users[2].id)
+        self.assertIn('3 unread notifications', user2_message['html_message'])
+        self.assertIn('Notification 2.0', user2_message['html_message'])
+        self.assertNotIn('Notification 1.0', user2_message['html_message'])
+
+    @patch('crm_backend.tasks.group')
+    def test_weekly_digest_respects_preferences(self, mock_group):
+        """Test only weekly digest subscribers get the weekly email"""
+        queued = send_weekly_digest()
+
+        self.assertEqual(queued, 2)
+        self.assertEqual(
+            {message['user_id'] for message in self.sent_messages(mock_group)},
+            {self.users[0].id, self.users[1].id}
+        )
+
+    @patch('crm_backend.tasks.DIGEST_BATCH_SIZE', 2)
+    @patch('crm_backend.tasks.group')
+    def test_digest_fans_out_in_chunks(self, mock_group):
+        """Test digest emails are split into batches"""
+        send_daily_digest()
+
+        signatures = mock_group.call_args[0][0]
+        self.assertEqual([len(signature.args[0]) for signature in signatures], [2, 1])
+
+    @patch('crm_backend.tasks.group')
+    def test_no_notifications_sends_nothing(self, mock_group):
+        """Test nothing is queued when there is nothing to report"""
+        Notification.objects.update(is_read=True)
+
+        self.assertEqual(send_daily_digest(), 0)
+        mock_group.assert_not_called()
@@ -294,18 +294,20 @@ class TestEmailTasksWithPytest(TestCase):
             mock_template.render.return_value = '<p>Daily Digest Content</p>'
             mock_get_template.return_value = mock_template
             
-            # Mock send_email_async to avoid actual sending
-            with patch('crm_backend.tasks.send_email_async.delay') as mock_send:
+            # Mock the batch fan-out to avoid actual sending
+            with patch('crm_backend.tasks.group') as mock_group:
                 # Call the task directly (not through Celery)
-                send_daily_digest()
+                queued = send_daily_digest()
                 
-                # Check that send_email_async was called
-                mock_send.assert_called()
+                # Check that one batch was fanned out
+                self.assertEqual(queued, 1)
+                mock_group.return_value.apply_async.assert_called_once()
                 
                 # Check that the email was sent to the correct user
-                args, kwargs = mock_send.call_args
-                self.assertEqual(kwargs['recipient_list'], [self.user.email])
-                self.assertIn('Daily Digest', kwargs['subject'])
+                [signature] = mock_group.call_args[0][0]
+                [message] = signature.args[0]
+                self.assertEqual(message['recipient_list'], [self.user.email])
+                self.assertIn('Daily Digest', message['subject'])
     
     @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
     def test_send_weekly_digest(self):
@@ -316,18 +318,20 @@ class TestEmailTasksWithPytest(TestCase):
             mock_template.render.return_value = '<p>Weekly Digest Content</p>'
             mock_get_template.return_value = mock_template
             
-            # Mock send_email_async to avoid actual sending
-            with patch('crm_backend.tasks.send_email_async.delay') as mock_send:
+            # Mock the batch fan-out to avoid actual sending
+            with patch('crm_backend.tasks.group') as mock_group:
                 # Call the task directly (not through Celery)
-                send_weekly_digest()
+                queued = send_weekly_digest()
                 
-                # Check that send_email_async was called
-                mock_send.assert_called()
+                # Check that one batch was fanned out
+                self.assertEqual(queued, 1)
+                mock_group.return_value.apply_async.assert_called_once()
                 
                 # Check that the email was sent to the correct user
-                args, kwargs = mock_send.call_args
-                self.assertEqual(kwargs['recipient_list'], [self.user.email])
-                self.assertIn('Weekly Digest', kwargs['subject'])
+                [signature] = mock_group.call_args[0][0]
+                [message] = signature.args[0]
+                self.assertEqual(message['recipient_list'], [self.user.email])
+                self.assertIn('Weekly Digest', message['subject'])
     
     def test_export_email_logs_to_docx(self):
         """Test the export_email_logs_to_docx task"""
@@ -0,0 +1,153 @@
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from users.models import User, Notification, NotificationPreference
+from users.outbox import dispatch_outbox
+from users.services import (
+    clear_notification_preference_cache, create_notifications_batch, create_notifications_bulk, get_notification_preferences_bulk
+)
+
+
+class NotificationBatchTestCase(TestCase):
+    """Test case for batched notification creation"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        clear_notification_preference_cache()
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            password='testpassword',
+            role='admin'
+        )
+        self.accounts = User.objects.create_user(
+            email='accounts@example.com',
+            password='testpassword',
+            role='accounts'
+        )
+        NotificationPreference.objects.create(
+            user=self.accounts,
+            active_loan_expiry_in_app=False
+        )
+
+    def build_notifications(self, users, notification_type, count):
+        """Build unsaved notifications for each user"""
+        return [
+            Notification(
+                user=user,
+                title=f'Alert {index}',
+                message=f'Message {index}',
+                notification_type=notification_type,
+                related_object_id=index,
+                related_object_type='active_loan'
+            )
+            for user in users
+            for index in range(count)
+        ]
+
+    def test_get_notification_preferences_bulk_creates_defaults(self):
+        """Test missing preferences are bulk created"""
+        preferences = get_notification_preferences_bulk([self.admin.id, self.accounts.id])
+
+        self.assertEqual(set(preferences), {self.admin.id, self.accounts.id})
+        self.assertTrue(NotificationPreference.objects.filter(user=self.admin).exists())
+        self.assertFalse(preferences[self.accounts.id].active_loan_expiry_in_app)
+
+    def mock_channel_layer(self):
+        """Build a channel layer whose group_send can be awaited"""
+        channel_layer = MagicMock()
+        channel_layer.group_send = AsyncMock()
+        return channel_layer
+
+    @patch('users.tasks.dispatch_notification_outbox.delay')
+    @patch('users.services.get_channel_layer')
+    def test_batch_sends_one_message_and_email_per_user(self, mock_get_channel_layer, mock_dispatch):
+        """Test each user gets one WebSocket message and one digest email"""
+        channel_layer = self.mock_channel_layer()
+        mock_get_channel_layer.return_value = channel_layer
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = create_notifications_batch(
+                self.build_notifications([self.admin, self.accounts], 'active_loan_payment', 3),
+                email_subject='Payment reminders'
+            )
+            # Dispatch waits for the transaction to commit
+            mock_dispatch.assert_not_called()
+
+        self.assertEqual(len(created), 6)
+        self.assertEqual(Notification.objects.count(), 6)
+        mock_dispatch.assert_called_once()
+
+        self.assertEqual(dispatch_outbox()['sent'], 8)
+
+        self.assertEqual(channel_layer.group_send.await_count, 2)
+        group, event = channel_layer.group_send.await_args_list[0][0]
+        self.assertEqual(event['type'], 'notification_batch')
+        self.assertEqual(len(event['notifications']), 3)
+        self.assertEqual(event['count'], 3)
+
+        # One digest email per user
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].subject, 'Payment reminders')
+
+    @patch('users.tasks.dispatch_notification_outbox.delay')
+    @patch('users.services.get_channel_layer')
+    def test_batch_respects_in_app_preferences(self, mock_get_channel_layer, mock_dispatch):
+        """Test notifications are skipped for users who opted out"""
+        mock_get_channel_layer.return_value = self.mock_channel_layer()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = create_notifications_batch(
+                self.build_notifications([self.admin, self.accounts], 'active_loan_expiry', 2)
+            )
+        dispatch_outbox()
+
+        self.assertEqual(len(created), 2)
+        self.assertFalse(Notification.objects.filter(user=self.accounts).exists())
+        self.assertEqual(len(mail.outbox), 1)
+
+    @patch('users.tasks.dispatch_notification_outbox.delay')
+    @patch('users.services.get_channel_layer')
+    def test_bulk_fan_out(self, mock_get_channel_layer, mock_dispatch):
+        """Test one notification is bulk created per distinct recipient"""
+        channel_layer = self.mock_channel_layer()
+        mock_get_channel_layer.return_value = channel_layer
+        users = [
+            User.objects.create_user(email=f'user{index}@example.com', password='testpassword')
+            for index in range(5)
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(5):
+                # Preferences, default preference insert and reload, notification and outbox inserts
+                created = create_notifications_bulk(
+                    users + [users[0], None],
+                    title='Policy update',
+                    message='Lending policy has changed',
+                    notification_type='application_status'
+                )
+        mock_dispatch.assert_called_once()
+        dispatch_outbox()
+
+        self.assertEqual(len(created), 5)
+        self.assertEqual(Notification.objects.filter(title='Policy update').count(), 5)
+        self.assertEqual(channel_layer.group_send.await_count, 5)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @patch('users.tasks.dispatch_notification_outbox.delay')
+    @patch('users.services.get_channel_layer')
+    def test_bulk_respects_in_app_preferences(self, mock_get_channel_layer, mock_dispatch):
+        """Test opted-out recipients are skipped by the bulk fan-out"""
+        mock_get_channel_layer.return_value = self.mock_channel_layer()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = create_notifications_bulk(
+                [self.admin, self.accounts],
+                title='Expiry',
+                message='Loan expires soon',
+                notification_type='active_loan_expiry'
+            )
+
+        self.assertEqual([n.user_id for n in created], [self.admin.id])
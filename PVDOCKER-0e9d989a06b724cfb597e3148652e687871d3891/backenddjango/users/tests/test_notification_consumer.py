@@ -0,0 +1,80 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from users.consumers import NotificationConsumer
+from users.services import UNREAD_COUNT_CACHE_KEY
+
+
+@patch('users.consumers.NOTIFICATION_COALESCE_WINDOW', 0.05)
+class NotificationConsumerTestCase(TestCase):
+    """Test case for coalesced WebSocket notification delivery"""
+
+    def setUp(self):
+        """Set up a user whose unread counter is already cached"""
+        self.user = SimpleNamespace(id=4242, is_anonymous=False)
+        cache.set(UNREAD_COUNT_CACHE_KEY.format(user_id=self.user.id), 7)
+
+    def tearDown(self):
+        cache.delete(UNREAD_COUNT_CACHE_KEY.format(user_id=self.user.id))
+
+    async def connect(self):
+        """Connect a consumer with a mocked channel layer and socket"""
+        consumer = NotificationConsumer()
+        consumer.scope = {'user': self.user}
+        consumer.channel_name = 'test-channel'
+        consumer.channel_layer = MagicMock(group_add=AsyncMock(), group_discard=AsyncMock())
+        consumer.accept = AsyncMock()
+        consumer.send = AsyncMock()
+        await consumer.connect()
+        self.assertEqual(self.frames(consumer), [{'type': 'unread_count', 'count': 7}])
+        consumer.send.reset_mock()
+        return consumer
+
+    def frames(self, consumer):
+        """Decode the frames sent to the client"""
+        return [json.loads(call.kwargs['text_data']) for call in consumer.send.call_args_list]
+
+    async def test_group_messages_are_coalesced_into_one_frame(self):
+        """Test many group messages in one window produce a single frame"""
+        consumer = await self.connect()
+
+        for index in range(10):
+            await consumer.notification_batch({
+                'type': 'notification_batch',
+                'notifications': [{'id': index}],
+                'count': 8 + index
+            })
+        await consumer.notification_count({'type': 'notification_count', 'count': 42})
+        await asyncio.sleep(0.2)
+
+        frames = self.frames(consumer)
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0]['type'], 'notifications')
+        self.assertEqual([n['id'] for n in frames[0]['notifications']], list(range(10)))
+        self.assertEqual(frames[0]['count'], 42)
+
+        await consumer.disconnect(1000)
+
+    async def test_count_only_subscription(self):
+        """Test count-only subscribers receive just the latest count"""
+        consumer = await self.connect()
+        await consumer.receive(json.dumps({'type': 'subscribe', 'mode': 'count_only'}))
+        self.assertEqual(self.frames(consumer), [{'type': 'subscribed', 'mode': 'count_only'}])
+        consumer.send.reset_mock()
+
+        for index in range(5):
+            await consumer.notification_batch({
+                'type': 'notification_batch',
+                'notifications': [{'id': index}],
+                'count': 10 + index
+            })
+        await asyncio.sleep(0.2)
+
+        self.assertEqual(self.frames(consumer), [{'type': 'unread_count', 'count': 14}])
+
+        await consumer.disconnect(1000)
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.models import User, Notification
+
+
+class NotificationFeedTestCase(TestCase):
+    """Test case for the cursor-paginated notification feed"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='testpassword')
+        other = User.objects.create_user(email='other@example.com', password='testpassword')
+        self.notifications = Notification.objects.bulk_create([
+            Notification(
+                user=self.user,
+                title=f'N{index}',
+                message='Message',
+                notification_type='system',
+                is_read=index % 2 == 0
+            )
+            for index in range(25)
+        ])
+        Notification.objects.create(user=other, title='Other', message='Message', notification_type='system')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('notification-feed')
+
+    def test_cursor_pages_walk_the_whole_feed(self):
+        """Test following next links returns every notification once"""
+        seen = []
+        url = self.url + '?page_size=10'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(sorted(seen), sorted(n.id for n in self.notifications))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_unread_only(self):
+        """Test unread mode filters out read notifications"""
+        response = self.client.get(self.url, {'unread': 'true', 'page_size': 100})
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertFalse(any(item['is_read'] for item in response.data['results']))
+
+    def test_since_id_delta(self):
+        """Test delta mode returns only newer notifications, oldest first"""
+        since_id = self.notifications[-3].id
+        newer = Notification.objects.create(
+            user=self.user, title='Newest', message='Message', notification_type='system'
+        )
+
+        response = self.client.get(self.url, {'since_id': since_id})
+        self.assertEqual(response.status_code, 200)
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [self.notifications[-2].id, self.notifications[-1].id, newer.id])
+        self.assertEqual(response.data['latest_id'], newer.id)
+        self.assertFalse(response.data['has_more'])
+
+        response = self.client.get(self.url, {'since_id': 'abc'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.utils import timezone
+from django.test import TestCase
+
+from users.models import User, Notification, NotificationOutbox
+from users.outbox import OUTBOX_MAX_ATTEMPTS, dispatch_outbox
+from users.services import clear_notification_preference_cache, create_notification, queue_notification_delivery
+
+
+@patch('users.tasks.dispatch_notification_outbox.delay')
+class NotificationOutboxTestCase(TestCase):
+    """Test case for the transactional notification outbox"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        clear_notification_preference_cache()
+        self.user = User.objects.create_user(
+            email='user@example.com',
+            password='testpassword',
+            role='admin'
+        )
+        self.channel_layer = MagicMock()
+        self.channel_layer.group_send = AsyncMock()
+        patcher = patch('users.services.get_channel_layer', return_value=self.channel_layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_create_notification_writes_outbox_without_delivering(self, mock_dispatch):
+        """Test nothing is delivered until the transaction commits"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            notification = create_notification(self.user, 'Title', 'Message', 'application_status')
+
+        self.assertEqual(
+            set(NotificationOutbox.objects.values_list('channel', flat=True)),
+            {'websocket', 'email'}
+        )
+        self.channel_layer.group_send.assert_not_awaited()
+        self.assertEqual(len(mail.outbox), 0)
+
+        for callback in callbacks:
+            callback()
+        mock_dispatch.assert_called_once()
+
+        self.assertEqual(dispatch_outbox()['sent'], 2)
+        self.channel_layer.group_send.assert_awaited_once()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            NotificationOutbox.objects.filter(notification=notification, status='sent').count(),
+            2
+        )
+
+        # Sent messages are not delivered again
+        self.assertEqual(dispatch_outbox()['sent'], 0)
+
+    def test_duplicate_messages_are_ignored(self, mock_dispatch):
+        """Test queuing the same notification twice yields one outbox row"""
+        notification = Notification.objects.create(
+            user=self.user, title='Title', message='Message', notification_type='system'
+        )
+        queue_notification_delivery([notification])
+        queue_notification_delivery([notification])
+
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+    @patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=ConnectionError('SMTP unavailable'))
+    def test_failed_messages_are_retried_with_backoff(self, mock_send_mail, mock_dispatch):
+        """Test failed deliveries back off and eventually stop retrying"""
+        create_notification(self.user, 'Title', 'Message', 'application_status')
+
+        stats = dispatch_outbox()
+        self.assertEqual((stats['sent'], stats['retried']), (1, 1))
+
+        email = NotificationOutbox.objects.get(channel='email')
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.available_at, timezone.now())
+        self.assertIn('SMTP unavailable', email.last_error)
+
+        for _ in range(OUTBOX_MAX_ATTEMPTS - 1):
+            NotificationOutbox.objects.filter(pk=email.pk).update(available_at=timezone.now() - timedelta(seconds=1))
+            dispatch_outbox()
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', OUTBOX_MAX_ATTEMPTS))
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.models import User, NotificationPreference
+from users.services import (
+    clear_notification_preference_cache, get_notification_preferences, get_notification_preferences_bulk
+)
+
+
+class NotificationPreferenceCacheTestCase(TestCase):
+    """Test case for the cached notification preferences"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        clear_notification_preference_cache()
+        self.users = [
+            User.objects.create_user(email=f'user{index}@example.com', password='testpassword')
+            for index in range(3)
+        ]
+        NotificationPreference.objects.create(user=self.users[0], system_in_app=False)
+
+    def test_bulk_getter_queries_once_then_caches(self):
+        """Test preferences for many users cost one lookup and are then cached"""
+        user_ids = [user.id for user in self.users]
+
+        # Load existing, create missing defaults, reload the created defaults
+        with self.assertNumQueries(3):
+            preferences = get_notification_preferences_bulk(user_ids)
+        self.assertEqual(set(preferences), set(user_ids))
+        self.assertFalse(preferences[self.users[0].id].system_in_app)
+
+        with self.assertNumQueries(0):
+            get_notification_preferences_bulk(user_ids)
+
+        # A cold process falls back to the shared cache without querying
+        clear_notification_preference_cache()
+        with self.assertNumQueries(0):
+            self.assertFalse(get_notification_preferences(self.users[0].id).system_in_app)
+
+    def test_saving_preferences_invalidates_cache(self):
+        """Test a saved preference is visible on the next read"""
+        preferences = get_notification_preferences(self.users[0].id)
+        self.assertFalse(preferences.system_in_app)
+
+        stored = NotificationPreference.objects.get(user=self.users[0])
+        stored.system_in_app = True
+        stored.save()
+
+        self.assertTrue(get_notification_preferences(self.users[0].id).system_in_app)
+
+    def test_preference_view_put_invalidates_cache(self):
+        """Test updating preferences through the API invalidates the cache"""
+        get_notification_preferences(self.users[0].id)
+        client = APIClient()
+        client.force_authenticate(user=self.users[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.put(reverse('notification-preferences'), {'system_in_app': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertTrue(get_notification_preferences(self.users[0].id).system_in_app)
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from users.models import User, Notification, EmailLog
+from users.retention import apply_retention_policy, get_retention_policy, retention_report
+from users.services import get_unread_count
+
+
+class RetentionTestCase(TestCase):
+    """Test case for the chunked data retention policies"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='testpassword')
+        self.old = timezone.now() - timedelta(days=400)
+
+    def make_notifications(self, count, created_at, **kwargs):
+        """Create notifications and backdate them"""
+        notifications = Notification.objects.bulk_create([
+            Notification(user=self.user, title=f'N{index}', message='Message', notification_type='system', **kwargs)
+            for index in range(count)
+        ])
+        Notification.objects.filter(pk__in=[n.pk for n in notifications]).update(created_at=created_at)
+        return notifications
+
+    def test_dry_run_reports_without_deleting(self):
+        """Test the dry-run report counts expired rows and changes nothing"""
+        self.make_notifications(3, self.old)
+        self.make_notifications(2, timezone.now())
+
+        report = {entry['policy']: entry for entry in retention_report()}
+        self.assertEqual(report['notifications']['expired_rows'], 3)
+
+        out = StringIO()
+        call_command('apply_retention', '--dry-run', stdout=out)
+        self.assertIn('notifications: 3 rows to delete', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 5)
+
+    def test_deletes_in_chunks_and_invalidates_unread_counts(self):
+        """Test expired rows are removed chunk by chunk"""
+        self.make_notifications(5, self.old)
+        self.make_notifications(2, timezone.now())
+        self.assertEqual(get_unread_count(self.user.id), 7)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = apply_retention_policy(get_retention_policy('notifications'), chunk_size=2, pause=0)
+        deletes = [q['sql'] for q in queries if q['sql'].startswith('DELETE FROM "users_notification"')]
+        self.assertEqual(len(deletes), 3)
+
+        self.assertEqual(result, {'policy': 'notifications', 'processed': 5, 'finished': True})
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(get_unread_count(self.user.id), 2)
+
+    def test_resumes_after_time_budget(self):
+        """Test a run that hits its deadline resumes from its cursor"""
+        self.make_notifications(4, self.old)
+        policy = get_retention_policy('notifications')
+
+        result = apply_retention_policy(policy, chunk_size=2, pause=0, deadline=0)
+        self.assertEqual((result['processed'], result['finished']), (2, False))
+
+        result = apply_retention_policy(policy, chunk_size=2, pause=0)
+        self.assertEqual((result['processed'], result['finished']), (4, True))
+        self.assertFalse(Notification.objects.exists())
+
+    def test_email_bodies_are_scrubbed(self):
+        """Test old email logs keep their row but lose the stored body"""
+        log = EmailLog.objects.create(user=self.user, subject='Digest', message_body='<html>...</html>')
+        EmailLog.objects.filter(pk=log.pk).update(sent_at=timezone.now() - timedelta(days=60))
+
+        apply_retention_policy(get_retention_policy('email_log_bodies'), pause=0)
+
+        log.refresh_from_db()
+        self.assertEqual(log.message_body, '')
@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from unittest.mock import patch
+from rest_framework.test import APIClient
+
+from users.models import User, Notification
+from users.services import (
+    clear_notification_preference_cache, create_notification, create_notifications_bulk, get_unread_count, invalidate_unread_counts,
+    mark_notifications_read, reconcile_unread_counts
+)
+
+
+@patch('users.services.send_email_notification')
+@patch('users.services.get_channel_layer')
+class UnreadCountTestCase(TestCase):
+    """Test case for the incrementally maintained unread counters"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        clear_notification_preference_cache()
+        self.user = User.objects.create_user(
+            email='user@example.com',
+            password='testpassword',
+            role='admin'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def notify(self, count):
+        """Create notifications for the test user"""
+        return [
+            create_notification(self.user, f'Title {index}', 'Message', 'application_status')
+            for index in range(count)
+        ]
+
+    def test_counter_is_recomputed_once_then_served_from_cache(self, *mocks):
+        """Test a cache miss costs one query and later reads cost none"""
+        Notification.objects.create(user=self.user, title='Seed', message='Seed', notification_type='system')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_unread_count(self.user.id), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user.id), 1)
+
+    def test_counter_follows_create_and_mark_read(self, *mocks):
+        """Test creates increment and mark-read decrements the counter"""
+        get_unread_count(self.user.id)
+        notifications = self.notify(3)
+        self.assertEqual(get_unread_count(self.user.id), 3)
+
+        marked, unread = mark_notifications_read(self.user, [notifications[0].id])
+        self.assertEqual((marked, unread), (1, 2))
+
+        # Marking an already read notification does not move the counter
+        marked, unread = mark_notifications_read(self.user, [notifications[0].id])
+        self.assertEqual((marked, unread), (0, 2))
+
+        marked, unread = mark_notifications_read(self.user)
+        self.assertEqual((marked, unread), (2, 0))
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=False).exists())
+
+    def test_bulk_create_increments_counter(self, *mocks):
+        """Test the bulk fan-out keeps counters current"""
+        get_unread_count(self.user.id)
+        create_notifications_bulk([self.user], 'Bulk', 'Message', 'application_status')
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+    def test_reconcile_corrects_drift(self, *mocks):
+        """Test reconciliation rewrites counters from the database"""
+        get_unread_count(self.user.id)
+        self.notify(2)
+        Notification.objects.filter(user=self.user).first().delete()
+        self.assertEqual(get_unread_count(self.user.id), 2)
+
+        reconcile_unread_counts()
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+        invalidate_unread_counts([self.user.id])
+        self.assertIsNone(cache.get(f'notifications:unread:{self.user.id}'))
+
+    def test_count_endpoints_use_counter(self, *mocks):
+        """Test the count endpoints and mark-read endpoints share the counter"""
+        get_unread_count(self.user.id)
+        notifications = self.notify(2)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('notification-count'))
+        self.assertEqual(response.data['unread_count'], 2)
+
+        self.client.post(reverse('notification-mark-as-read', args=[notifications[0].id]))
+        response = self.client.get(reverse('notification-unread-count'))
+        self.assertEqual(response.data['unread_count'], 1)
+
+        self.client.post(reverse('notification-mark-read'), {}, format='json')
+        response = self.client.get(reverse('notification-count'))
+        self.assertEqual(response.data['unread_count'], 0)
@@ -25,6 +25,7 @@ urlpatterns = [
     path('notifications/', views.NotificationListView.as_view(), name='notification-list'),
     path('notifications/mark-read/', views.NotificationMarkReadView.as_view(), name='notification-mark-read'),
     path('notifications/count/', views.NotificationCountView.as_view(), name='notification-count'),
+    path('notifications/feed/', views.NotificationFeedView.as_view(), name='notification-feed'),
     
     # Notification preferences
     path('notification-preferences/', views.NotificationPreferenceView.as_view(), name='notification-preferences'),
@@ -14,8 +14,11 @@ from .serializers import (
     UserLoginSerializer, PasswordResetRequestSerializer, PasswordResetConfirmSerializer,
     LogoutSerializer, EmailLogSerializer, EmailPreviewSerializer, DownloadEmailLogsSerializer
 )
+from .pagination import NotificationCursorPagination
 from .permissions import IsAdmin, IsSelfOrAdmin
-from .services import get_or_create_notification_preferences
+from .services import (
+    get_or_create_notification_preferences, get_unread_count, mark_notifications_read, send_unread_count
+)
 from django.contrib.auth import authenticate
 import logging
 from django.http import HttpResponse
@@ -201,16 +204,15 @@ class NotificationMarkReadView(APIView):
         notification_id = request.data.get('notification_id')
         
         if notification_id:
-            try:
-                notification = Notification.objects.get(id=notification_id, user=request.user)
-                notification.is_read = True
-                notification.save()
-                return Response({'status': 'notification marked as read'})
-            except Notification.DoesNotExist:
+            if not Notification.objects.filter(id=notification_id, user=request.user).exists():
                 return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+            _, unread_count = mark_notifications_read(request.user, [notification_id])
+            send_unread_count(request.user.id, unread_count)
+            return Response({'status': 'notification marked as read'})
         else:
             # Mark all as read
-            Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+            mark_notifications_read(request.user)
+            send_unread_count(request.user.id, 0)
             return Response({'status': 'all notifications marked as read'})
 
 
@@ -222,8 +224,61 @@ class NotificationCountView(APIView):
     serializer_class = NotificationListSerializer
     
     def get(self, request):
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return Response({'unread_count': count})
+        return Response({'unread_count': get_unread_count(request.user.id)})
+
+
+class NotificationFeedView(ListAPIView):
+    """
+    API endpoint for the cursor-paginated notification feed
+    
+    Query parameters:
+        unread: 'true' to return only unread notifications
+        since_id: Return only notifications newer than this ID, oldest
+            first, for catching up after a WebSocket ping
+        page_size: Number of notifications per page (max 100)
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = NotificationListSerializer
+    pagination_class = NotificationCursorPagination
+    # Ordering is fixed by the cursor
+    filter_backends = []
+    
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Notification.objects.none()
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.query_params.get('unread', '').lower() in ('true', '1'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+    
+    @extend_schema(parameters=[
+        OpenApiParameter("unread", bool, OpenApiParameter.QUERY),
+        OpenApiParameter("since_id", int, OpenApiParameter.QUERY),
+    ])
+    def get(self, request, *args, **kwargs):
+        since_id = request.query_params.get('since_id')
+        if since_id is None:
+            return super().get(request, *args, **kwargs)
+        
+        try:
+            since_id = int(since_id)
+        except ValueError:
+            return Response({'error': 'since_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Delta mode: only notifications created after since_id, oldest first
+        limit = self.pagination_class.max_page_size
+        notifications = list(
+            self.get_queryset().filter(id__gt=since_id).order_by('id')[:limit + 1]
+        )
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
+        
+        return Response({
+            'results': self.get_serializer(notifications, many=True).data,
+            'latest_id': notifications[-1].id if notifications else since_id,
+            'has_more': has_more,
+            'unread_count': get_unread_count(request.user.id)
+        })
 
 
 class NotificationPreferenceView(APIView):
@@ -341,27 +396,10 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         Mark a notification as read
         """
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        _, unread_count = mark_notifications_read(request.user, [notification.id])
         
         # Send WebSocket update for unread count
-        try:
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            
-            channel_layer = get_channel_layer()
-            unread_count = self.get_queryset().filter(is_read=False).count()
-            
-            async_to_sync(channel_layer.group_send)(
-                f"user_{request.user.id}_notifications",
-                {
-                    'type': 'notification_count',
-                    'count': unread_count
-                }
-            )
-        except Exception as e:
-            # Log the error but don't fail the operation
-            print(f"Error sending WebSocket notification: {str(e)}")
+        send_unread_count(request.user.id, unread_count)
             
         return Response({'status': 'notification marked as read'})
     
@@ -370,25 +408,10 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Mark all notifications as read
         """
-        self.get_queryset().update(is_read=True)
+        mark_notifications_read(request.user)
         
         # Send WebSocket update for unread count
-        try:
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            
-            channel_layer = get_channel_layer()
-            
-            async_to_sync(channel_layer.group_send)(
-                f"user_{request.user.id}_notifications",
-                {
-                    'type': 'notification_count',
-                    'count': 0
-                }
-            )
-        except Exception as e:
-            # Log the error but don't fail the operation
-            print(f"Error sending WebSocket notification: {str(e)}")
+        send_unread_count(request.user.id, 0)
             
         return Response({'status': 'all notifications marked as read'})
     
@@ -397,8 +420,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Get count of unread notifications
         """
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({'unread_count': count})
+        return Response({'unread_count': get_unread_count(request.user.id)})
 
 
 @extend_schema(